@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+/admin/index/search and /admin/index/list: the previous per-request scan of
+every row vs ScrollCatalog (trigram candidates + precomputed series counts).
+
+  build_ms     ScrollCatalog construction
+  linear_ms    regex over every title/file name (old endpoint, no early stop)
+  catalog_ms   ScrollCatalog.search()
+  cands        scrolls the catalog actually ran the regex on
+
+  python scripts/bench_admin_index.py --sizes 20k,100k
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+
+from bench_common import LORE_WORDS, SERIES, parse_sizes, timeit
+
+from tobyworld.utils.scroll_catalog import ScrollCatalog
+
+PATTERNS = ["rune", "toby_ql0001", "lotus leaf", "(frog|toad) pond", r"^TOBY_F\d+_tide", "zzzz", "p.t.ence"]
+SERIES_PFX = ("TOBY_L", "TOBY_QA", "TOBY_F", "TOBY_QL")
+
+
+def meta_rows(n: int, seed: int = 7):
+    """Names + titles only (the admin endpoints never read the body)."""
+    rng = random.Random(seed)
+    return [
+        {"id": f"/scrolls/{SERIES[i % len(SERIES)]}{i:06d}_{rng.choice(LORE_WORDS)}.md",
+         "meta": {"title": " ".join(rng.choice(LORE_WORDS) for _ in range(rng.randint(2, 5))).title()}}
+        for i in range(n)
+    ]
+
+
+def linear_search(rows, q):
+    rx = re.compile(q, re.I)
+    out = []
+    for d in rows:
+        title = str(d["meta"].get("title", ""))
+        fname = Path(d["id"]).name
+        if rx.search(title) or rx.search(fname):
+            out.append({"file": fname, "title": title})
+            if len(out) >= 25:
+                break
+    return out
+
+
+def linear_counts(rows):
+    return {p: sum(1 for d in rows if Path(d["id"]).name.startswith(p)) for p in SERIES_PFX}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="20k,100k")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    for n in parse_sizes(args.sizes):
+        rows = sorted(meta_rows(n), key=lambda r: r["id"])
+        t0 = time.perf_counter()
+        cat = ScrollCatalog(rows)
+        build = (time.perf_counter() - t0) * 1000.0
+        print(f"\n{n} scrolls, catalog build {build:.0f} ms")
+        print(f"{'pattern':<20} {'linear_ms':>9} {'catalog_ms':>10} {'cands':>7} {'same':>5}")
+        for q in PATTERNS:
+            lin = timeit(lambda: linear_search(rows, q), args.repeat)["mean_ms"]
+            res = cat.search(q, budget_s=60.0)
+            fast = timeit(lambda: cat.search(q, budget_s=60.0), args.repeat)["mean_ms"]
+            same = res["matches"] == linear_search(rows, q)
+            print(f"{q:<20} {lin:>9.2f} {fast:>10.3f} {res['candidates']:>7} {str(same):>5}")
+        lin = timeit(lambda: linear_counts(rows), args.repeat)["mean_ms"]
+        fast = timeit(lambda: {p: cat.count_prefix(p) for p in SERIES_PFX}, args.repeat)["mean_ms"]
+        print(f"{'list counts':<20} {lin:>9.2f} {fast:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+ANN index types (retrieval/ann.py) vs. the exact flat index: recall@k and
+per-query latency through Retriever.search_embedding, swept over nprobe
+(IVF, IVF-PQ) and efSearch (HNSW), to pick the setting that fits the SLO.
+
+  recall@k   overlap with the exact inner-product top-k
+  mean_ms / p95_ms   single-query latency (incl. IVF-PQ float32 rescoring)
+  MiB        vectors.faiss size; build_s: train + add
+
+Synthetic clustered unit vectors by default; --index-dir runs on a real
+index (its embeddings.npy). Queries are perturbed corpus rows either way.
+--report writes the table as JSON; the last line names the fastest setting
+with recall >= --min-recall (and p95 <= --slo-ms when given).
+
+  python scripts/bench_ann.py --sizes 100k
+  python scripts/bench_ann.py --index-dir data/index --report ann_report.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bench_common import parse_sizes
+from bench_quant import clustered
+
+import faiss
+
+from tobyworld.retrieval.ann import build_faiss_index
+from tobyworld.retrieval.retriever import Retriever
+
+
+def _ints(s: str):
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def near_queries(embs: np.ndarray, n: int, noise: float = 0.05) -> np.ndarray:
+    """Perturbed corpus rows: queries land near the data, as real questions do."""
+    rng = np.random.default_rng(11)
+    qs = embs[rng.choice(len(embs), min(n, len(embs)), replace=False)]
+    qs = qs + noise * rng.standard_normal(qs.shape, dtype=np.float32)
+    return qs / np.linalg.norm(qs, axis=1, keepdims=True)
+
+
+def exact_topk(embs: np.ndarray, qs: np.ndarray, k: int):
+    sims = qs @ embs.T
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    return [set(row.tolist()) for row in top]
+
+
+def run(embs: np.ndarray, qs: np.ndarray, args, label: str):
+    k = args.k
+    truth = exact_topk(embs, qs, k)
+    items = [{"path": f"c{i}", "chunk": 0} for i in range(len(embs))]
+    sweeps = [("flat", None)]
+    for t in args.types.split(","):
+        knob = _ints(args.ef) if t == "hnsw" else _ints(args.nprobe)
+        sweeps += [(t, v) for v in knob]
+    rows, built = [], {}
+    print(f"\n{label}: {len(embs)} vectors x {embs.shape[1]}, {len(qs)} queries, k={k}")
+    print(f"{'index':>6} {'param':>12} {'build_s':>8} {'MiB':>8} {'recall@' + str(k):>9} {'mean_ms':>8} {'p95_ms':>8}")
+    with tempfile.TemporaryDirectory() as td:
+        for kind, v in sweeps:
+            d = Path(td) / kind
+            if kind not in built:
+                d.mkdir()
+                np.save(d / "embeddings.npy", embs)
+                t0 = time.perf_counter()
+                index, info = build_faiss_index(embs, kind, nlist=args.nlist)
+                bs = time.perf_counter() - t0
+                faiss.write_index(index, str(d / "vectors.faiss"))
+                (d / "meta.json").write_text(json.dumps({"items": items, "normalize": True, "ann": info}))
+                built[kind] = (Retriever(d), bs, (d / "vectors.faiss").stat().st_size / 2**20, info)
+            r, bs, mib, info = built[kind]
+            kw = {"ef_search": v} if kind == "hnsw" else {"nprobe": v} if v else {}
+            for q in qs[:5]:  # warm up
+                r.search_embedding(q, top_k=k, **kw)
+            lat, rec = [], []
+            for q, t in zip(qs, truth):
+                t0 = time.perf_counter()
+                hits = r.search_embedding(q, top_k=k, **kw)
+                lat.append((time.perf_counter() - t0) * 1000.0)
+                rec.append(len({int(h.path[1:]) for h in hits} & t) / k)
+            param = "" if v is None else (f"ef={v}" if kind == "hnsw" else f"nprobe={v}")
+            if kind in ("ivf", "ivfpq"):
+                param += f"/{info['nlist']}"
+            row = {"index": kind, "param": param, "build_s": round(bs, 2), "MiB": round(mib, 1),
+                   "recall": round(float(np.mean(rec)), 4), "mean_ms": round(float(np.mean(lat)), 3),
+                   "p95_ms": round(float(np.percentile(lat, 95)), 3), **kw}
+            rows.append(row)
+            print(f"{kind:>6} {param:>12} {bs:>8.2f} {mib:>8.1f} {row['recall']:>9.3f} "
+                  f"{row['mean_ms']:>8.3f} {row['p95_ms']:>8.3f}")
+    ok = [r for r in rows if r["recall"] >= args.min_recall and (args.slo_ms is None or r["p95_ms"] <= args.slo_ms)]
+    best = min(ok, key=lambda r: r["p95_ms"]) if ok else None
+    if best:
+        print(f"fastest with recall >= {args.min_recall}: {best['index']} {best['param']} "
+              f"(p95 {best['p95_ms']} ms, recall {best['recall']})")
+    else:
+        print(f"no setting reaches recall {args.min_recall}" + (f" within {args.slo_ms} ms" if args.slo_ms else ""))
+    return {"label": label, "vectors": len(embs), "dim": int(embs.shape[1]), "k": k, "rows": rows, "best": best}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100k")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--index-dir", default=None, help="use this index's embeddings.npy instead of synthetic vectors")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--types", default="ivf,ivfpq,hnsw")
+    ap.add_argument("--nlist", type=int, default=None)
+    ap.add_argument("--nprobe", default="1,4,8,16,32,64")
+    ap.add_argument("--ef", default="16,32,64,128,256")
+    ap.add_argument("--min-recall", type=float, default=0.95)
+    ap.add_argument("--slo-ms", type=float, default=None, help="p95 latency budget for the recommendation")
+    ap.add_argument("--report", default=None, help="write the results as JSON here")
+    args = ap.parse_args()
+
+    faiss.omp_set_num_threads(1)  # single-query latency, as served
+    reports = []
+    if args.index_dir:
+        embs = np.load(Path(args.index_dir) / "embeddings.npy").astype(np.float32)
+        reports.append(run(embs, near_queries(embs, args.queries), args, args.index_dir))
+    else:
+        for n in parse_sizes(args.sizes):
+            embs = clustered(n, args.dim, np.random.default_rng(7))
+            reports.append(run(embs, near_queries(embs, args.queries), args, "synthetic"))
+    if args.report:
+        Path(args.report).write_text(json.dumps(reports, indent=2), encoding="utf-8")
+        print(f"wrote {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Shared helpers for the scripts/bench_*.py micro-benchmarks (synthetic scrolls + timing)."""
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# make `tobyworld` importable when run as `python scripts/bench_x.py`
+_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(_SRC) not in sys.path:
+    sys.path.insert(0, str(_SRC))
+
+SERIES = ["TOBY_QL", "TOBY_QA", "TOBY_L", "TOBY_F"]
+LORE_WORDS = (
+    "toby patience toad pond mirror silence leaf lotus taboshi satoby epoch "
+    "rune bushido frog lily ripple scroll guardian loyalty courage belief "
+    "vow season reward burn proof time jade seeker path wave spiral sigil "
+    "dawn dusk elder tide wisdom stillness cadence resonance lucidity ledger"
+).split()
+FILLER_WORDS = [f"w{i}" for i in range(4000)]
+
+QUERIES = [
+    "who is toby",
+    "what is patience in tobyworld",
+    "taboshi vs satoby",
+    "the silence within the mirror",
+    "epoch 3 rune burn proof of time",
+    "lotus leaf pond",
+]
+
+
+def _zipf_vocab(rng: random.Random) -> Callable[[], str]:
+    vocab = LORE_WORDS + FILLER_WORDS
+    weights = [1.0 / (i + 1) ** 1.05 for i in range(len(vocab))]
+    cum = []
+    acc = 0.0
+    for w in weights:
+        acc += w
+        cum.append(acc)
+
+    def draw() -> str:
+        return rng.choices(vocab, cum_weights=cum, k=1)[0]
+    return draw
+
+
+def synth_rows(n: int, seed: int = 7, min_words: int = 120, max_words: int = 600) -> List[Dict[str, Any]]:
+    """Synthetic rows shaped like load_scroll_index() output."""
+    rng = random.Random(seed)
+    draw = _zipf_vocab(rng)
+    rows: List[Dict[str, Any]] = []
+    for i in range(n):
+        series = SERIES[i % len(SERIES)]
+        fname = f"{series}{i:06d}_{rng.choice(LORE_WORDS)}.md"
+        title = " ".join(rng.choice(LORE_WORDS) for _ in range(rng.randint(2, 5))).title()
+        words = [draw() for _ in range(rng.randint(min_words, max_words))]
+        paras = []
+        for j in range(0, len(words), 60):
+            paras.append(" ".join(words[j:j + 60]).capitalize() + ".")
+        rows.append({
+            "id": f"lore-scrolls/{fname}",
+            "text": f"# {title}\n\n" + "\n\n".join(paras),
+            "meta": {"path": f"lore-scrolls/{fname}", "title": title, "timestamp": 1.7e9 + i * 3600.0},
+        })
+    return rows
+
+
+def write_scrolls(rows: List[Dict[str, Any]], root: Path) -> List[Path]:
+    """Materialize synthetic rows as markdown files with frontmatter under root."""
+    root.mkdir(parents=True, exist_ok=True)
+    out: List[Path] = []
+    for r in rows:
+        p = root / Path(r["id"]).name
+        meta = r["meta"]
+        fm = f"---\ntitle: {meta['title']}\ndate: 2024-0{1 + len(out) % 9}-1{len(out) % 9}\ntags: lore, toby\n---\n"
+        p.write_text(fm + r["text"], encoding="utf-8")
+        out.append(p)
+    return out
+
+
+def timeit(fn: Callable[[], Any], repeat: int = 5) -> Dict[str, float]:
+    """Wall-clock stats (ms) over `repeat` calls."""
+    samples = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    samples.sort()
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "max_ms": samples[-1],
+    }
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux /proc), 0 if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+def parse_sizes(s: str) -> List[int]:
+    out = []
+    for part in s.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        mult = 1000 if part.endswith("k") else 1
+        out.append(int(float(part.rstrip("k")) * mult))
+    return out
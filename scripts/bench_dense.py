@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Dense arc startup cost: retrieval.retriever.Retriever with the embeddings
+memory-mapped (current) vs. read fully into RAM (the old np.load).
+
+Each mode runs in a fresh interpreter so RSS is not polluted by the other.
+Reports RSS growth after loading, first-query latency (pages fault in on
+first touch when mmapped) and warm-query latency. Synthetic normalized
+float32 vectors, NumPy search path (no vectors.faiss written).
+
+  python scripts/bench_dense.py --sizes 10k,100k --dim 384
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_common import parse_sizes, rss_bytes, timeit
+
+
+def write_index(out: Path, n: int, dim: int, seed: int = 7) -> None:
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    embs = rng.standard_normal((n, dim), dtype=np.float32)
+    embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+    out.mkdir(parents=True, exist_ok=True)
+    np.save(out / "embeddings.npy", embs)
+    items = [{"path": f"lore-scrolls/TOBY_QL{i // 4:06d}.md", "chunk": i % 4} for i in range(n)]
+    (out / "meta.json").write_text(json.dumps({"items": items, "normalize": True}), encoding="utf-8")
+
+
+def child(index_dir: str, mode: str, k: int) -> None:
+    import time
+    import numpy as np
+    from tobyworld.retrieval.retriever import Retriever
+
+    base = rss_bytes()
+    t0 = time.perf_counter()
+    r = Retriever(Path(index_dir))
+    if mode == "eager":
+        r._embs = np.load(Path(index_dir) / "embeddings.npy")  # pre-mmap behaviour
+    load_ms = (time.perf_counter() - t0) * 1000.0
+    loaded = rss_bytes()
+    q = np.random.default_rng(1).standard_normal(r._embs.shape[1]).astype(np.float32)
+    q /= np.linalg.norm(q)
+    t0 = time.perf_counter()
+    r.search_embedding(q, top_k=k)
+    first_ms = (time.perf_counter() - t0) * 1000.0
+    warm_ms = timeit(lambda: r.search_embedding(q, top_k=k), 5)["mean_ms"]
+    print(json.dumps({
+        "load_ms": load_ms, "rss_load_MiB": (loaded - base) / 2**20,
+        "first_ms": first_ms, "warm_ms": warm_ms, "rss_query_MiB": (rss_bytes() - base) / 2**20,
+    }))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10k,100k")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, default=64)
+    ap.add_argument("--child", nargs=2, metavar=("INDEX_DIR", "MODE"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        child(args.child[0], args.child[1], args.k)
+        return
+
+    print(f"{'chunks':>8} {'mode':>6} {'load_ms':>8} {'rss_load_MiB':>13} {'first_ms':>9} {'warm_ms':>8} {'rss_query_MiB':>14}")
+    for n in parse_sizes(args.sizes):
+        with tempfile.TemporaryDirectory() as td:
+            write_index(Path(td), n, args.dim)
+            for mode in ("eager", "mmap"):
+                res = subprocess.run(
+                    [sys.executable, __file__, "--k", str(args.k), "--child", td, mode],
+                    capture_output=True, text=True, check=True,
+                )
+                r = json.loads(res.stdout.strip().splitlines()[-1])
+                print(f"{n:>8} {mode:>6} {r['load_ms']:>8.1f} {r['rss_load_MiB']:>13.1f} "
+                      f"{r['first_ms']:>9.2f} {r['warm_ms']:>8.2f} {r['rss_query_MiB']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
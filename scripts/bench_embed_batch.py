@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Concurrent dense lookups: one encode() + search per request (direct) vs.
+the micro-batcher (retrieval/batching.py BatchedQuerySearch: one encode()
+and one Retriever.search_embeddings for every query of a window).
+
+Closed-loop load: `c` threads each send queries back to back for
+--seconds; reports throughput (queries/s), p50 / p99 latency and the mean
+batch size, per concurrency level.
+
+The encoder is a NumPy stand-in with a transformer-like cost profile
+(token embeddings + six 384x1536 feed-forward layers, one token per word
+padded to the longest text of the call, mean-pooled, plus --call-ms of
+fixed per-call cost standing in for tokenizer / framework dispatch) unless
+--model names a SentenceTransformer. The index is a flat FAISS index
+(--index numpy: Retriever's matmul path) over synthetic vectors.
+
+  python scripts/bench_embed_batch.py --chunks 50k --concurrency 1,4,16,64
+  python scripts/bench_embed_batch.py --model all-MiniLM-L6-v2
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bench_common import QUERIES, parse_sizes
+from bench_dense import write_index
+
+from tobyworld.retrieval.batching import BatchedQuerySearch
+from tobyworld.retrieval.retriever import Retriever
+
+
+class ToyEncoder:
+    """SentenceTransformer-shaped encode() whose cost grows with tokens like a small transformer's."""
+
+    def __init__(self, dim: int = 384, hidden: int = 1536, layers: int = 6, vocab: int = 8192,
+                 call_ms: float = 2.0, seed: int = 3):
+        rng = np.random.default_rng(seed)
+        self.emb = rng.standard_normal((vocab, dim), dtype=np.float32)
+        self.w1 = rng.standard_normal((dim, hidden), dtype=np.float32) / np.sqrt(dim)
+        self.w2 = rng.standard_normal((hidden, dim), dtype=np.float32) / np.sqrt(hidden)
+        self.layers, self.vocab, self.call_s = layers, vocab, call_ms / 1000.0
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True, **_):
+        end = time.perf_counter() + self.call_s
+        while time.perf_counter() < end:  # Python-side per-call work holds the GIL; sleep() would not
+            pass
+        ids = [[hash(w) % self.vocab for w in t.split()] or [0] for t in texts]
+        T = max(len(t) for t in ids)
+        toks = np.asarray([t + [0] * (T - len(t)) for t in ids])
+        mask = (np.arange(T)[None, :] < np.asarray([len(t) for t in ids])[:, None]).astype(np.float32)
+        x = self.emb[toks]  # (b, T, dim)
+        for _layer in range(self.layers):
+            x = x + np.maximum(x @ self.w1, 0.0) @ self.w2
+            x /= np.linalg.norm(x, axis=-1, keepdims=True)
+        out = (x * mask[..., None]).sum(axis=1) / mask.sum(axis=1, keepdims=True)
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out.astype(np.float32)
+
+
+def run(fn, conc: int, seconds: float):
+    lat, lock = [], threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def worker(w: int):
+        mine, i = [], w
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            fn(f"{QUERIES[i % len(QUERIES)]} {i}")
+            mine.append((time.perf_counter() - t0) * 1000.0)
+            i += conc
+        with lock:
+            lat.extend(mine)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(conc)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    return len(lat) / wall, float(np.percentile(lat, 50)), float(np.percentile(lat, 99))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", default="50k")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, default=16)
+    ap.add_argument("--concurrency", default="1,4,16,64")
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--max-batch", type=int, default=32)
+    ap.add_argument("--wait-ms", type=float, default=2.0)
+    ap.add_argument("--model", default=None, help="SentenceTransformer name (default: NumPy stand-in encoder)")
+    ap.add_argument("--call-ms", type=float, default=2.0, help="stand-in encoder: fixed cost per encode() call")
+    ap.add_argument("--index", choices=["faiss", "numpy"], default="faiss")
+    args = ap.parse_args()
+
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+        args.dim = model.get_sentence_embedding_dimension()
+    else:
+        model = ToyEncoder(args.dim, call_ms=args.call_ms)
+    n = parse_sizes(args.chunks)[0]
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    with tempfile.TemporaryDirectory() as td:
+        write_index(Path(td), n, args.dim)
+        if args.index == "faiss":
+            try:
+                import faiss
+                from tobyworld.retrieval.ann import build_faiss_index
+                index, _ = build_faiss_index(np.load(Path(td) / "embeddings.npy"), "flat")
+                faiss.write_index(index, str(Path(td) / "vectors.faiss"))
+            except ImportError:
+                pass
+        r = Retriever(Path(td))
+
+        def encode(texts):
+            return model.encode(texts, batch_size=len(texts), convert_to_numpy=True, normalize_embeddings=True)
+
+        def direct(text):
+            return r.search_embedding(encode([text])[0], top_k=args.k)
+
+        print(f"{n} chunks x {args.dim}, k={args.k}, index={'faiss ' + r.ann if r._faiss is not None else 'numpy'}, "
+              f"encoder={args.model or 'numpy stand-in'}, max_batch={args.max_batch}, wait={args.wait_ms} ms")
+        print(f"{'mode':>8} {'conc':>5} {'qps':>8} {'p50_ms':>8} {'p99_ms':>8} {'batch':>6}")
+        for conc in levels:
+            qps, p50, p99 = run(direct, conc, args.seconds)
+            print(f"{'direct':>8} {conc:>5} {qps:>8.0f} {p50:>8.2f} {p99:>8.2f} {1:>6}")
+            dense = BatchedQuerySearch(encode, r.search_embeddings, max_batch=args.max_batch, max_wait_ms=args.wait_ms)
+            qps, p50, p99 = run(lambda t: dense.search(t, args.k), conc, args.seconds)
+            dense.close()
+            print(f"{'batched':>8} {conc:>5} {qps:>8.0f} {p50:>8.2f} {p99:>8.2f} "
+                  f"{dense.batcher.stats()['mean_batch']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Metadata-filtered BM25 top-10: bitmap mask pushed into scoring vs scoring
+everything and filtering afterwards (what a post-retrieval filter costs
+when it must still return k hits).
+
+  filter       share of the corpus it keeps
+  post_ms      exhaustive BM25 scores, then keep matching docs, top-10
+  mask_ms      BM25Scorer.search(mask=index.doc_mask(filters)), incl. the mask
+               ((none): the unfiltered search)
+  touched      postings the masked search read (of `total`)
+
+  python scripts/bench_filters.py --sizes 50k
+"""
+from __future__ import annotations
+
+import argparse
+import random
+
+from bench_common import QUERIES, parse_sizes, synth_rows, timeit
+
+from tobyworld.agentic_rag.lexical_index import BM25Scorer, LexicalIndex, tokenize
+from tobyworld.agentic_rag.meta_filters import normalize_filters, row_matches
+
+FILTERS = [
+    {"series": "TOBY_QL"},
+    {"series": ["TOBY_QL", "TOBY_QA"], "lang": "en"},
+    {"series": "TOBY_QL", "tags": "rune"},
+    {"tags": "rune", "since": "2024-06-01", "until": "2024-06-30"},
+]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="50k")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    for n in parse_sizes(args.sizes):
+        rng = random.Random(5)
+        rows = synth_rows(n)
+        for r in rows:
+            r["meta"].update(lang=rng.choice(["en", "en", "en", "ja"]),
+                             tags=rng.sample(["lore", "epoch", "rune", "pond", "vow"], rng.randint(0, 2)))
+        ix = LexicalIndex(rows)
+        bm = BM25Scorer(ix)
+        print(f"\n{n} scrolls")
+        print(f"{'filter':<60} {'keep':>6} {'post_ms':>8} {'mask_ms':>8} {'touched':>9} {'total':>9}")
+        for q in QUERIES:
+            bm.search(q, k=10)
+        base = timeit(lambda: [bm.search(q, k=10) for q in QUERIES], args.repeat)["mean_ms"] / len(QUERIES)
+        print(f"{'(none)':<60} {1:>6.1%} {'':>8} {base:>8.2f}")
+        for f in FILTERS:
+            nf = normalize_filters(f)
+            keep = {d for d, r in enumerate(ix.rows) if row_matches(r, nf)}
+
+            def post():
+                for q in QUERIES:
+                    ix.top_k({d: s for d, s in bm.score(tokenize(q)).items() if d in keep}, 10)
+
+            def masked():
+                for q in QUERIES:
+                    bm.search(q, k=10, mask=ix.doc_mask(f))
+
+            for q in QUERIES:  # same results, and warm the impact-order cache
+                ref = ix.top_k({d: s for d, s in bm.score(tokenize(q)).items() if d in keep}, 10)
+                assert [d for d, _ in bm.search(q, k=10, mask=ix.doc_mask(f))] == [d for d, _ in ref]
+            touched = total = 0
+            for q in QUERIES:
+                st = {}
+                bm.search(q, k=10, stats=st, mask=ix.doc_mask(f))
+                touched += st["postings_touched"]
+                total += st["postings_total"]
+            p_ms = timeit(post, args.repeat)["mean_ms"] / len(QUERIES)
+            m_ms = timeit(masked, args.repeat)["mean_ms"] / len(QUERIES)
+            label = ",".join(f"{k}={v}" for k, v in f.items())
+            print(f"{label:<60} {len(keep) / n:>6.1%} {p_ms:>8.2f} {m_ms:>8.2f} {touched:>9} {total:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Resident cost of the in-memory lexical index: LexicalIndex + BM25Scorer
+built over synthetic rows (the rows themselves are allocated before the
+measurement, so only index structures count).
+
+  heap_MB     tracemalloc delta of the build
+  rss_MB      process RSS delta of the build
+  B/posting   heap bytes per (token, doc) posting
+  search_ms   mean BM25 + raw-tf top-10 latency over the bench queries
+  update_ms   LexicalIndex.update() of 1% of the rows
+
+  python scripts/bench_index_memory.py --sizes 10k,50k
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from bench_common import QUERIES, parse_sizes, synth_rows, timeit
+
+from tobyworld.agentic_rag.lexical_index import BM25Scorer, LexicalIndex
+from tobyworld.utils.memory import rss_bytes
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10k,50k")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'docs':>7} {'postings':>10} {'heap_MB':>8} {'rss_MB':>8} {'B/posting':>9} "
+          f"{'search_ms':>9} {'update_ms':>9}")
+    for n in parse_sizes(args.sizes):
+        rows = synth_rows(n)
+        gc.collect()
+        rss0 = rss_bytes()  # untraced first build: tracemalloc's bookkeeping and reused arenas skew RSS
+        ix = LexicalIndex(rows)
+        bm = BM25Scorer(ix)
+        rss = rss_bytes() - rss0
+        del ix, bm
+        gc.collect()
+        tracemalloc.start()
+        ix = LexicalIndex(rows)
+        bm = BM25Scorer(ix)
+        heap, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        n_post = sum(len(p) for p in ix.postings.values())
+
+        ms = timeit(lambda: [(bm.search(q, k=10), ix.search(q, k=10)) for q in QUERIES], args.repeat)
+        changed = [dict(r, text=r["text"] + " edited toby") for r in rows[:max(1, n // 100)]]
+        t0 = time.perf_counter()
+        ix.update(changed)
+        upd = (time.perf_counter() - t0) * 1000.0
+        print(f"{n:>7} {n_post:>10} {heap / 1e6:>8.1f} {rss / 1e6:>8.1f} {heap / max(1, n_post):>9.1f} "
+              f"{ms['mean_ms'] / len(QUERIES):>9.2f} {upd:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Query latency of the lexical arcs: legacy full-corpus scan vs. LexicalIndex,
+exhaustive scoring vs. MaxScore top-k (with % of postings touched), for both
+the raw-tf formula and BM25F.
+
+  python scripts/bench_lexical.py --sizes 1k,10k,100k
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Dict, List
+
+from bench_common import QUERIES, parse_sizes, synth_rows, timeit
+
+from tobyworld.agentic_rag.multi_arc_retrieval import LocalRetriever
+from tobyworld.agentic_rag.lexical_index import BM25Scorer, tokenize
+
+
+def legacy_retrieve(rows: List[Dict[str, Any]], query: str, k: int = 40):
+    """The pre-index LocalRetriever.retrieve: re-tokenize every row per query."""
+    q_tokens = tokenize(query)
+    q_phrase = " ".join(q_tokens)
+    scored = []
+    for row in rows:
+        text = row.get("text") or ""
+        tokens = tokenize(text)
+        if not tokens:
+            continue
+        tf = sum(tokens.count(t) for t in set(q_tokens))
+        bonus = 2.0 if (q_phrase and q_phrase in text.lower()) else 0.0
+        title = str(((row.get("meta") or {}).get("title") or "")).lower()
+        title_bonus = 1.0 if title and any(t in title for t in q_tokens) else 0.0
+        s = float(tf) + bonus + title_bonus
+        if s > 0.0:
+            scored.append((s, row.get("id") or ""))
+    scored.sort(key=lambda x: (-x[0], x[1]))
+    return scored[:k]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1k,10k,100k")
+    ap.add_argument("--k", type=int, default=40)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--legacy-max", type=int, default=100_000,
+                    help="skip the legacy scan above this corpus size")
+    args = ap.parse_args()
+
+    print(f"{'docs':>8} {'build_s':>8} {'legacy_ms':>10} "
+          f"{'tf_exh_ms':>10} {'tf_ms':>7} {'tf_touch':>9} "
+          f"{'bm25_exh_ms':>12} {'bm25_ms':>8} {'bm25_touch':>11}")
+    for n in parse_sizes(args.sizes):
+        rows = synth_rows(n)
+        t0 = time.perf_counter()
+        lr = LocalRetriever(rows)
+        bm = BM25Scorer(lr.index)
+        build_s = time.perf_counter() - t0
+        ix = lr.index
+        qs = [tokenize(q) for q in QUERIES]
+
+        def per_query(fn, repeat=args.repeat):
+            return timeit(lambda: [fn(q) for q in QUERIES], repeat)["mean_ms"] / len(QUERIES)
+
+        def touched(search):
+            tot = hit = 0
+            for q in QUERIES:
+                st = {}
+                search(q, k=args.k, stats=st)
+                tot += st.get("postings_total", 0)
+                hit += st.get("postings_touched", 0)
+            return f"{100.0 * hit / max(1, tot):.0f}%"
+
+        bm.search(" ".join(QUERIES), k=args.k)  # warm the per-term impact orders
+        tf_exh = timeit(lambda: [ix.top_k(ix.score(q), args.k) for q in qs], args.repeat)["mean_ms"] / len(qs)
+        bm_exh = timeit(lambda: [ix.top_k(bm.score(q), args.k) for q in qs], args.repeat)["mean_ms"] / len(qs)
+        tf = per_query(lambda q: lr.retrieve(q, k=args.k))
+        bmq = per_query(lambda q: bm.search(q, k=args.k))
+        leg = "—"
+        if n <= args.legacy_max:
+            leg = f"{per_query(lambda q: legacy_retrieve(rows, q, k=args.k), max(1, args.repeat // 2)):.2f}"
+        print(f"{n:>8} {build_s:>8.2f} {leg:>10} "
+              f"{tf_exh:>10.2f} {tf:>7.2f} {touched(ix.search):>9} "
+              f"{bm_exh:>12.2f} {bmq:>8.2f} {touched(bm.search):>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+load_scroll_index() throughput on a synthetic corpus, serial vs. the
+process-pool loader: files/s and MB/s per worker count (0 = all CPUs),
+and a check that every mode returns exactly the serial rows.
+
+  python scripts/bench_loader.py --sizes 2k,10k --workers 1,2,4,0
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import parse_sizes, synth_rows, write_scrolls
+
+from tobyworld.utils.scroll_loader import load_scroll_index, resolve_workers
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="2k,10k")
+    ap.add_argument("--workers", default="1,2,4,0")
+    args = ap.parse_args()
+
+    print(f"cpus={os.cpu_count()}")
+    print(f"{'scrolls':>8} {'workers':>8} {'ms':>9} {'files_s':>9} {'MB_s':>7} {'same':>5}")
+    for n in parse_sizes(args.sizes):
+        with tempfile.TemporaryDirectory() as td:
+            paths = write_scrolls(synth_rows(n), Path(td))
+            mb = sum(p.stat().st_size for p in paths) / 1e6
+            ref = None
+            for w in (int(x) for x in args.workers.split(",")):
+                t0 = time.perf_counter()
+                rows = load_scroll_index(td, workers=w)
+                dt = time.perf_counter() - t0
+                ref = rows if ref is None else ref
+                print(f"{n:>8} {resolve_workers(w):>8} {dt * 1000:>9.1f} {n / dt:>9.0f} {mb / dt:>7.1f} "
+                      f"{'yes' if rows == ref else 'NO':>5}")
+
+
+if __name__ == "__main__":
+    main()
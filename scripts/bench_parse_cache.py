@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+ScrollIndex.rebuild() of a static corpus with the SQLite parse cache:
+  nocache   parse every scroll (no cache)
+  cold      empty cache: parse + store
+  warm      unchanged files: (mtime, size) hits, read + slice only
+  touched   every mtime bumped, bytes equal: content-hash hits
+  io_floor  scan + read every file, nothing else (lower bound)
+
+  python scripts/bench_parse_cache.py --sizes 2k,10k
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import parse_sizes, synth_rows, write_scrolls
+
+from tobyworld.utils.parse_cache import ParseCache
+from tobyworld.utils.scroll_loader import ScrollIndex, _scan_stamps
+
+
+def _ms(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="2k,10k")
+    args = ap.parse_args()
+
+    print(f"{'scrolls':>8} {'mode':>9} {'ms':>9} {'hit_ratio':>10} {'same':>5}")
+    for n in parse_sizes(args.sizes):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "scrolls"
+            paths = write_scrolls(synth_rows(n), root)
+            ref = ScrollIndex(root)
+            si = ScrollIndex(root, parse_cache=ParseCache(Path(td) / "parse_cache.sqlite"))  # cold fill
+
+            def touch_all():
+                for p in paths:
+                    st = p.stat()
+                    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+            runs = [
+                ("io_floor", lambda: [Path(p).read_bytes() for p in _scan_stamps(root)], None),
+                ("nocache", ref.rebuild, ref),
+                ("cold", lambda: (si.parse_cache.prune([]), si.rebuild()), si),
+                ("warm", si.rebuild, si),
+            ]
+            for mode, fn, owner in runs:
+                dt = _ms(fn)
+                ratio = si.parse_cache.last.get("hit_ratio") if owner is si else None
+                same = "" if owner is None else ("yes" if owner.rows == ref.rows else "NO")
+                print(f"{n:>8} {mode:>9} {dt:>9.1f} {ratio if ratio is not None else '—':>10} {same:>5}")
+            touch_all()
+            ref.rebuild()
+            dt = _ms(si.rebuild)
+            print(f"{n:>8} {'touched':>9} {dt:>9.1f} {si.parse_cache.last['hit_ratio']:>10} "
+                  f"{'yes' if si.rows == ref.rows else 'NO':>5}")
+
+
+if __name__ == "__main__":
+    main()
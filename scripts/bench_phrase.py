@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Phrase bonus: per-document `q_phrase in text.lower()` vs. positional postings.
+
+Reports, per query, the phrase-stage latency, its tracemalloc peak, the
+bytes of lowercase text copies the old check makes (freed one by one, so
+they never show up as peak) and the latency of the whole scoring pass.
+
+  python scripts/bench_phrase.py --sizes 1k,10k
+"""
+from __future__ import annotations
+
+import argparse
+import tracemalloc
+from typing import Callable, Dict, List
+
+from bench_common import QUERIES, parse_sizes, synth_rows, timeit
+
+from tobyworld.agentic_rag.lexical_index import LexicalIndex, tokenize
+
+
+def substring_score(ix: LexicalIndex, q_tokens: List[str]) -> Dict[int, float]:
+    """Full tf + phrase + title pass as it ran before positional postings."""
+    acc: Dict[int, float] = {}
+    nf = len(ix.FIELDS)
+    for t in set(q_tokens):
+        p = ix.postings.get(t)
+        if p is None:
+            continue
+        for doc, tf in zip(p.docs, p.tfs[::nf]):
+            if tf:
+                acc[doc] = acc.get(doc, 0.0) + tf
+    for doc in substring_phrase(ix, q_tokens, list(acc)):
+        acc[doc] += ix.PHRASE_BONUS
+    for doc in acc:
+        title = ix._titles[doc]
+        if title and any(t in title for t in q_tokens):
+            acc[doc] += ix.TITLE_BONUS
+    return acc
+
+
+def substring_phrase(ix: LexicalIndex, q_tokens: List[str], cands: List[int]) -> List[int]:
+    """The old phrase check: lowercase every candidate's full text per query."""
+    q_phrase = " ".join(q_tokens)
+    return [d for d in cands if q_phrase in (ix.rows[d].get("text") or "").lower()]
+
+
+def positional_phrase(ix: LexicalIndex, q_tokens: List[str], cands: List[int]) -> List[int]:
+    return list(ix.phrase_docs(q_tokens))
+
+
+def peak_alloc(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        return peak - base
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1k,10k")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'docs':>7} {'mode':>10} {'phrase_ms':>9} {'peak_KiB':>9} {'lower()_KiB':>12} {'score_ms':>9}")
+    for n in parse_sizes(args.sizes):
+        rows = synth_rows(n)
+        ix = LexicalIndex(rows)
+        qs = [tokenize(q) for q in QUERIES]
+        cands = {tuple(q): list(ix.score(q)) for q in qs}
+        copied = sum(len(ix.rows[d]["text"]) for q in qs for d in cands[tuple(q)]) / len(qs)
+        for name, fn in (("substring", substring_phrase), ("positional", positional_phrase)):
+            ms = timeit(lambda: [fn(ix, q, cands[tuple(q)]) for q in qs], args.repeat)["mean_ms"] / len(qs)
+            peak = sum(peak_alloc(lambda: fn(ix, q, cands[tuple(q)])) for q in qs) / len(qs)
+            lowered = copied / 1024 if name == "substring" else 0.0
+            full = substring_score if name == "substring" else LexicalIndex.score
+            total = timeit(lambda: [full(ix, q) for q in qs], args.repeat)["mean_ms"] / len(qs)
+            print(f"{n:>7} {name:>10} {ms:>9.2f} {peak / 1024:>9.1f} {lowered:>12.0f} {total:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compact embedding storage: float32 vs. float16 / int8 (+ exact float32 rescoring)
+on the NumPy brute-force path of retrieval.retriever.Retriever.
+
+Reports the size of the matrix a query scans, per-query latency and
+recall@k against the float32 top-k, with the default rescoring budget
+and with none (_x1: the compact scan alone picks the k). Synthetic clustered unit vectors
+(topic centroids + noise), queries drawn near the data.
+
+  python scripts/bench_quant.py --sizes 10k,100k --dim 384 --k 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from bench_common import parse_sizes, timeit
+
+from tobyworld.retrieval.quant import STORAGES, save_compact
+from tobyworld.retrieval.retriever import Retriever
+
+
+def clustered(n: int, dim: int, rng: np.random.Generator, topics: int = 64) -> np.ndarray:
+    centers = rng.standard_normal((topics, dim), dtype=np.float32)
+    x = centers[rng.integers(0, topics, n)] + 0.9 * rng.standard_normal((n, dim), dtype=np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def write_index(out: Path, embs: np.ndarray, storage: str, with_faiss: bool) -> None:
+    np.save(out / "embeddings.npy", embs)
+    if with_faiss:  # same index types as scripts/index_scrolls.py
+        import faiss
+        if storage == "float32":
+            index = faiss.IndexFlatIP(embs.shape[1])
+        else:
+            qtype = faiss.ScalarQuantizer.QT_fp16 if storage == "float16" else faiss.ScalarQuantizer.QT_8bit
+            index = faiss.IndexScalarQuantizer(embs.shape[1], qtype, faiss.METRIC_INNER_PRODUCT)
+            index.train(embs)
+        index.add(embs)
+        faiss.write_index(index, str(out / "vectors.faiss"))
+    items = [{"path": f"lore-scrolls/TOBY_QL{i:06d}.md", "chunk": 0} for i in range(len(embs))]
+    meta = {"items": items, "normalize": True, **save_compact(out, embs, storage)}
+    (out / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10k,100k")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--rescore-factor", type=int, default=4)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--faiss", action="store_true", help="also time the FAISS flat / scalar-quantizer indexes")
+    args = ap.parse_args()
+
+    paths = ["numpy", "faiss"] if args.faiss else ["numpy"]
+    rk = f"recall@{args.k}"
+    print(f"{'chunks':>8} {'path':>6} {'storage':>8} {'scan_MiB':>9} {'query_ms':>9} {rk:>10} {rk + '_x1':>13}")
+    for n in parse_sizes(args.sizes):
+        embs = clustered(n, args.dim, np.random.default_rng(7))
+        qs = clustered(args.queries, args.dim, np.random.default_rng(11))
+        truth = None
+        for path, storage in [(p, s) for p in paths for s in STORAGES]:
+            with tempfile.TemporaryDirectory() as td:
+                write_index(Path(td), embs, storage, path == "faiss")
+                r = Retriever(Path(td), rescore_factor=args.rescore_factor)
+
+                def recall(factor: int) -> float:
+                    r.rescore_factor = factor
+                    got = [{h.path for h in r.search_embedding(q, top_k=args.k)} for q in qs]
+                    return float(np.mean([len(g & t) / args.k for g, t in zip(got, truth)]))
+
+                if truth is None:
+                    truth = [{h.path for h in r.search_embedding(q, top_k=args.k)} for q in qs]
+                no_rescore = recall(1)  # compact scan picks the k, float32 only reorders them
+                rec = recall(args.rescore_factor)
+                ms = timeit(lambda: [r.search_embedding(q, top_k=args.k) for q in qs], args.repeat)["mean_ms"] / len(qs)
+                scan = (r._codes if r._codes is not None else r._embs).nbytes
+                if r._faiss is not None and storage != "float32":
+                    scan = r._faiss.sa_code_size() * n
+                print(f"{n:>8} {path:>6} {storage:>8} {scan / 2**20:>9.1f} {ms:>9.2f} {rec:>10.3f} {no_rescore:>13.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Index refresh after editing a few scrolls: full rebuild (re-parse + re-index
+the corpus, the old /admin/retriever/rebuild) vs. ScrollIndex.refresh() +
+LexicalIndex.update() (stat everything, re-parse and patch only the delta).
+
+  python scripts/bench_rebuild.py --sizes 1k,10k --edits 1,10
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import parse_sizes, synth_rows, write_scrolls
+
+from tobyworld.agentic_rag.lexical_index import BM25Scorer
+from tobyworld.agentic_rag.multi_arc_retrieval import LocalRetriever
+from tobyworld.utils.scroll_loader import ScrollIndex, load_scroll_index
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1k,10k")
+    ap.add_argument("--edits", default="1,10")
+    args = ap.parse_args()
+
+    print(f"{'scrolls':>8} {'edits':>6} {'full_ms':>9} {'refresh_ms':>11} {'update_ms':>10} {'docs_touched':>13}")
+    for n in parse_sizes(args.sizes):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            paths = write_scrolls(synth_rows(n), root)
+            si = ScrollIndex(root)
+            lr = LocalRetriever(si.rows)
+            bm = BM25Scorer(lr.index)
+
+            t0 = time.perf_counter()
+            BM25Scorer(LocalRetriever(load_scroll_index(root)).index).search("toby", k=8)
+            full_ms = (time.perf_counter() - t0) * 1000.0
+
+            for e in (int(x) for x in args.edits.split(",")):
+                for p in paths[:e]:
+                    p.write_text(p.read_text(encoding="utf-8") + f"\n\nedit {e} toby", encoding="utf-8")
+                t0 = time.perf_counter()
+                delta = si.refresh()
+                t1 = time.perf_counter()
+                touched = lr.index.update(delta.upserted, removed=delta.removed)
+                bm.search("toby", k=8)  # includes the BM25 norm refresh
+                t2 = time.perf_counter()
+                print(f"{n:>8} {e:>6} {full_ms:>9.1f} {(t1 - t0) * 1000:>11.1f} {(t2 - t1) * 1000:>10.1f} "
+                      f"{touched['added'] + touched['removed']:>13}")
+
+
+if __name__ == "__main__":
+    main()
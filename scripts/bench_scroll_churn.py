@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+ScrollIndex row-store churn: N rows, `--churn` fraction upserted per tick
+(new timestamp/title, so rows move in the order) plus a few deletes/adds,
+then `--reads` reads of .rows per tick. Compares
+  list   the previous store: filter the list, append, re-sort, copy on read
+  keyed  ScrollIndex: id dict + bisect-maintained order, one snapshot per generation
+No file I/O: rows are applied in memory, as refresh() does after parsing.
+
+  python scripts/bench_scroll_churn.py --rows 10k --churn 0.01 --ticks 50
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from bench_common import parse_sizes, synth_rows
+
+from tobyworld.utils.scroll_loader import ScrollIndex
+
+
+class _ListStore:
+    """ScrollIndex's row handling before the keyed store."""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self._rows = list(rows)
+        self._sort()
+
+    def _sort(self) -> None:
+        self._rows.sort(key=lambda r: (-(r["meta"].get("timestamp") or 0.0), r["meta"].get("title", "")))
+
+    def _apply(self, upserted: List[Dict[str, Any]], removed: List[str]) -> None:
+        gone = set(removed) | {r["id"] for r in upserted}
+        self._rows = [r for r in self._rows if r["id"] not in gone] + upserted
+        self._sort()
+
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        return self._rows[:]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", default="10k")
+    ap.add_argument("--churn", type=float, default=0.01)
+    ap.add_argument("--ticks", type=int, default=50)
+    ap.add_argument("--reads", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'rows':>7} {'store':>6} {'apply_ms':>9} {'read_ms':>8} {'tick_ms':>8}")
+    for n in parse_sizes(args.rows):
+        base = synth_rows(n, min_words=5, max_words=10)
+        with tempfile.TemporaryDirectory() as td:
+            stores = {"list": _ListStore(base), "keyed": ScrollIndex.from_state(td, base, {})}
+            for name, store in stores.items():
+                rng = random.Random(1)
+                ids = [r["id"] for r in base]
+                apply_ms, read_ms = [], []
+                for tick in range(args.ticks):
+                    picks = rng.sample(ids, max(1, int(n * args.churn)))
+                    upserted = [{"id": rid, "text": "edited",
+                                 "meta": {"title": f"Edited {tick}", "timestamp": 1.8e9 + tick * 60 + i}}
+                                for i, rid in enumerate(picks)]
+                    removed = rng.sample(ids, 2)
+                    ids = [i for i in ids if i not in set(removed)]
+                    t0 = time.perf_counter()
+                    store._apply(upserted, removed)
+                    t1 = time.perf_counter()
+                    for _ in range(args.reads):
+                        store.rows
+                    t2 = time.perf_counter()
+                    apply_ms.append((t1 - t0) * 1000.0)
+                    read_ms.append((t2 - t1) * 1000.0)
+                a, r = statistics.fmean(apply_ms), statistics.fmean(read_ms)
+                print(f"{n:>7} {name:>6} {a:>9.2f} {r:>8.2f} {a + r:>8.2f}")
+            assert list(stores["keyed"].rows) == [r for r in stores["list"].rows], "order differs"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Server cold start: `import tobyworld.api.server` in a fresh interpreter with
+  parse     MIRROR_INDEX_SNAPSHOT=0, every scroll parsed + indexed (before)
+  snapshot  boot from the mmapped index snapshot, nothing stale
+  stale     snapshot + `--stale` fraction of scrolls edited since it was saved
+boot_ms is the scroll/index part (server.BOOT_STATS), import_ms the whole
+import (interpreter + FastAPI + model wiring included).
+
+  python scripts/bench_startup.py --sizes 1k,5k --stale 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_common import parse_sizes, synth_rows, write_scrolls
+
+_SRC = Path(__file__).resolve().parents[1] / "src"
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import tobyworld.api.server as s
+ms = (time.perf_counter() - t0) * 1000.0
+if sys.argv[1] == "save":
+    s._save_snapshot()  # the boot-time save runs in a daemon thread; wait for it here
+print(json.dumps({"import_ms": ms, "boot": s.BOOT_STATS}))
+"""
+
+
+def _boot(scrolls: Path, snapshot: str, save: bool = False) -> dict:
+    env = dict(os.environ, LORE_SCROLLS_DIR=str(scrolls), MIRROR_INDEX_SNAPSHOT=snapshot,
+               PYTHONPATH=os.pathsep.join([str(_SRC), os.environ.get("PYTHONPATH", "")]))
+    out = subprocess.run([sys.executable, "-c", _CHILD, "save" if save else "-"], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1k,5k")
+    ap.add_argument("--stale", type=float, default=0.01, help="fraction of scrolls edited for the stale run")
+    args = ap.parse_args()
+
+    print(f"{'scrolls':>8} {'mode':>9} {'boot_ms':>9} {'import_ms':>10} {'parsed':>7} {'snap_MB':>8}")
+    for n in parse_sizes(args.sizes):
+        with tempfile.TemporaryDirectory() as td:
+            root, snap = Path(td) / "scrolls", Path(td) / "lexical.snap"
+            paths = write_scrolls(synth_rows(n), root)
+            _boot(root, str(snap), save=True)  # writes the snapshot
+            mb = snap.stat().st_size / 1e6
+            runs = [("parse", _boot(root, "0")), ("snapshot", _boot(root, str(snap)))]
+            for p in paths[:max(1, int(n * args.stale))]:
+                p.write_text(p.read_text(encoding="utf-8") + "\n\nedited toby", encoding="utf-8")
+            runs.append(("stale", _boot(root, str(snap))))
+            for mode, r in runs:
+                b = r["boot"]
+                print(f"{n:>8} {mode:>9} {b['ms']:>9.1f} {r['import_ms']:>10.1f} {b['scrolls_parsed']:>7} "
+                      f"{mb if b['from_snapshot'] else 0.0:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
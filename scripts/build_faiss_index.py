@@ -1,7 +1,17 @@
 #!/usr/bin/env python
 from __future__ import annotations
 from pathlib import Path
-import argparse, re, json
+import argparse, os, re, json, sys
+
+# make `tobyworld` importable when run as `python scripts/build_faiss_index.py`
+_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(_SRC) not in sys.path:
+    sys.path.insert(0, str(_SRC))
+
+from tobyworld.retrieval.ann import add_ann_args, ann_kwargs
+from tobyworld.retrieval.embed_cache import add_cache_args, cached_encoder
+from tobyworld.retrieval.incremental import update_index
+from tobyworld.retrieval.snippet_store import snippet_record, write_snippet_store
 
 def tokenize(s: str): return re.findall(r"[A-Za-z0-9_#@]+", s.lower())
 
@@ -10,6 +20,11 @@ def main():
     ap.add_argument("--lore", default="lore-scrolls", help="path to lore-scrolls root")
     ap.add_argument("--out", default="data/faiss_index", help="output dir for index")
     ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    add_ann_args(ap)
+    ap.add_argument("--incremental", action="store_true",
+                    default=os.environ.get("TW_INDEX_INCREMENTAL", "0").lower() in {"1", "true", "yes", "on"},
+                    help="embed only docs added or changed since the last build, drop deleted ones")
+    add_cache_args(ap)
     args = ap.parse_args()
 
     lore = Path(args.lore).resolve()
@@ -24,28 +39,40 @@ def main():
         return
 
     from sentence_transformers import SentenceTransformer
-    import numpy as np, faiss
 
-    model = SentenceTransformer(args.model)
-    texts = []
+    model = None
+
+    def encode_batch(texts):
+        nonlocal model
+        if model is None:
+            model = SentenceTransformer(args.model)
+        return model.encode(texts, batch_size=len(texts), normalize_embeddings=True).astype("float32")  # (N, d)
+
+    encode = cached_encoder(args, encode_batch, args.model, normalize=True)  # retrieval/embed_cache.py
+
+    chunks = []
     for p in paths:
         try:
             t = p.read_text(encoding="utf-8", errors="ignore")
         except Exception:
             t = ""
-        texts.append(t)
-
-    embs = model.encode(texts, normalize_embeddings=True)  # (N, d) float32
-    embs = embs.astype("float32")
-    d = embs.shape[1]
-    index = faiss.IndexFlatIP(d)  # cosine via normalized vectors
-    index.add(embs)
-
-    faiss.write_index(index, str(out / "lore.index"))
-    (out / "paths.txt").write_text("\n".join(str(p) for p in paths), encoding="utf-8")
-    meta = {"count": len(paths), "model": args.model}
-    (out / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
-    print(f"Wrote index for {len(paths)} docs to {out}")
+        chunks.append({"path": str(p), "chunk": 0, "text": t})
+
+    # cosine via normalized vectors; vector id = line of paths.txt (blank = removed doc)
+    stats = update_index(out, chunks, encode, args.model, ann=ann_kwargs(args),
+                         incremental=args.incremental, index_file="lore.index")
+    items = json.loads((out / "meta.json").read_text(encoding="utf-8"))["items"]
+    # title + snippet per vector id, so FaissRetriever serves hits without opening the scrolls
+    texts = {c["path"]: c["text"] for c in chunks}
+    snip_bytes = write_snippet_store(out / "snippets.bin", (
+        snippet_record(it["path"], texts.get(it["path"], "")) if it else ("", "", "") for it in items))
+    # written last and atomically: a serving FaissRetriever reloads on each change and settles on matching files
+    tmp = out / "paths.txt.tmp"
+    tmp.write_text("\n".join(it["path"] if it else "" for it in items), encoding="utf-8")
+    os.replace(tmp, out / "paths.txt")
+    print(f"Wrote index for {stats['chunks']} docs to {out} ({stats['embedded']} embedded, {stats['reused']} reused)")
+    print(f"snippets.bin: {snip_bytes / 1024:.1f} KiB")
+    print(encode.report())
 
 if __name__ == "__main__":
     main()
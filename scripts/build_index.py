@@ -1,11 +1,18 @@
 #!/usr/bin/env python3
-import argparse, json
+import argparse, os, sys
 from pathlib import Path
 
-import faiss
-import numpy as np
 from sentence_transformers import SentenceTransformer
 
+# make `tobyworld` importable when run as `python scripts/build_index.py`
+_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(_SRC) not in sys.path:
+    sys.path.insert(0, str(_SRC))
+
+from tobyworld.retrieval.ann import add_ann_args, ann_kwargs
+from tobyworld.retrieval.embed_cache import add_cache_args, cached_encoder
+from tobyworld.retrieval.incremental import update_index
+
 def read_text(p: Path) -> str:
     try:
         t = p.read_text(encoding="utf-8", errors="ignore")
@@ -18,6 +25,11 @@ def main():
     ap.add_argument("--input", required=True, help="Dir of scrolls")
     ap.add_argument("--out", required=True, help="Index dir (will be created)")
     ap.add_argument("--model", default="all-MiniLM-L6-v2")
+    add_ann_args(ap)
+    ap.add_argument("--incremental", action="store_true",
+                    default=os.environ.get("TW_INDEX_INCREMENTAL", "0").lower() in {"1", "true", "yes", "on"},
+                    help="embed only files added or changed since the last build, drop deleted ones")
+    add_cache_args(ap)
     args = ap.parse_args()
 
     in_dir = Path(args.input)
@@ -29,21 +41,25 @@ def main():
         print(f"[indexer] no .md/.txt files in {in_dir}")
         return
 
-    print(f"[indexer] loading model: {args.model}")
-    model = SentenceTransformer(args.model)
-
-    texts = [read_text(p) for p in files]
-    print(f"[indexer] embedding {len(files)} files …")
-    embs = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
-    dim = embs.shape[1]
+    model = None
 
-    index = faiss.IndexFlatIP(dim)  # cosine via normalized vectors
-    index.add(embs.astype("float32"))
+    def encode_batch(texts):
+        nonlocal model
+        if model is None:
+            print(f"[indexer] loading model: {args.model}")
+            model = SentenceTransformer(args.model)
+        return model.encode(texts, batch_size=len(texts), convert_to_numpy=True,
+                            normalize_embeddings=True).astype("float32")
 
-    faiss.write_index(index, str(out_dir / "vectors.faiss"))
-    (meta_path := out_dir / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2))
-    np.save(out_dir / "embeddings.npy", embs.astype("float32"))
+    encode = cached_encoder(args, encode_batch, args.model, normalize=True)  # retrieval/embed_cache.py
 
+    # one whole-file "chunk" per scroll, in the layout Retriever reads (scripts/index_scrolls.py);
+    # cosine via normalized vectors; flat = exact, ivf / ivfpq / hnsw see retrieval/ann.py
+    chunks = [{"path": str(p), "chunk": 0, "text": read_text(p)} for p in files]
+    stats = update_index(out_dir, chunks, encode, args.model, ann=ann_kwargs(args), incremental=args.incremental)
+    print(f"[indexer] {stats['chunks']} files: {stats['embedded']} embedded, {stats['reused']} reused, "
+          f"{stats['removed']} removed")
+    print(f"[indexer] {encode.report()}")
     print(f"[indexer] wrote {out_dir}/vectors.faiss and meta.json")
 
 if __name__ == "__main__":
@@ -1,15 +1,23 @@
 #!/usr/bin/env python3
-import argparse, json, os, re, sys
+import argparse, importlib.util, os, re, sys
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List
 
 import numpy as np
 
-try:
-    import faiss  # type: ignore
-    _HAS_FAISS = True
-except Exception:
-    _HAS_FAISS = False
+# make `tobyworld` importable when run as `python scripts/index_scrolls.py`
+_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(_SRC) not in sys.path:
+    sys.path.insert(0, str(_SRC))
+
+from tobyworld.retrieval.ann import add_ann_args, ann_kwargs
+from tobyworld.retrieval.embed_cache import CachedEncoder, add_cache_args, cached_encoder
+from tobyworld.retrieval.incremental import update_index
+from tobyworld.retrieval.quant import STORAGES
+from tobyworld.utils.scroll_loader import chunk_markdown
+
+# FAISS itself is only used inside retrieval/incremental.py; here it just picks the warning
+_HAS_FAISS = importlib.util.find_spec("faiss") is not None
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -22,58 +30,55 @@ YAML_FM = re.compile(r"(?s)^---\n.*?\n---\s*")
 def read_markdown_chunks(p: Path, max_len=800):
     txt = p.read_text(encoding="utf-8", errors="ignore")
     txt = YAML_FM.sub("", txt).strip()
-    # naive: split on blank lines; join short lines
-    paras = [re.sub(r"\s+", " ", x).strip() for x in re.split(r"\n\s*\n", txt) if x.strip()]
-    # simple re-chunk by length
-    chunks, cur = [], ""
-    for para in paras:
-        if len(cur) + 1 + len(para) <= max_len:
-            cur = f"{cur}\n{para}".strip()
-        else:
-            if cur: chunks.append(cur)
-            cur = para
-    if cur: chunks.append(cur)
-    return chunks
-
-def build_index(scrolls_dir: Path, out_dir: Path, model_name: str, normalize=True):
+    # same splitter as the lexical passage index (MIRROR_PASSAGE_INDEX)
+    return chunk_markdown(txt, max_len)
+
+def build_index(scrolls_dir: Path, out_dir: Path, model_name: str, normalize=True, storage="float32",
+                ann=None, incremental=False, cache_args=None):
     out_dir.mkdir(parents=True, exist_ok=True)
     files = sorted([p for p in scrolls_dir.rglob("*.md") if p.is_file()])
     if not files:
         print(f"WARNING: no markdown in {scrolls_dir}", file=sys.stderr)
 
-    model = SentenceTransformer(model_name)
-
-    texts, metas = [], []
+    chunks = []
     for f in files:
         for i, chunk in enumerate(read_markdown_chunks(f)):
             if len(chunk) < 20:  # skip trivial
                 continue
-            texts.append(chunk)
-            metas.append({"path": str(f), "chunk": i})
+            chunks.append({"path": str(f), "chunk": i, "text": chunk})
 
-    if not texts:
+    if not chunks:
         print("No chunks produced.", file=sys.stderr)
         return
 
-    print(f"Encoding {len(texts)} chunks with {model_name}...")
-    embs = model.encode(texts, convert_to_numpy=True, show_progress_bar=True)
-    if normalize:
-        # cosine via inner product on L2-normalized vectors
-        norms = np.linalg.norm(embs, axis=1, keepdims=True) + 1e-12
-        embs = embs / norms
-
-    np.save(out_dir / "embeddings.npy", embs)
-    with open(out_dir / "meta.json", "w", encoding="utf-8") as f:
-        json.dump({"items": metas, "model": model_name, "normalize": normalize}, f, indent=2)
-
-    if _HAS_FAISS:
-        index = faiss.IndexFlatIP(embs.shape[1])
-        index.add(embs.astype(np.float32))
-        faiss.write_index(index, str(out_dir / "vectors.faiss"))
-        print(f"Wrote FAISS index with {index.ntotal} vectors.")
-    else:
+    model = None
+
+    def encode_batch(texts: List[str]) -> np.ndarray:
+        nonlocal model
+        if model is None:  # a run served entirely from the caches never loads it
+            model = SentenceTransformer(model_name)
+            print(f"Encoding with {model_name}...")
+        return model.encode(texts, batch_size=len(texts), convert_to_numpy=True,
+                            normalize_embeddings=normalize, show_progress_bar=False)
+
+    # embedding cache (retrieval/embed_cache.py): each distinct chunk text is encoded once
+    # per model, across runs; misses are batched by length
+    encode = cached_encoder(cache_args, encode_batch, model_name, normalize) if cache_args else CachedEncoder(encode_batch)
+
+    ann = dict(ann or {})
+    if not _HAS_FAISS:
+        if ann.get("index_type", "flat") != "flat":
+            print(f"WARNING: --index-type {ann['index_type']} needs FAISS; NumPy search is exact.", file=sys.stderr)
         print("FAISS not available; falling back to NumPy-only search.")
 
+    # flat = exact; ivf / ivfpq / hnsw = approximate, see retrieval/ann.py.
+    # float16/int8: compact search matrix + float32 kept for exact rescoring.
+    # incremental: only new / changed chunks are embedded (retrieval/incremental.py)
+    stats = update_index(out_dir, chunks, encode, model_name, normalize=normalize, storage=storage,
+                         ann=ann, incremental=incremental)
+    print(f"{stats['chunks']} chunks: {stats['embedded']} embedded, {stats['reused']} reused, "
+          f"{stats['removed']} removed; FAISS index {stats['index']} ({stats['seconds']}s)")
+    print(encode.report())
     print(f"OK: {out_dir}")
 
 def main():
@@ -81,8 +86,16 @@ def main():
     ap.add_argument("--scrolls", default=os.environ.get("TW_SCROLLS_DIR", "lore-scrolls"))
     ap.add_argument("--out", default="data/index")
     ap.add_argument("--model", default=os.environ.get("TW_EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+    ap.add_argument("--storage", choices=STORAGES, default=os.environ.get("TW_INDEX_STORAGE", "float32"),
+                    help="search matrix precision (float16/int8 rescore top candidates in float32)")
+    add_ann_args(ap)
+    ap.add_argument("--incremental", action="store_true",
+                    default=os.environ.get("TW_INDEX_INCREMENTAL", "0").lower() in {"1", "true", "yes", "on"},
+                    help="embed only chunks added or changed since the last build, drop deleted ones")
+    add_cache_args(ap)
     args = ap.parse_args()
-    build_index(Path(args.scrolls), Path(args.out), args.model)
+    build_index(Path(args.scrolls), Path(args.out), args.model, storage=args.storage, ann=ann_kwargs(args),
+                incremental=args.incremental, cache_args=args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,214 @@
+# src/tobyworld/agentic_rag/index_snapshot.py
+"""
+On-disk snapshot of the parsed scrolls + LexicalIndex, so a server boot
+memory-maps one file instead of re-reading and re-tokenizing the corpus.
+
+File layout (native byte order, sections 8-byte aligned):
+  b"TWLXSNAP" | u64 header length | header JSON | sections...
+  header:  format, byteorder, itemsizes, fields, tokenizer, key, root,
+           sections {name: [offset from data start, nbytes]}
+  sections:
+    manifest     JSON {path: [mtime, size]} of the parsed scrolls
+    scroll_rows  JSON array, ScrollIndex rows
+    index_rows   JSON array, LexicalIndex rows (doc order); just their ids when
+                 they are the ScrollIndex rows (header "shared_rows")
+    tokens       "\n"-joined token string table
+    tok_off      u64[T+1]  token i owns postings tok_off[i]:tok_off[i+1]
+    docs         u32[P]    doc number per posting
+    tfs          u32[P*F]  per-field term frequencies
+    pos_lens     u32[P]    byte length of each posting's positions
+    tok_pos      u64[T+1]  token i owns pos[tok_pos[i]:tok_pos[i+1]]
+    pos          bytes     body-text positions, lexical_index.encode_positions()
+    field_lens   u32[F*N]  field-major token counts
+
+The postings sections are the in-memory Postings arrays back to back, so
+a token is decoded lazily (first touch) with a few buffer copies; load
+time is the JSON rows plus one small object per token. The caller
+validates the manifest by running ScrollIndex.refresh() and applying the
+delta.
+"""
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import mmap
+import os
+import struct
+import sys
+
+from .lexical_index import LexicalIndex, Postings, _TOKEN_RX
+from tobyworld.utils.scroll_loader import ScrollIndex
+
+MAGIC = b"TWLXSNAP"
+SNAPSHOT_FORMAT = 2
+_U32, _U64 = "I", "Q"
+_ARRAYS = {"tok_off": _U64, "docs": _U32, "tfs": _U32, "pos_lens": _U32, "tok_pos": _U64, "field_lens": _U32}
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _header_base(root: Path, key: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Everything that must match for a snapshot to be reusable."""
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "byteorder": sys.byteorder,
+        "itemsize": {tc: array(tc).itemsize for tc in (_U32, _U64)},
+        "fields": list(LexicalIndex.FIELDS),
+        "tokenizer": _TOKEN_RX.pattern,
+        "root": str(Path(root).resolve()),
+        "key": key or {},
+    }
+
+
+# ---- save ---------------------------------------------------------------
+def save_snapshot(path: Path | str, scrolls: ScrollIndex, index: LexicalIndex,
+                  key: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Write scrolls + index to path (atomically: temp file + os.replace).
+    The caller keeps both from changing meanwhile (the server holds its
+    rebuild lock). Returns {"bytes", "docs", "tokens"}.
+    """
+    rows, postings, field_lens = index.to_parts()
+    shared = all(scrolls.get(r.get("id")) is r for r in rows)  # one row dict per scroll, held once
+    nf = len(LexicalIndex.FIELDS)
+    tokens = list(postings)
+    arrs = {name: array(tc) for name, tc in _ARRAYS.items()}
+    tok_off, tok_pos = arrs["tok_off"], arrs["tok_pos"]
+    pos = bytearray()
+    tok_off.append(0)
+    tok_pos.append(0)
+    for t in tokens:
+        p = postings[t]
+        for name in ("docs", "tfs", "pos_lens"):
+            arrs[name].extend(getattr(p, name))
+        pos += p.pos
+        tok_off.append(len(arrs["docs"]))
+        tok_pos.append(len(pos))
+    for f in LexicalIndex.FIELDS:
+        arrs["field_lens"].extend(field_lens[f])
+    assert len(arrs["tfs"]) == nf * len(arrs["docs"]) == nf * len(arrs["pos_lens"])
+
+    blobs: Dict[str, bytes] = {
+        "manifest": json.dumps(scrolls.stamps).encode("utf-8"),
+        "scroll_rows": json.dumps(scrolls.rows, ensure_ascii=False).encode("utf-8"),
+        "index_rows": json.dumps([r["id"] for r in rows] if shared else rows, ensure_ascii=False).encode("utf-8"),
+        "tokens": "\n".join(tokens).encode("utf-8"),
+        "pos": bytes(pos),
+        **{name: a.tobytes() for name, a in arrs.items()},
+    }
+    sections: Dict[str, List[int]] = {}
+    off = 0
+    for name, b in blobs.items():
+        sections[name] = [off, len(b)]
+        off = _pad8(off + len(b))
+    header = json.dumps({**_header_base(scrolls.root, key), "n_docs": len(rows), "n_tokens": len(tokens),
+                         "shared_rows": shared, "sections": sections}).encode("utf-8")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        f.write(b"\0" * (_pad8(f.tell()) - f.tell()))
+        start = f.tell()
+        for name, b in blobs.items():
+            f.write(b"\0" * (start + sections[name][0] - f.tell()))
+            f.write(b)
+    os.replace(tmp, path)
+    return {"bytes": path.stat().st_size, "docs": len(rows), "tokens": len(tokens)}
+
+
+# ---- load ---------------------------------------------------------------
+class _Sections:
+    """Typed memoryviews over the mapped postings sections."""
+    __slots__ = ("tok_off", "docs", "tfs", "pos_lens", "tok_pos", "pos", "nf")
+
+    def __init__(self, views: Dict[str, memoryview], nf: int):
+        for name in ("tok_off", "docs", "tfs", "pos_lens", "tok_pos", "pos"):
+            setattr(self, name, views[name])
+        self.nf = nf
+
+    def decode(self, i: int) -> Tuple[array, array, array, bytes]:
+        a, b = self.tok_off[i], self.tok_off[i + 1]
+        nf = self.nf
+        docs, tfs, lens = array(_U32), array(_U32), array(_U32)
+        docs.frombytes(self.docs[a:b].cast("B"))
+        tfs.frombytes(self.tfs[a * nf:b * nf].cast("B"))
+        lens.frombytes(self.pos_lens[a:b].cast("B"))
+        return docs, tfs, lens, bytes(self.pos[self.tok_pos[i]:self.tok_pos[i + 1]])
+
+
+class _MappedPostings(Postings):
+    """Postings of token i in a snapshot; its arrays are copied out on first access."""
+    __slots__ = ("_src", "_i")
+
+    def __init__(self, src: _Sections, i: int):
+        self._src = src
+        self._i = i
+        self._pos_off = None
+
+    def __len__(self) -> int:  # df without decoding (BM25 idf touches every token)
+        off = self._src.tok_off
+        return off[self._i + 1] - off[self._i]
+
+    @property
+    def decoded(self) -> bool:
+        try:
+            Postings.docs.__get__(self)  # the slot itself: raises instead of decoding
+        except AttributeError:
+            return False
+        return True
+
+    def __getattr__(self, name: str):
+        # only reached while the slot is still unset
+        if name not in ("docs", "tfs", "pos_lens", "pos"):
+            raise AttributeError(name)
+        self.docs, self.tfs, self.pos_lens, self.pos = self._src.decode(self._i)
+        return getattr(self, name)
+
+
+def load_snapshot(path: Path | str, root: Path | str,
+                  key: Optional[Dict[str, Any]] = None) -> Optional[Tuple[ScrollIndex, LexicalIndex]]:
+    """
+    (ScrollIndex, LexicalIndex) restored from path, or None if it is
+    missing, unreadable, or was written for another root/key/format. The
+    rows are as of the save: call ScrollIndex.refresh() and apply the delta.
+    """
+    path = Path(path)
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm[:len(MAGIC)] != MAGIC:
+            return None
+        (hlen,) = struct.unpack_from("<Q", mm, len(MAGIC))
+        hstart = len(MAGIC) + 8
+        header = json.loads(mm[hstart:hstart + hlen])
+        if any(header.get(k) != v for k, v in _header_base(root, key).items()):
+            return None
+        start = _pad8(hstart + hlen)
+        buf = memoryview(mm)
+        raw = {name: buf[start + off:start + off + n] for name, (off, n) in header["sections"].items()}
+        views = {name: raw[name].cast(tc) for name, tc in _ARRAYS.items()}
+        views["pos"] = raw["pos"]
+
+        scrolls = ScrollIndex.from_state(root, json.loads(bytes(raw["scroll_rows"])),
+                                         json.loads(bytes(raw["manifest"])))
+        tokens = bytes(raw["tokens"]).decode("utf-8").split("\n") if header["n_tokens"] else []
+        src = _Sections(views, len(LexicalIndex.FIELDS))
+        postings = {t: _MappedPostings(src, i) for i, t in enumerate(tokens)}
+        n = header["n_docs"]
+        lens = views["field_lens"]
+        field_lens = {f: lens[fi * n:(fi + 1) * n] for fi, f in enumerate(LexicalIndex.FIELDS)}
+        rows = json.loads(bytes(raw["index_rows"]))
+        if header.get("shared_rows"):
+            rows = [scrolls.get(rid) for rid in rows]
+            if any(r is None for r in rows):
+                return None
+        index = LexicalIndex.from_parts(rows, postings, field_lens)
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        return None
+    return scrolls, index
@@ -0,0 +1,911 @@
+# src/tobyworld/agentic_rag/lexical_index.py
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from heapq import nlargest, nsmallest
+from itertools import accumulate
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple, Iterable
+import math
+import re
+import sys
+import threading
+import time
+import weakref
+
+from tobyworld.utils.scroll_loader import scroll_name, series_of
+from .meta_filters import DocMask, MetaBitmaps
+
+
+_TOKEN_RX = re.compile(r"[A-Za-z0-9_#@]+")
+
+
+def tokenize(s: str) -> List[str]:
+    """Lowercased word tokens; shared by the index, LocalRetriever and rerankers."""
+    return _TOKEN_RX.findall((s or "").lower())
+
+
+def _group_key(row: Dict[str, Any]) -> str:
+    """Scroll a row belongs to: meta["scroll_id"] for passages, else its id."""
+    return str((row.get("meta") or {}).get("scroll_id") or row.get("id") or "")
+
+
+def _has(sorted_seq: Sequence[int], x: int) -> bool:
+    i = bisect_left(sorted_seq, x)
+    return i < len(sorted_seq) and sorted_seq[i] == x
+
+
+# ---- compact position lists ----------------------------------------------
+# Body positions of one posting: gaps between ascending positions, LEB128
+# varint coded (1 byte per gap < 128).
+def encode_positions(pos: Sequence[int]) -> bytes:
+    out = bytearray()
+    prev = 0
+    for x in pos:
+        gap, prev = x - prev, x
+        while gap >= 0x80:
+            out.append((gap & 0x7F) | 0x80)
+            gap >>= 7
+        out.append(gap)
+    return bytes(out)
+
+
+def decode_positions(buf: bytes) -> List[int]:
+    if buf.isascii():  # every gap fits one byte
+        return list(accumulate(buf))
+    out: List[int] = []
+    cur = acc = shift = 0
+    for b in buf:
+        if b & 0x80:
+            acc |= (b & 0x7F) << shift
+            shift += 7
+        else:
+            cur += acc | (b << shift)
+            out.append(cur)
+            acc = shift = 0
+    return out
+
+
+class Postings:
+    """
+    Postings of one token, ordered by doc; slot i is one (token, doc) pair:
+      docs[i]                 doc number                       (array "I")
+      tfs[i*nf:(i+1)*nf]      per-field term frequencies, flat (array "I")
+                              nf = len(LexicalIndex.FIELDS)
+      pos_lens[i]             byte length of slot i's positions (array "I")
+      pos                     encode_positions() of every slot, back to back
+    Doc numbers stay absolute (not gap coded): MaxScore reads postings by
+    slot in impact order and probes them by bisect. Byte offsets into pos
+    are summed up on the first phrase probe of a published list only.
+    """
+    __slots__ = ("docs", "tfs", "pos_lens", "pos", "_pos_off")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.tfs = array("I")
+        self.pos_lens = array("I")
+        self.pos = b""
+        self._pos_off: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def find(self, doc: int) -> int:
+        """Slot of doc in this list, or -1."""
+        i = bisect_left(self.docs, doc)
+        return i if i < len(self.docs) and self.docs[i] == doc else -1
+
+    def positions_at(self, slot: int) -> List[int]:
+        off = self._pos_off
+        if off is None:
+            off = self._pos_off = array("I", accumulate(self.pos_lens, initial=0))
+        return decode_positions(self.pos[off[slot]:off[slot + 1]])
+
+    @property
+    def decoded(self) -> bool:
+        """False while a lazily loaded list (index_snapshot) has not been read yet."""
+        return True
+
+    def nbytes(self) -> int:
+        """Heap bytes owned by this list."""
+        size = sys.getsizeof
+        return (size(self) + size(self.docs) + size(self.tfs) + size(self.pos_lens) + size(self.pos)
+                + (size(self._pos_off) if self._pos_off is not None else 0))
+
+
+class LexicalIndex:
+    """
+    Index-time inverted index over rows shaped like:
+      {"id": str, "text": str, "meta": {...}}
+
+    Layout:
+      FIELDS = ("text", "title", "filename", "series")
+        text      body text (the only field with positions)
+        title     meta["title"]
+        filename  scroll file name (meta["scroll_id"] for passages, else id)
+        series    its TOBY_* prefix, e.g. "TOBY_QL"
+      postings[token] = Postings(docs, tfs, body positions), array-backed
+      field_lens[field][doc] = token count of that field (array "I")
+      meta      MetaBitmaps: series / tags / lang / month doc bitmaps, so
+                search(mask=doc_mask(filters)) scores only matching docs
+
+    Built once from the rows; a query only visits documents that share at
+    least one token with it, instead of re-tokenizing the whole corpus.
+    update() patches it in place (upserts/deletes, see there): doc numbers
+    are append-only, removed docs become tombstones, and every change is
+    published as a new `postings` dict, so a query that read the dict once
+    sees one consistent version.
+    Phrase matches come from intersecting positions, so no document text
+    is rescanned or lowercased at query time.
+
+    score() keeps the original LocalRetriever formula for every document
+    that shares a query token with any field:
+      - term frequency, Σ TF_WEIGHTS[f] * tf_f (all 1.0: the tf the old
+        "filename series title" + body concatenation had; field_weights
+        overrides some per index, 0 = the field never scores)
+      - +2.0 bonus if the query tokens appear as a consecutive phrase in
+        the body or the title
+      - +1.0 title bonus if any query token hits in the title
+    BM25Scorer ranks over the same postings with its own field weights.
+    """
+
+    FIELDS: Tuple[str, ...] = ("text", "title", "filename", "series")
+    TF_WEIGHTS: Tuple[float, ...] = (1.0, 1.0, 1.0, 1.0)
+    PHRASE_BONUS = 2.0
+    TITLE_BONUS = 1.0
+
+    def __init__(self, rows: Iterable[Dict[str, Any]], field_weights: Optional[Dict[str, float]] = None):
+        self._init_state(rows)
+        if field_weights:  # per-index TF_WEIGHTS override, e.g. {"filename": 0, "series": 0}
+            w = dict(zip(self.FIELDS, self.TF_WEIGHTS))
+            w.update(field_weights)
+            self.TF_WEIGHTS = tuple(float(w.get(f, 0.0)) for f in self.FIELDS)
+        self._build()
+
+    def _init_state(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self.rows: List[Dict[str, Any]] = list(rows or [])
+        # (generation, postings) published together; update() swaps in a new pair
+        self._snap: Tuple[int, Dict[str, Postings]] = (0, {})
+        self.field_lens: Dict[str, array] = {f: array("I") for f in self.FIELDS}
+        self._titles: List[str] = []
+        # token -> (postings it was built from, impact order); query-time cache
+        self._impacts: Dict[str, Tuple[Postings, Tuple[array, array]]] = {}
+        self._len_sum: List[int] = [0] * len(self.FIELDS)  # live docs only
+        self._groups: Dict[str, List[int]] = {}  # scroll id -> live docs (the scroll or its passages)
+        self.meta = MetaBitmaps()
+        self.tombstones = 0
+        self._write_lock = threading.Lock()
+        self._on_publish: List[weakref.WeakMethod] = []  # see on_publish()
+        self._mem: Tuple[int, float, Dict[str, Any]] = (-1, 0.0, {})  # (generation, monotonic ts, memory_stats())
+
+    @property
+    def postings(self) -> Dict[str, Postings]:
+        return self._snap[1]
+
+    @property
+    def generation(self) -> int:
+        return self._snap[0]
+
+    def snapshot(self) -> Tuple[int, Dict[str, Postings]]:
+        """(generation, postings) of the current version; never mutated afterwards."""
+        return self._snap
+
+    def __len__(self) -> int:
+        """Live documents (tombstones excluded)."""
+        return len(self.rows) - self.tombstones
+
+    @staticmethod
+    def _field_tokens(row: Dict[str, Any]) -> Tuple[List[str], ...]:
+        """Tokens per FIELDS entry."""
+        title = str(((row.get("meta") or {}).get("title") or ""))
+        name = scroll_name(row)
+        return tokenize(row.get("text") or ""), tokenize(title), tokenize(name), tokenize(series_of(name))
+
+    def _index_row(self, doc: int, row: Dict[str, Any]) -> Dict[str, Tuple[Tuple[int, ...], bytes]]:
+        """Per-doc bookkeeping for rows[doc]; returns token -> (field tfs, encoded body positions)."""
+        self._track_row(doc, row)
+        nf = len(self.FIELDS)
+        tf: Dict[str, List[int]] = {}
+        pos: Dict[str, List[int]] = {}
+        for fi, toks in enumerate(self._field_tokens(row)):
+            self.field_lens[self.FIELDS[fi]].append(len(toks))
+            self._len_sum[fi] += len(toks)
+            for i, t in enumerate(toks):
+                cnt = tf.get(t)
+                if cnt is None:
+                    cnt = tf[t] = [0] * nf
+                cnt[fi] += 1
+                if fi == 0:
+                    pos.setdefault(t, []).append(i)
+        return {t: (tuple(cnt), encode_positions(pos.get(t, ()))) for t, cnt in tf.items()}
+
+    def _track_row(self, doc: int, row: Dict[str, Any]) -> None:
+        self._titles.append(str(((row.get("meta") or {}).get("title") or "")).lower())
+        self._groups.setdefault(_group_key(row), []).append(doc)
+        self.meta.add(doc, row)
+
+    def _build(self) -> None:
+        postings = self.postings
+        blobs: Dict[str, bytearray] = {}
+        for doc, row in enumerate(self.rows):
+            for t, (tfs, pos) in self._index_row(doc, row).items():
+                p = postings.get(t)
+                if p is None:
+                    p = postings[t] = Postings()
+                    blobs[t] = bytearray()
+                p.docs.append(doc)
+                p.tfs.extend(tfs)
+                p.pos_lens.append(len(pos))
+                blobs[t] += pos
+        for t, blob in blobs.items():
+            postings[t].pos = bytes(blob)
+
+    # -----------------------------------------
+    # Incremental updates
+    # -----------------------------------------
+    def update(self, rows: Iterable[Dict[str, Any]] = (), removed: Iterable[str] = ()) -> Dict[str, int]:
+        """
+        Upsert rows / delete scrolls without rebuilding:
+          - every live doc of a scroll in `removed`, or of a scroll one of
+            `rows` belongs to, is tombstoned (scroll = meta["scroll_id"] or
+            id, so all passages of a changed scroll go together)
+          - `rows` get new doc numbers at the end, so postings stay sorted
+        Only the postings of tokens in removed/added docs are rebuilt, copy-on-
+        write (kept runs of slots are copied as array/list slices, so a token
+        in every doc costs one pass, not one memmove per dropped doc), then
+        published with generation + 1 as a new snapshot();
+        concurrent queries keep the version they started with.
+        Returns {"added": n, "removed": n} (docs).
+        """
+        rows = list(rows or [])
+        with self._write_lock:
+            groups = set(removed or ()) | {_group_key(r) for r in rows}
+            dead = [d for g in groups for d in self._groups.pop(g, ())]
+            drop: Dict[str, set] = {}
+            for d in dead:
+                self.meta.drop(d, self.rows[d])
+                for fi, toks in enumerate(self._field_tokens(self.rows[d])):
+                    self._len_sum[fi] -= len(toks)
+                    for t in toks:
+                        drop.setdefault(t, set()).add(d)
+            self.tombstones += len(dead)
+
+            add: Dict[str, List[Tuple[int, Tuple[int, ...], bytes]]] = {}
+            for row in rows:
+                doc = len(self.rows)
+                self.rows.append(row)
+                for t, (tfs, pos) in self._index_row(doc, row).items():
+                    add.setdefault(t, []).append((doc, tfs, pos))
+
+            nf = len(self.FIELDS)
+            postings = dict(self.postings)
+            for t in set(drop) | set(add):
+                old, new = postings.get(t), Postings()
+                blob: List[bytes] = []
+                if old is not None:
+                    cut = sorted(i for i in map(old.find, drop.get(t, ())) if i >= 0)
+                    start = off = 0
+                    lens = old.pos_lens
+                    for i in cut + [len(old)]:
+                        if i > start:
+                            new.docs.extend(old.docs[start:i])
+                            new.tfs.extend(old.tfs[start * nf:i * nf])
+                            seg = lens[start:i]
+                            new.pos_lens.extend(seg)
+                            n = sum(seg)
+                            blob.append(old.pos[off:off + n])
+                            off += n
+                        if i < len(old):
+                            off += lens[i]
+                        start = i + 1
+                for d, tfs, pos in add.get(t, ()):
+                    new.docs.append(d)
+                    new.tfs.extend(tfs)
+                    new.pos_lens.append(len(pos))
+                    blob.append(pos)
+                new.pos = b"".join(blob)
+                if new.docs:
+                    postings[t] = new
+                else:
+                    postings.pop(t, None)
+                self._impacts.pop(t, None)
+            gen = self._snap[0] + 1
+            for hook in self._publish_hooks():
+                try:
+                    hook(gen, postings, set(drop) | set(add))
+                except Exception:
+                    pass  # that scorer catches up lazily on its next query
+            self._snap = (gen, postings)
+        return {"added": len(rows), "removed": len(dead)}
+
+    def on_publish(self, method: Callable[[int, Dict[str, Postings], set], None]) -> None:
+        """
+        Call the bound `method(generation, postings, changed_tokens)` from
+        update(), on the writer thread, before that generation is published
+        (rows, lens and counts already in place). Held weakly, so a
+        discarded scorer unregisters itself.
+        """
+        self._on_publish.append(weakref.WeakMethod(method))
+
+    def _publish_hooks(self) -> List[Callable[..., None]]:
+        hooks = [ref() for ref in self._on_publish]
+        self._on_publish = [ref for ref, h in zip(self._on_publish, hooks) if h is not None]
+        return [h for h in hooks if h is not None]
+
+    # -----------------------------------------
+    # Persistence (index_snapshot.py)
+    # -----------------------------------------
+    def to_parts(self) -> Tuple[List[Dict[str, Any]], Dict[str, Postings], Dict[str, array]]:
+        """
+        (rows, postings, field_lens) of the live docs. Tombstones are
+        compacted away: live docs are renumbered 0..n-1 in doc order.
+        """
+        with self._write_lock:
+            postings = self.postings
+            if not self.tombstones:
+                return self.rows[:], postings, {f: ls[:] for f, ls in self.field_lens.items()}
+            live = sorted(d for ds in self._groups.values() for d in ds)
+            renum = {d: i for i, d in enumerate(live)}
+            out: Dict[str, Postings] = {}
+            for t, p in postings.items():  # published lists never hold dead docs
+                q = out[t] = Postings()
+                q.docs, q.tfs, q.pos_lens, q.pos = array("I", [renum[d] for d in p.docs]), p.tfs, p.pos_lens, p.pos
+            lens = {f: array("I", [ls[d] for d in live]) for f, ls in self.field_lens.items()}
+            return [self.rows[d] for d in live], out, lens
+
+    @classmethod
+    def from_parts(cls, rows: List[Dict[str, Any]], postings: Dict[str, Postings],
+                   field_lens: Dict[str, Sequence[int]]) -> "LexicalIndex":
+        """Index over rows from prebuilt postings (a saved to_parts()), without tokenizing."""
+        ix = cls.__new__(cls)
+        ix._init_state(rows)
+        ix._snap = (0, dict(postings))
+        for fi, f in enumerate(cls.FIELDS):
+            ix.field_lens[f] = array("I", field_lens[f])
+            ix._len_sum[fi] = sum(ix.field_lens[f])
+        for doc, row in enumerate(ix.rows):
+            ix._track_row(doc, row)
+        return ix
+
+    def live_rows(self) -> List[Dict[str, Any]]:
+        """Rows of live docs, in doc order (consistent with one update())."""
+        with self._write_lock:  # update() mutates _groups on the writer thread
+            return [self.rows[d] for d in sorted(d for ds in self._groups.values() for d in ds)]
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        Heap bytes held by the index structures (the rows belong to the
+        caller and are not counted), cached per generation (at most a minute
+        while snapshot postings are still being decoded):
+          postings_bytes   Postings objects, their arrays and position blobs
+          vocab_bytes      the postings dict and its token strings
+          doc_bytes        field_lens arrays, lowercased titles, scroll groups,
+                           metadata bitmaps
+        Postings still mapped from an index snapshot count only their small
+        Python object until first use (`mapped_postings`).
+        """
+        gen, postings = self.snapshot()
+        mgen, ts, cached = self._mem
+        if mgen == gen and (not cached["mapped_postings"] or time.monotonic() - ts < 60.0):
+            return cached
+        getsize = sys.getsizeof
+        post_bytes = n_post = mapped = 0
+        for p in postings.values():
+            n = len(p)
+            n_post += n
+            if p.decoded:
+                post_bytes += p.nbytes()
+            else:
+                post_bytes += getsize(p)
+                mapped += n
+        vocab_bytes = getsize(postings) + sum(map(getsize, postings))
+        with self._write_lock:  # _groups / meta bitmaps are mutated in place by update()
+            doc_bytes = (sum(map(getsize, self.field_lens.values())) + getsize(self._titles)
+                         + sum(map(getsize, self._titles)) + getsize(self._groups)
+                         + sum(getsize(k) + getsize(v) for k, v in self._groups.items()) + self.meta.nbytes())
+        total = post_bytes + vocab_bytes + doc_bytes
+        stats = {
+            "generation": gen,
+            "docs": len(self),
+            "tokens": len(postings),
+            "postings": n_post,
+            "mapped_postings": mapped,
+            "postings_bytes": post_bytes,
+            "vocab_bytes": vocab_bytes,
+            "doc_bytes": doc_bytes,
+            "total_bytes": total,
+            "bytes_per_posting": round(total / n_post, 2) if n_post else None,
+        }
+        self._mem = (gen, time.monotonic(), stats)
+        return stats
+
+    def phrase_docs(self, q_tokens: List[str]) -> List[int]:
+        """Docs whose body text contains q_tokens as a consecutive phrase."""
+        plists = self._phrase_lists(q_tokens, self.postings)
+        return self._phrase_docs(plists) if plists is not None else []
+
+    def _phrase_docs(self, plists: List[Postings]) -> List[int]:
+        if len(plists) == 1:
+            p = plists[0]
+            return [d for d, n in zip(p.docs, p.pos_lens) if n]
+        # walk the rarest list; a doc must hold every token to hold the phrase
+        lead = min(plists, key=len)
+        return [d for d, n in zip(lead.docs, lead.pos_lens) if n and self._phrase_at(plists, d)]
+
+    @staticmethod
+    def _phrase_lists(q_tokens: List[str], postings: Dict[str, Postings]) -> Optional[List[Postings]]:
+        plists = [postings.get(t) for t in q_tokens]
+        if not plists or any(p is None for p in plists):
+            return None
+        return plists  # type: ignore[return-value]
+
+    @staticmethod
+    def _phrase_at(plists: List[Postings], doc: int) -> bool:
+        pos_lists = []
+        for p in plists:
+            i = p.find(doc)
+            if i < 0 or not p.pos_lens[i]:
+                return False
+            pos_lists.append(p.positions_at(i))
+        first, rest = pos_lists[0], pos_lists[1:]
+        for p0 in first:
+            if all(_has(pl, p0 + j) for j, pl in enumerate(rest, 1)):
+                return True
+        return False
+
+    def doc_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[DocMask]:
+        """Live docs passing the series/tags/lang/since/until filters (meta_filters); None = unfiltered."""
+        return self.meta.mask(filters)
+
+    def avg_len(self, field: str) -> float:
+        n = len(self)
+        return (self._len_sum[self.FIELDS.index(field)] / n) if n else 0.0
+
+    def score(self, q_tokens: List[str]) -> Dict[int, float]:
+        """
+        Exhaustive reference: {doc: score} for every doc sharing a body token
+        with q_tokens. search() returns the same top-k without scoring them all.
+        """
+        if not q_tokens:
+            return {}
+        postings = self.postings
+        acc: Dict[int, float] = {}
+        for t in set(q_tokens):
+            p = postings.get(t)
+            if p is None:
+                continue
+            at = self._tf_at(p)
+            for slot, doc in enumerate(p.docs):
+                c = at(slot, doc)
+                if c:
+                    acc[doc] = acc.get(doc, 0.0) + c
+
+        plists = self._phrase_lists(q_tokens, postings)
+        phrase = set(self._phrase_docs(plists)) if plists is not None else set()
+        for doc in acc:
+            if doc in phrase or self._title_phrase(q_tokens, doc):
+                acc[doc] += self.PHRASE_BONUS
+            acc[doc] += self._title_bonus(q_tokens, doc)
+        return acc
+
+    def _title_phrase(self, q_tokens: List[str], doc: int) -> bool:
+        """q_tokens as a consecutive phrase in the title (titles are short: tokenized per call)."""
+        title = self._titles[doc]
+        if not title:
+            return False
+        toks, n = tokenize(title), len(q_tokens)
+        return any(toks[i:i + n] == q_tokens for i in range(len(toks) - n + 1))
+
+    def _title_bonus(self, q_tokens: List[str], doc: int) -> float:
+        title = self._titles[doc]
+        if title and any(t in title for t in q_tokens):
+            return self.TITLE_BONUS
+        return 0.0
+
+    def _tf_at(self, p: Postings) -> Callable[[int, int], float]:
+        tfs, nf = p.tfs, len(self.FIELDS)
+        weights = tuple(enumerate(self.TF_WEIGHTS))
+
+        def at(slot: int, doc: int) -> float:
+            base = slot * nf
+            return sum(w * tfs[base + fi] for fi, w in weights)
+        return at
+
+    def _tf_terms(self, q_tokens: List[str], postings: Dict[str, Postings]) -> List[Term]:
+        terms: List[Term] = []
+        for t in set(q_tokens):
+            p = postings.get(t)
+            if p is None:
+                continue
+            at = self._tf_at(p)
+            cached = self._impacts.get(t)
+            if cached is None or cached[0] is not p:
+                cached = self._impacts[t] = (p, impact_order(p, at))
+            terms.append(Term(p, at, cached[1]))
+        return terms
+
+    def top_k(self, scores: Dict[int, float], k: int) -> List[Tuple[int, float]]:
+        """Heap top-k (doc, score) pairs, ordered by (-score, row id)."""
+        if not scores:
+            return []
+        rows = self.rows
+        return nsmallest(max(1, k), scores.items(), key=lambda kv: (-kv[1], rows[kv[0]].get("id") or ""))
+
+    def search(self, query: str, k: int = 8, stats: Optional[Dict[str, int]] = None,
+               mask: Optional[DocMask] = None) -> List[Tuple[int, float]]:
+        """Top-k (doc, score), optionally only over the docs in mask (doc_mask())."""
+        q_tokens = tokenize(query)
+        if not q_tokens:
+            return []
+        postings = self.postings  # one snapshot for the whole query
+        plists = self._phrase_lists(q_tokens, postings)
+
+        def bonus(doc: int) -> float:
+            b = self._title_bonus(q_tokens, doc)
+            if (plists is not None and self._phrase_at(plists, doc)) or self._title_phrase(q_tokens, doc):
+                b += self.PHRASE_BONUS
+            return b
+
+        return maxscore_top_k(
+            self, self._tf_terms(q_tokens, postings), k,
+            bonus_ub=self.PHRASE_BONUS + self.TITLE_BONUS, bonus=bonus, stats=stats, mask=mask,
+        )
+
+
+# -----------------------------------------
+# Dynamic pruning (MaxScore) + heap top-k
+# -----------------------------------------
+class Term:
+    """
+    One query term for maxscore_top_k:
+      at(slot, doc)  its contribution for the posting at slot (0.0 = no match)
+      impacts        (slots, contribs): postings with a non-zero contribution,
+                     sorted by contribution, highest first
+      ub             upper bound of its contribution to any doc (= contribs[0])
+    """
+    __slots__ = ("postings", "at", "slots", "contribs", "ub")
+
+    def __init__(self, postings: Postings, at: Callable[[int, int], float],
+                 impacts: Tuple[Sequence[int], Sequence[float]]):
+        self.postings = postings
+        self.at = at
+        self.slots, self.contribs = impacts
+        self.ub = float(self.contribs[0]) if len(self.contribs) else 0.0
+
+
+def impact_order(p: Postings, at: Callable[[int, int], float]) -> Tuple[array, array]:
+    """Slots of p with a non-zero contribution, highest contribution first."""
+    pairs = [(c, slot) for slot, doc in enumerate(p.docs) for c in (at(slot, doc),) if c > 0.0]
+    pairs.sort(key=lambda cs: -cs[0])
+    return array("I", (slot for _, slot in pairs)), array("d", (c for c, _ in pairs))
+
+
+def _kth(acc: Dict[int, float], k: int) -> float:
+    return nlargest(k, acc.values())[-1] if len(acc) >= k else float("-inf")
+
+
+def maxscore_top_k(
+    index: LexicalIndex,
+    terms: List[Term],
+    k: int,
+    bonus_ub: float = 0.0,
+    bonus: Optional[Callable[[int], float]] = None,
+    stats: Optional[Dict[str, int]] = None,
+    mask: Optional[DocMask] = None,
+) -> List[Tuple[int, float]]:
+    """
+    Exact top-k under an additive score (Σ term contributions + doc bonus).
+
+    Term-at-a-time MaxScore with per-term upper bounds. θ is the k-th best
+    partial score, a lower bound on the final k-th score.
+      1. Terms run in descending upper-bound order, each walking its postings
+         in impact order. A term stops as soon as its next contribution plus
+         the bounds of the later terms (+ bonus) cannot lift an unseen doc
+         past θ; docs already accumulated get its contribution by bisect,
+         and a doc first seen late recovers earlier contributions the same way.
+      2. Once the remaining bounds cannot lift any unseen doc past θ, only
+         accumulated docs can still make the top-k: hopeless candidates are
+         dropped and the remaining (low-bound, usually frequent) terms are
+         probed for the survivors instead of walked.
+    A frequent term therefore no longer touches all of its postings. Pruning
+    is strict (bound < θ), so ties resolve by row id exactly like the
+    exhaustive scorer.
+    With a mask only its docs are scored: a mask sparser than the longest
+    postings list goes to _masked_scores (cost ~ matching subset); a dense
+    one just skips the other docs during the walk above.
+    """
+    k = max(1, k)
+    if mask is not None and terms:
+        longest = max(len(t.postings) for t in terms)
+        if len(mask) * max(1, longest.bit_length()) < longest:
+            return _masked_top_k(index, terms, k, mask, bonus_ub, bonus, stats)
+    terms = sorted(terms, key=lambda t: -t.ub)
+    n = len(terms)
+    rem = [0.0] * (n + 1)  # rem[i] = Σ ub of terms[i:]
+    for i in range(n - 1, -1, -1):
+        rem[i] = rem[i + 1] + terms[i].ub
+
+    acc: Dict[int, float] = {}
+    touched = 0
+    theta = float("-inf")
+    i = 0
+    while i < n and rem[i] + bonus_ub >= theta:
+        term, prior = terms[i], terms[:i]
+        docs, slots, contribs = term.postings.docs, term.slots, term.contribs
+        tail = rem[i + 1] + bonus_ub
+        seen = set()
+        check = k
+        walked = 0
+        for slot, c in zip(slots, contribs):
+            if c + tail < theta:
+                break
+            walked += 1
+            d = docs[slot]
+            if mask is not None and d not in mask:
+                continue
+            s = acc.get(d)
+            if s is None:
+                s = 0.0
+                for t in prior:
+                    ps = t.postings.find(d)
+                    if ps >= 0:
+                        s += t.at(ps, d)
+                touched += len(prior)
+            acc[d] = s + c
+            if prior:
+                seen.add(d)
+            if walked >= check:
+                theta = _kth(acc, k)
+                check *= 2
+        touched += walked
+        if prior and walked < len(slots):
+            p = term.postings
+            owed = [d for d in acc if d not in seen]
+            for d in owed:
+                if acc[d] + rem[i] + bonus_ub < theta:
+                    del acc[d]
+                    continue
+                ps = p.find(d)
+                if ps >= 0:
+                    acc[d] += term.at(ps, d)
+            touched += len(owed)
+        theta = _kth(acc, k)
+        i += 1
+    walked_terms = i
+
+    for term in terms[i:]:
+        bound = rem[i] + bonus_ub
+        for d in [d for d, s in acc.items() if s + bound < theta]:
+            del acc[d]
+        p = term.postings
+        if len(acc) * max(1, len(p).bit_length()) < len(p):
+            for d in acc:
+                slot = p.find(d)
+                if slot >= 0:
+                    acc[d] += term.at(slot, d)
+            touched += len(acc)
+        else:
+            for slot, d in enumerate(p.docs):
+                if d in acc:
+                    acc[d] += term.at(slot, d)
+            touched += len(p)
+        theta = _kth(acc, k)
+        i += 1
+
+    if bonus is not None and acc:
+        acc = {d: s + bonus(d) for d, s in acc.items() if s + bonus_ub >= theta}
+
+    if stats is not None:
+        stats["postings_total"] = sum(len(t.postings) for t in terms)
+        stats["postings_touched"] = touched
+        stats["terms_walked"] = walked_terms
+        stats["candidates"] = len(acc)
+        stats["filtered_docs"] = len(mask) if mask is not None else None
+    return index.top_k(acc, k)
+
+
+def _masked_top_k(
+    index: LexicalIndex,
+    terms: List[Term],
+    k: int,
+    mask: DocMask,
+    bonus_ub: float,
+    bonus: Optional[Callable[[int], float]],
+    stats: Optional[Dict[str, int]],
+) -> List[Tuple[int, float]]:
+    """
+    Exhaustive top-k over a sparse mask. Per term, the cheaper side drives:
+    a short postings list is walked and tested against the mask, a long one
+    is probed (bisect) once per masked doc.
+    """
+    acc: Dict[int, float] = {}
+    docs: Optional[List[int]] = None
+    touched = 0
+    for t in terms:
+        p, at = t.postings, t.at
+        if len(p) <= len(mask) * max(1, len(p).bit_length()):
+            for slot, d in enumerate(p.docs):
+                if d in mask:
+                    c = at(slot, d)
+                    if c:
+                        acc[d] = acc.get(d, 0.0) + c
+            touched += len(p)
+        else:
+            if docs is None:
+                docs = mask.docs()
+            for d in docs:
+                slot = p.find(d)
+                if slot >= 0:
+                    c = at(slot, d)
+                    if c:
+                        acc[d] = acc.get(d, 0.0) + c
+            touched += len(docs)
+    if bonus is not None and acc:
+        theta = _kth(acc, k)
+        acc = {d: s + bonus(d) for d, s in acc.items() if s + bonus_ub >= theta}
+    if stats is not None:
+        stats["postings_total"] = sum(len(t.postings) for t in terms)
+        stats["postings_touched"] = touched
+        stats["terms_walked"] = 0
+        stats["candidates"] = len(acc)
+        stats["filtered_docs"] = len(mask)
+    return index.top_k(acc, k)
+
+
+class BM25Scorer:
+    """
+    BM25F over the LexicalIndex fields (body text, title, filename, series).
+
+      tf~(t, d) = Σ_f w_f · tf_f / (1 - b + b · len_f(d) / avglen_f)
+      score     = Σ_t idf(t) · tf~ · (k1 + 1) / (tf~ + k1)
+      idf(t)    = ln(1 + (N - df + 0.5) / (df + 0.5))
+
+    IDF and the per-document length norms are precomputed here, so a query
+    is only postings lookups plus a few multiplies per posting. The state
+    for a new generation is built by LexicalIndex.update() on the writer
+    thread (on_publish hook) before that generation becomes visible, and
+    the impact orders queries had already used are carried over (as is
+    when neither their postings nor N / the average lengths changed,
+    recomputed there otherwise), so queries after an update neither wait
+    for nor redo that work. Each query runs against one _BM25State.
+    FIELD_WEIGHTS are the defaults for w_f; field_weights overrides some.
+    """
+
+    # title 3.0 = the 2.0 it had + the 1.0 it got from being prepended to the body
+    FIELD_WEIGHTS: Dict[str, float] = {"text": 1.0, "title": 3.0, "filename": 1.0, "series": 1.0}
+
+    def __init__(
+        self,
+        index: LexicalIndex,
+        k1: float = 1.2,
+        b: float = 0.75,
+        field_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.index = index
+        self.k1 = float(k1)
+        self.b = float(b)
+        weights = dict(self.FIELD_WEIGHTS)
+        weights.update(field_weights or {})
+        self.weights: Tuple[float, ...] = tuple(float(weights.get(f, 0.0)) for f in index.FIELDS)
+        self._lock = threading.Lock()
+        self._state = self._prepare()
+        index.on_publish(self._refresh)
+
+    @property
+    def idf(self) -> Dict[str, float]:
+        return self._state.idf
+
+    @property
+    def inv_norm(self) -> List[array]:
+        return self._state.inv_norm
+
+    def _prepare(self, generation: Optional[int] = None,
+                 postings: Optional[Dict[str, Postings]] = None) -> "_BM25State":
+        ix = self.index
+        if postings is None:
+            generation, postings = ix.snapshot()  # lens/rows of its docs are in place before publication
+        n = len(ix)
+        idf = {t: math.log(1.0 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in postings.items()}
+        # inv_norm[f][doc] = w_f / (1 - b + b * len / avg), folded so scoring is one multiply
+        inv_norm: List[array] = []
+        avgs = tuple(ix.avg_len(f) or 1.0 for f in ix.FIELDS)
+        for fi, f in enumerate(ix.FIELDS):
+            avg = avgs[fi]
+            w = self.weights[fi]
+            inv_norm.append(array("d", [
+                w / (1.0 - self.b + self.b * ln / avg) for ln in ix.field_lens[f]
+            ]))
+        return _BM25State(int(generation or 0), n, idf, inv_norm, avgs)
+
+    def _refresh(self, generation: int, postings: Dict[str, Postings], changed: set) -> None:
+        """on_publish hook: the next generation's state, built before queries can see it."""
+        with self._lock:
+            old = self._state
+            st = self._prepare(generation, postings)
+            same_norm = st.n == old.n and st.avgs == old.avgs
+            for t, (p_old, order) in list(old.impacts.items()):
+                p = postings.get(t)
+                if p is None:
+                    continue
+                if p is p_old and same_norm and t not in changed:
+                    st.impacts[t] = (p, order)
+                else:  # contributions moved: recompute here rather than on the request path
+                    st.impacts[t] = (p, impact_order(p, self._contrib(st, t, p)))
+            self._state = st
+
+    def _current(self, generation: int) -> "_BM25State":
+        """A state at least as new as the snapshot a query is running on (normally _refresh made it)."""
+        st = self._state
+        if st.generation < generation:
+            with self._lock:
+                if self._state.generation < generation:
+                    self._state = self._prepare()
+                st = self._state
+        return st
+
+    def _contrib(self, st: "_BM25State", token: str, p: Postings) -> Callable[[int, int], float]:
+        idf = st.idf.get(token)
+        if idf is None:  # token newer than the state (query raced an update)
+            idf = math.log(1.0 + (st.n - len(p) + 0.5) / (len(p) + 0.5))
+        k1 = self.k1
+        inv_norm = st.inv_norm
+        nf = len(inv_norm)
+        tfs = p.tfs
+
+        def at(slot: int, doc: int) -> float:
+            x = 0.0
+            for fi in range(nf):
+                tf = tfs[slot * nf + fi]
+                if tf:
+                    x += tf * inv_norm[fi][doc]
+            return idf * x * (k1 + 1.0) / (x + k1) if x > 0.0 else 0.0
+        return at
+
+    def score(self, q_tokens: List[str]) -> Dict[int, float]:
+        """Exhaustive reference scores; search() returns the same top-k with pruning."""
+        gen, postings = self.index.snapshot()
+        st = self._current(gen)
+        acc: Dict[int, float] = {}
+        for t in set(q_tokens):
+            p = postings.get(t)
+            if not p:
+                continue
+            at = self._contrib(st, t, p)
+            for slot, doc in enumerate(p.docs):
+                c = at(slot, doc)
+                if c:
+                    acc[doc] = acc.get(doc, 0.0) + c
+        return acc
+
+    def _terms(self, q_tokens: List[str]) -> List[Term]:
+        gen, postings = self.index.snapshot()
+        st = self._current(gen)
+        terms: List[Term] = []
+        for t in set(q_tokens):
+            p = postings.get(t)
+            if not p:
+                continue
+            at = self._contrib(st, t, p)
+            cached = st.impacts.get(t)
+            if cached is None or cached[0] is not p:
+                cached = st.impacts[t] = (p, impact_order(p, at))
+            terms.append(Term(p, at, cached[1]))
+        return terms
+
+    def search(self, query: str, k: int = 8, stats: Optional[Dict[str, int]] = None,
+               mask: Optional[DocMask] = None) -> List[Tuple[int, float]]:
+        return maxscore_top_k(self.index, self._terms(tokenize(query)), k, stats=stats, mask=mask)
+
+
+class _BM25State:
+    """IDF + length norms for one index generation, with its impact-order cache."""
+    __slots__ = ("generation", "n", "idf", "inv_norm", "avgs", "impacts")
+
+    def __init__(self, generation: int, n: int, idf: Dict[str, float], inv_norm: List[array],
+                 avgs: Tuple[float, ...] = ()):
+        self.generation = generation
+        self.n = n
+        self.idf = idf
+        self.inv_norm = inv_norm
+        self.avgs = avgs
+        self.impacts: Dict[str, Tuple[Postings, Tuple[array, array]]] = {}
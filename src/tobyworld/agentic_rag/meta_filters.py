@@ -0,0 +1,229 @@
+# src/tobyworld/agentic_rag/meta_filters.py — metadata filters as per-attribute doc bitmaps
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import sys
+
+from tobyworld.utils.scroll_loader import scroll_name, series_of
+
+# Keys of a retrieve(filters=...) dict that restrict the candidate docs; the
+# pipeline's other keys (use_docs, per_note_chars, ...) pass through untouched.
+#   series  "TOBY_QL" or a list of them (any of)
+#   tags    a tag or a list of tags (any of; case-insensitive)
+#   lang    a language code or a list (any of; case-insensitive)
+#   since   epoch seconds or ISO date/datetime, inclusive (meta.timestamp)
+#   until   same, inclusive (a bare date covers that whole day)
+FILTER_KEYS = ("series", "tags", "lang", "since", "until")
+
+# set-bit positions of every byte value, for DocMask.docs()
+_BITS: Tuple[Tuple[int, ...], ...] = tuple(tuple(j for j in range(8) if b >> j & 1) for b in range(256))
+
+
+def _as_list(v: Any) -> List[str]:
+    if isinstance(v, str):
+        v = v.split(",")
+    if not isinstance(v, (list, tuple, set)):
+        raise ValueError(f"expected a string or a list of strings, got {type(v).__name__}")
+    return [str(x).strip() for x in v if str(x).strip()]
+
+
+def _as_ts(v: Any, end_of_day: bool = False) -> float:
+    """Epoch seconds; a bare date is its midnight (UTC unless given), or its last microsecond with end_of_day."""
+    if isinstance(v, bool):
+        raise ValueError("expected epoch seconds or an ISO date")
+    if isinstance(v, (int, float)):
+        return float(v)
+    s = str(v).strip()
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        raise ValueError(f"expected epoch seconds or an ISO date, got {v!r}") from None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    if end_of_day and len(s) <= 10:  # "YYYY-MM-DD" / "YYYYMMDD": no time part
+        dt += timedelta(days=1, microseconds=-1)
+    return dt.timestamp()
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The FILTER_KEYS part of filters, canonicalized (lists, lowercased tags /
+    langs, epoch-second bounds). Raises ValueError on a malformed value;
+    empty / None values are dropped.
+    """
+    out: Dict[str, Any] = {}
+    for key in FILTER_KEYS:
+        v = (filters or {}).get(key)
+        if v is None or v == "" or v == []:
+            continue
+        if key in ("since", "until"):
+            out[key] = _as_ts(v, end_of_day=key == "until")
+        else:
+            vals = _as_list(v)
+            out[key] = sorted(set(vals if key == "series" else (x.lower() for x in vals)))
+    return out
+
+
+def _month(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m")
+
+
+def _month_span(key: str) -> Tuple[float, float]:
+    """[start, end) of a "YYYY-MM" bucket in epoch seconds."""
+    y, m = map(int, key.split("-"))
+    start = datetime(y, m, 1, tzinfo=timezone.utc)
+    end = datetime(y + (m == 12), m % 12 + 1, 1, tzinfo=timezone.utc)
+    return start.timestamp(), end.timestamp()
+
+
+def row_attrs(row: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(attribute, value) bitmap keys of a row: series, each tag, lang, timestamp month."""
+    meta = row.get("meta") or {}
+    keys = [("series", series_of(scroll_name(row)))]
+    tags = meta.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    keys.extend(("tags", t) for t in {str(t).strip().lower() for t in tags} if t)
+    lang = str(meta.get("lang") or "").strip().lower()
+    if lang:
+        keys.append(("lang", lang))
+    ts = meta.get("timestamp")
+    if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+        keys.append(("month", _month(ts)))
+    return keys
+
+
+def row_matches(row: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """Per-row check of normalize_filters() output (arcs without an index-side bitmap)."""
+    if not filters:
+        return True
+    attrs = set(row_attrs(row))
+    for key in ("series", "tags", "lang"):
+        if key in filters and not any((key, v) in attrs for v in filters[key]):
+            return False
+    if "since" in filters or "until" in filters:
+        ts = (row.get("meta") or {}).get("timestamp")
+        if not isinstance(ts, (int, float)):
+            return False
+        if ts < filters.get("since", float("-inf")) or ts > filters.get("until", float("inf")):
+            return False
+    return True
+
+
+def _bits_of(docs: Iterable[int]) -> int:
+    """Bitmap of doc numbers (one bytearray pass instead of an int op per doc)."""
+    buf = bytearray()
+    for d in docs:
+        i = d >> 3
+        if i >= len(buf):
+            buf.extend(bytes(i + 1 - len(buf)))
+        buf[i] |= 1 << (d & 7)
+    return int.from_bytes(buf, "little")
+
+
+class DocMask:
+    """
+    A set of doc numbers as one int bitmap (bit d = doc d). Combining masks
+    is C-level big-int &/|; membership reads a bytes copy, so `d in mask`
+    is O(1) rather than an O(n) shift of the int.
+    """
+    __slots__ = ("bits", "_bytes", "_count")
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self._bytes = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+        self._count = bits.bit_count()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, doc: int) -> bool:
+        i = doc >> 3
+        return i < len(self._bytes) and bool(self._bytes[i] >> (doc & 7) & 1)
+
+    def docs(self) -> List[int]:
+        """Doc numbers in ascending order."""
+        bits = _BITS
+        return [i << 3 | j for i, b in enumerate(self._bytes) if b for j in bits[b]]
+
+
+class MetaBitmaps:
+    """
+    Per-attribute doc bitmaps for a LexicalIndex, built at index time:
+      bitmaps[("series", "TOBY_QL")], [("tags", "lore")], [("lang", "en")],
+      [("month", "2024-03")]   bytearray, bit d set for doc d (O(1) add/drop)
+      ts[doc]                   meta.timestamp (NaN = none), for partial months
+    mask(filters) lifts the bitmaps it needs to ints, ORs the values of each
+    attribute and ANDs the attributes; a since/until range ORs the months
+    inside it and checks ts only for the docs of the two boundary months.
+    add()/drop() follow the index's doc numbers (dropped docs are cleared,
+    so masks only hold live docs).
+    """
+
+    def __init__(self) -> None:
+        self.bitmaps: Dict[Tuple[str, str], bytearray] = {}
+        self.ts = array("d")
+
+    def add(self, doc: int, row: Dict[str, Any]) -> None:
+        i, bit = doc >> 3, 1 << (doc & 7)
+        for key in row_attrs(row):
+            bm = self.bitmaps.get(key)
+            if bm is None:
+                bm = self.bitmaps[key] = bytearray()
+            if i >= len(bm):
+                bm.extend(bytes(i + 1 - len(bm)))
+            bm[i] |= bit
+        ts = (row.get("meta") or {}).get("timestamp")
+        self.ts.append(float(ts) if isinstance(ts, (int, float)) and not isinstance(ts, bool) else float("nan"))
+
+    def drop(self, doc: int, row: Dict[str, Any]) -> None:
+        i, keep = doc >> 3, ~(1 << (doc & 7)) & 0xFF
+        for key in row_attrs(row):
+            bm = self.bitmaps.get(key)
+            if bm is not None and i < len(bm):
+                bm[i] &= keep
+
+    def _bits(self, key: Tuple[str, str]) -> int:
+        bm = self.bitmaps.get(key)
+        return int.from_bytes(bm, "little") if bm is not None else 0
+
+    def _time_bits(self, since: float, until: float) -> int:
+        ts, out = self.ts, 0
+        for attr, month in list(self.bitmaps):
+            if attr != "month":
+                continue
+            start, end = _month_span(month)
+            if end <= since or start > until:
+                continue
+            bits = self._bits((attr, month))
+            if since <= start and end <= until:
+                out |= bits
+            else:  # boundary month: check the docs' own timestamps
+                out |= _bits_of(d for d in DocMask(bits).docs() if since <= ts[d] <= until)
+        return out
+
+    def mask(self, filters: Optional[Dict[str, Any]]) -> Optional[DocMask]:
+        """Docs passing normalize_filters(filters); None when nothing is filtered."""
+        f = normalize_filters(filters)
+        if not f:
+            return None
+        parts: List[int] = []
+        for key in ("series", "tags", "lang"):
+            if key in f:
+                bits = 0
+                for v in f[key]:
+                    bits |= self._bits((key, v))
+                parts.append(bits)
+        if "since" in f or "until" in f:
+            parts.append(self._time_bits(f.get("since", float("-inf")), f.get("until", float("inf"))))
+        out = parts[0]
+        for bits in parts[1:]:
+            out &= bits
+        return DocMask(out)
+
+    def nbytes(self) -> int:
+        size = sys.getsizeof
+        return (size(self.bitmaps) + sum(size(k) + size(v) for k, v in self.bitmaps.items())
+                + size(self.ts))
@@ -1,12 +1,24 @@
 # src/tobyworld/agentic_rag/multi_arc_retrieval.py
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, Any, List, Optional, Iterable
-import re
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Iterable, Tuple
+import json
 import math
+import os
+import re
+import threading
+import time
 
 from .base import DocBlob  # (id, text, meta, score)
+from .lexical_index import LexicalIndex, BM25Scorer, tokenize
+from .meta_filters import normalize_filters, row_matches
+
+if TYPE_CHECKING:
+    from ..retrieval.retriever import Retriever as ChunkRetriever
 
 
 # -------------------------
@@ -18,10 +30,15 @@ class ArcConfig:
     weight: float = 1.0
     k: int = 8
     enabled: bool = True
+    timeout_s: Optional[float] = 2.0  # per-arc deadline; None = wait for the arc
 
 
 class Retriever:
-    """Interface for retrieval backends."""
+    """
+    Interface for retrieval backends. filters may restrict the docs by
+    metadata (meta_filters.FILTER_KEYS: series, tags, lang, since, until);
+    other keys are pipeline budgets and are ignored here.
+    """
     def retrieve(self, query: str, k: int = 8, filters: Optional[Dict[str, Any]] = None) -> List[DocBlob]:
         raise NotImplementedError
 
@@ -33,99 +50,345 @@ class LocalRetriever(Retriever):
     """
     In-memory lexical retriever over a list of rows shaped like:
       {"id": str, "text": str, "meta": {...}}
-    Scoring:
-      - term frequency over tokenized text
-      - +2.0 bonus if the full lowercased query phrase appears
+    Scoring (see LexicalIndex):
+      - term frequency over the body, title, filename and series fields
+      - +2.0 bonus if the query appears as a phrase in the body or title
       - small title hit bonus (+1.0) if any token hits in title
+    The inverted index is built once here (or passed in, e.g. restored by
+    index_snapshot.load_snapshot); queries only score documents that share
+    a token with the query, and only those passing the metadata filters
+    (index bitmaps, see LexicalIndex.doc_mask).
     """
 
-    _TOKEN_RX = re.compile(r"[A-Za-z0-9_#@]+")
+    def __init__(self, index_rows: LexicalIndex | List[Dict[str, Any]]):
+        self.index = index_rows if isinstance(index_rows, LexicalIndex) else LexicalIndex(index_rows or [])
 
-    def __init__(self, index_rows: List[Dict[str, Any]]):
-        self.rows = index_rows or []
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        """Live rows (reflects LexicalIndex.update())."""
+        return self.index.live_rows()
 
     @staticmethod
     def _tok(s: str) -> List[str]:
-        return LocalRetriever._TOKEN_RX.findall((s or "").lower())
-
-    def _score_row(self, row: Dict[str, Any], q_tokens: List[str], q_phrase: str) -> float:
-        text = (row.get("text") or "")
-        if not text:
-            return 0.0
-        tokens = self._tok(text)
-        if not tokens:
-            return 0.0
-        tf = sum(tokens.count(t) for t in set(q_tokens))
-        bonus = 2.0 if (q_phrase and q_phrase in text.lower()) else 0.0
-        # title bonus
-        title = str(((row.get("meta") or {}).get("title") or "")).lower()
-        title_bonus = 0.0
-        if title:
-            if any(t in title for t in q_tokens):
-                title_bonus = 1.0
-        return float(tf) + bonus + title_bonus
+        return tokenize(s)
 
     def retrieve(self, query: str, k: int = 8, filters: Optional[Dict[str, Any]] = None) -> List[DocBlob]:
         q = (query or "").strip().lower()
         if not q:
             return []
-        q_tokens = self._tok(q)
-        if not q_tokens:
+        return _to_blobs(self.index, self.index.search(q, k=k, mask=self.index.doc_mask(filters)))
+
+
+class BM25Retriever(Retriever):
+    """
+    BM25F lexical arc (body text + weighted title, filename and series fields).
+
+    Shares the LexicalIndex of a LocalRetriever when one is passed, so both
+    arcs can be registered without indexing the corpus twice:
+      BM25Retriever(LocalRetriever(rows).index)
+    Length normalization keeps long scrolls from dominating the ranking,
+    so the arc needs a much smaller k than the raw-tf arc.
+    """
+
+    def __init__(
+        self,
+        index: LexicalIndex | List[Dict[str, Any]],
+        k1: float = 1.2,
+        b: float = 0.75,
+        field_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.index = index if isinstance(index, LexicalIndex) else LexicalIndex(index)
+        self.scorer = BM25Scorer(self.index, k1=k1, b=b, field_weights=field_weights)
+
+    def retrieve(self, query: str, k: int = 8, filters: Optional[Dict[str, Any]] = None) -> List[DocBlob]:
+        q = (query or "").strip().lower()
+        if not q:
             return []
-        q_phrase = " ".join(q_tokens)
+        return _to_blobs(self.index, self.scorer.search(q, k=k, mask=self.index.doc_mask(filters)))
 
-        scored: List[DocBlob] = []
-        for row in self.rows:
-            s = self._score_row(row, q_tokens, q_phrase)
-            if s <= 0.0:
+
+# -----------------------------------------
+# Dense embedding arc (chunk vectors → scroll rows)
+# -----------------------------------------
+class DenseRetriever(Retriever):
+    """
+    Dense arc over retrieval.retriever.Retriever, i.e. the chunk embeddings
+    written by scripts/index_scrolls.py (embeddings.npy + meta.json):
+      DenseRetriever(core.retriever, core.embedder, rows)
+    The query is encoded with the same SentenceTransformer the MirrorCore
+    already holds; chunk hits collapse to their scroll (best chunk wins) and
+    map back to the scroll rows by path, so doc_ids line up with the lexical
+    arcs in the merge. Given passage rows (chunk_rows, MIRROR_PASSAGE_INDEX)
+    hits map to the matching path#chunk passage instead. Scores are cosine similarities (<= 1.0); scale them
+    against BM25 with ArcConfig.weight. Metadata filters are checked per hit
+    (the vector index has no bitmaps), within the overfetch. Returns [] until
+    an index exists. Given `batcher` (a retrieval.batching.BatchedQuerySearch
+    over the same retriever, e.g. core.dense), concurrent queries are
+    encoded and searched together.
+    """
+
+    def __init__(self, retriever: "ChunkRetriever", embedder: Any, rows: List[Dict[str, Any]], overfetch: int = 4,
+                 batcher: Any = None):
+        self.retriever = retriever
+        self.embedder = embedder
+        self.batcher = batcher
+        self.overfetch = max(1, int(overfetch))
+        self.rows = rows or []
+        self._by_path: Dict[str, int] = {}
+        self._by_name: Dict[str, int] = {}
+        for i, r in enumerate(self.rows):
+            meta = r.get("meta") or {}
+            p = str(meta.get("path") or r.get("id") or "")
+            if not p:
+                continue
+            # passage rows (chunk_rows) are keyed path#chunk, scroll rows by path
+            sfx = f"#{meta['chunk']}" if "chunk" in meta else ""
+            self._by_path[_path_key(p) + sfx] = i
+            self._by_name.setdefault(Path(p).name + sfx, i)
+
+    @property
+    def ready(self) -> bool:
+        return bool(getattr(self.retriever, "ready", False)) and self.embedder is not None
+
+    def _row_for(self, path: str, chunk: int) -> Optional[int]:
+        key, name = _path_key(path), Path(path).name
+        for k, table in ((f"{key}#{chunk}", self._by_path), (f"{name}#{chunk}", self._by_name),
+                         (key, self._by_path), (name, self._by_name)):
+            i = table.get(k)
+            if i is not None:
+                return i
+        return None
+
+    def retrieve(self, query: str, k: int = 8, filters: Optional[Dict[str, Any]] = None) -> List[DocBlob]:
+        q = (query or "").strip()
+        if not q or not self.ready:
+            return []
+        if self.batcher is not None:
+            hits = self.batcher.search(q, top_k=k * self.overfetch)
+        else:
+            qv = self.embedder.encode([q], convert_to_numpy=True, normalize_embeddings=True)[0]
+            hits = self.retriever.search_embedding(qv, top_k=k * self.overfetch)
+        f = normalize_filters(filters)
+        out: List[DocBlob] = []
+        seen = set()
+        for h in hits:
+            i = self._row_for(h.path, h.chunk)
+            if i is None or i in seen:
                 continue
-            scored.append(DocBlob(
+            seen.add(i)
+            row = self.rows[i]
+            if f and not row_matches(row, f):
+                continue
+            out.append(DocBlob(
                 doc_id=row.get("id") or "",
                 text=row.get("text") or "",
-                meta=row.get("meta") or {},
-                score=s,
+                meta=dict(row.get("meta") or {}, dense_chunk=h.chunk),
+                score=float(h.score),
             ))
+            if len(out) >= k:
+                break
+        return out
+
+
+def _path_key(p: str) -> str:
+    # lexical normalization only: no filesystem calls per row
+    return os.path.normcase(os.path.normpath(os.path.abspath(p)))
+
+
+def _to_blobs(index: LexicalIndex, hits: List[tuple]) -> List[DocBlob]:
+    out: List[DocBlob] = []
+    for doc, s in hits:
+        row = index.rows[doc]
+        out.append(DocBlob(
+            doc_id=row.get("id") or "",
+            text=row.get("text") or "",
+            meta=row.get("meta") or {},
+            score=s,
+        ))
+    return out
 
-        scored.sort(key=lambda d: (-d.score, d.doc_id))
-        return scored[: max(1, k)] if scored else []
+
+# -----------------------------------------
+# Query result cache (LRU + TTL)
+# -----------------------------------------
+_WS = re.compile(r"\s+")
+
+
+def _copy_blobs(docs: List[DocBlob]) -> List[DocBlob]:
+    # the pipeline rescales scores, trims text and edits meta in place
+    return [replace(d, meta=dict(d.meta or {})) for d in docs]
+
+
+class QueryCache:
+    """
+    LRU + TTL cache of merged MultiArcRetriever results, keyed on
+    (normalized query, k, filters, generation). bump_generation() makes
+    every existing entry unreachable at once (index rebuilds); stale
+    entries then age out through the LRU. Entries are copied on put and
+    on get, so callers may mutate what they receive.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_s: float = 300.0):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self.generation = 0
+        self.hits = self.misses = self.evictions = self.expired = 0
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (expires_at, docs, stats)
+        self._lock = threading.Lock()
+
+    def key(self, query: str, k: int, filters: Optional[Dict[str, Any]]) -> tuple:
+        q = _WS.sub(" ", (query or "").strip().lower())
+        f = json.dumps(filters or {}, sort_keys=True, default=str)
+        return (q, int(k), f, self.generation)
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            ent = self._data.get(key)
+            if ent is not None and ent[0] < time.monotonic():
+                del self._data[key]
+                self.expired += 1
+                ent = None
+            if ent is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return _copy_blobs(ent[1]), dict(ent[2])
+
+    def put(self, key: tuple, docs: List[DocBlob], stats: Dict[str, Any]) -> None:
+        if not self.max_entries:
+            return
+        ent = (time.monotonic() + self.ttl_s, _copy_blobs(docs), dict(stats))
+        with self._lock:
+            self._data[key] = ent
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def bump_generation(self) -> int:
+        with self._lock:
+            self.generation += 1
+            return self.generation
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._data), "generation": self.generation, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions, "expired": self.expired}
 
 
 # -----------------------------------------
 # Multi-arc retrieval & merge
 # -----------------------------------------
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _shared_pool() -> ThreadPoolExecutor:
+    """One process-wide pool for arc fan-out (rebuilt retrievers reuse it)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="arc")
+        return _POOL
+
+
 class MultiArcRetriever(Retriever):
     """
-    Fan out to multiple arcs (e.g., 'lexical', 'dense'), merge scores by doc_id,
-    and return the top-k. Exposes lightweight stats for debugging:
+    Fan out to multiple arcs (e.g., 'lexical', 'dense') concurrently, merge
+    scores by doc_id, and return the top-k. Exposes lightweight stats for debugging:
       self.last_stats = {
-        "per_arc": {"lexical": 12, "dense": 8, ...},
+        "per_arc": {"lexical": 12, "dense": "timeout", ...},
+        "arc_ms": {"lexical": 3.1, "dense": 2000.4, ...},
         "unique_before_cut": 17,
-        "returned": 8
+        "returned": 8,
+        "cache": "miss"            # only with a QueryCache
       }
+    Each arc runs on a shared thread pool and gets ArcConfig.timeout_s from
+    the moment the fan-out starts; an arc that misses it (or raises) is
+    dropped and recorded as "timeout" / "error" in per_arc. A timed-out
+    call keeps its worker until it returns, so backends should still bound
+    their own I/O. Results merge in arc-config order and sort by
+    (-score, doc_id), so the output does not depend on finish order.
+    With a QueryCache, repeats are served from it; results with a dropped
+    arc are not cached.
     """
 
-    def __init__(self, arcs: Dict[str, ArcConfig], backends: Dict[str, Retriever]):
+    def __init__(
+        self,
+        arcs: Dict[str, ArcConfig],
+        backends: Dict[str, Retriever],
+        executor: Optional[ThreadPoolExecutor] = None,
+        cache: Optional[QueryCache] = None,
+    ):
         self.arcs = arcs or {}
         self.backends = backends or {}
+        self.executor = executor
+        self.cache = cache
         self.last_stats: Dict[str, Any] = {}
 
+    def _fan_out(self, query: str, filters: Optional[Dict[str, Any]]) -> Dict[str, tuple]:
+        live = [(name, cfg, self.backends.get(name)) for name, cfg in self.arcs.items() if cfg.enabled]
+        live = [(name, cfg, b) for name, cfg, b in live if b]
+        t0 = time.perf_counter()
+
+        def run(backend: Retriever, k: int) -> tuple:
+            hits = backend.retrieve(query, k=k, filters=filters)
+            return hits, (time.perf_counter() - t0) * 1000.0
+
+        pool = self.executor or _shared_pool()
+        futures: Dict[str, Future] = {name: pool.submit(run, b, cfg.k) for name, cfg, b in live}
+        out: Dict[str, tuple] = {}
+        for name, cfg, _ in live:
+            fut = futures[name]
+            wait = None
+            if cfg.timeout_s is not None:
+                wait = max(0.0, t0 + float(cfg.timeout_s) - time.perf_counter())
+            try:
+                out[name] = fut.result(timeout=wait)
+            except FutureTimeout:
+                fut.cancel()
+                out[name] = ("timeout", (time.perf_counter() - t0) * 1000.0)
+            except Exception:
+                out[name] = ("error", (time.perf_counter() - t0) * 1000.0)
+        return out
+
     def retrieve(self, query: str, k: int = 8, filters: Optional[Dict[str, Any]] = None) -> List[DocBlob]:
+        # one instance serves concurrent requests: decide on this call's own stats,
+        # last_stats is only published (never read back)
+        if self.cache is None:
+            out, stats = self._retrieve(query, k, filters)
+            self.last_stats = stats
+            return out
+        key = self.cache.key(query, k, filters)
+        hit = self.cache.get(key)
+        if hit is not None:
+            out, stats = hit
+            self.last_stats = stats | {"cache": "hit"}
+            return out
+        out, stats = self._retrieve(query, k, filters)
+        if all(isinstance(v, int) for v in stats["per_arc"].values()):
+            self.cache.put(key, out, stats)
+        self.last_stats = stats | {"cache": "miss"}
+        return out
+
+    def _retrieve(self, query: str, k: int, filters: Optional[Dict[str, Any]]) -> Tuple[List[DocBlob], Dict[str, Any]]:
         bucket: Dict[str, DocBlob] = {}
-        stats = {"per_arc": {}, "unique_before_cut": 0}
+        stats = {"per_arc": {}, "arc_ms": {}, "unique_before_cut": 0}
 
-        for name, cfg in self.arcs.items():
-            if not cfg.enabled:
-                continue
-            backend = self.backends.get(name)
-            if not backend:
+        for name, (hits, ms) in self._fan_out(query, filters).items():  # arc-config order
+            stats["arc_ms"][name] = round(ms, 2)
+            if isinstance(hits, str):
+                stats["per_arc"][name] = hits
                 continue
-            try:
-                hits = backend.retrieve(query, k=cfg.k, filters=filters)
-            except Exception:
-                hits = []
             stats["per_arc"][name] = len(hits)
+            weight = float(self.arcs[name].weight)
             for h in hits:
-                wscore = float(h.score) * float(cfg.weight)
+                wscore = float(h.score) * weight
                 if h.doc_id in bucket:
                     # soft-union by max-like add (simple sum is fine here)
                     bucket[h.doc_id].score = bucket[h.doc_id].score + wscore
@@ -134,8 +397,6 @@ class MultiArcRetriever(Retriever):
 
         merged = list(bucket.values())
         stats["unique_before_cut"] = len(merged)
-        merged.sort(key=lambda x: x.score, reverse=True)
+        merged.sort(key=lambda x: (-x.score, x.doc_id))
         out = merged[:k]
-
-        self.last_stats = stats | {"returned": len(out)}
-        return out
+        return out, stats | {"returned": len(out)}
@@ -87,6 +87,9 @@ class AgenticRAGPipeline:
                 stage_counts["after_blend"] = len(docs)
 
         # ---- Stage E: final cut & excerpt budget ----------------------------
+        # passage hits (meta.scroll_id) collapse to one note per scroll first
+        docs = self._collapse_passages(docs)
+        stage_counts["after_collapse"] = len(docs)
         use_docs = docs[:notes_used]
 
         # Trim excerpts to per_note_chars without breaking existing fields
@@ -152,6 +155,31 @@ class AgenticRAGPipeline:
 
         return result
 
+    @staticmethod
+    def _collapse_passages(docs: List[DocBlob]) -> List[DocBlob]:
+        """
+        Merge passage DocBlobs (meta has scroll_id/chunk) of the same scroll into
+        one blob at the position of its best-ranked passage: doc_id = scroll id,
+        score = that passage's score, text = passages in rank order,
+        meta["chunks"] = their offsets. Whole-scroll blobs pass through unchanged.
+        """
+        out: List[DocBlob] = []
+        by_scroll: Dict[str, DocBlob] = {}
+        for d in docs:  # already ranked
+            meta = d.meta or {}
+            sid = meta.get("scroll_id")
+            if not sid:
+                out.append(d)
+                continue
+            head = by_scroll.get(sid)
+            if head is None:
+                head = by_scroll[sid] = DocBlob(sid, d.text, dict(meta, chunks=[meta.get("chunk")]), d.score)
+                out.append(head)
+            else:
+                head.text = f"{head.text}\n\n{d.text}"
+                head.meta["chunks"].append(meta.get("chunk"))
+        return out
+
     @staticmethod
     def _blend(a: List[DocBlob], b: List[DocBlob], top_k: int = 8) -> List[DocBlob]:
         """Merge two ranked lists by doc_id, keeping the max score per id."""
@@ -1,6 +1,8 @@
 # src/tobyworld/api/server.py
 
 import time
+import threading
+from contextlib import asynccontextmanager
 from typing import Any, Dict, List, Optional
 from pathlib import Path
 import re
@@ -23,6 +25,7 @@ from prometheus_client import (
     generate_latest,
     CONTENT_TYPE_LATEST,
 )
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 
 # >>> DB helpers (new)
 from tobyworld.db import (
@@ -44,12 +47,19 @@ from ..core.config import Config
 
 # === Agentic RAG v3 ===
 from tobyworld.agentic_rag.pipeline import AgenticRAGPipeline
-from tobyworld.agentic_rag.multi_arc_retrieval import MultiArcRetriever, ArcConfig, LocalRetriever
+from tobyworld.agentic_rag.multi_arc_retrieval import MultiArcRetriever, ArcConfig, LocalRetriever, BM25Retriever, DenseRetriever, QueryCache
 from tobyworld.agentic_rag.reasoning_agent import ReasoningAgent
 from tobyworld.agentic_rag.synthesis_agent import SynthesisAgent
 from tobyworld.agentic_rag.base import QueryContext
+from tobyworld.agentic_rag.index_snapshot import load_snapshot, save_snapshot
+from tobyworld.agentic_rag.meta_filters import normalize_filters
+from tobyworld.retrieval.dense_cache import shared_embedding_cache, shared_hit_cache
 from tobyworld.utils.simple_llm import HTTPLLM
-from tobyworld.utils.scroll_loader import load_scroll_index  # index loader
+from tobyworld.utils.scroll_loader import ScrollIndex, chunk_rows  # index loader (incremental refresh)
+from tobyworld.utils.scroll_watcher import ScrollWatcher
+from tobyworld.utils.parse_cache import ParseCache
+from tobyworld.utils.scroll_catalog import ScrollCatalog
+from tobyworld.utils.memory import rss_bytes
 
 # ---------------------------------------------------------------------
 # Optional .env loader (repo-root /.env). Safe if file doesn't exist.
@@ -112,7 +122,19 @@ try:
 except Exception:
     _set_gq_provider = None  # guard might be older version
 
-app = FastAPI(title="Tobyworld Mirror V3")
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    # WATCHER (opt-in scroll watcher) is defined further down, next to the rebuild endpoint
+    if WATCHER:
+        WATCHER.start()
+    try:
+        yield
+    finally:
+        if WATCHER:
+            WATCHER.stop()
+        _save_snapshot()  # keep rebuilds/watcher updates for the next boot
+
+app = FastAPI(title="Tobyworld Mirror V3", lifespan=_lifespan)
 # init DB at startup (new)
 init_db()
 core = MirrorCore(Config())
@@ -137,6 +159,30 @@ REQUEST_LATENCY = Histogram(
 )
 UPTIME_GAUGE = Gauge("tw_uptime_seconds", "Process uptime in seconds", registry=REGISTRY)
 
+class _QueryCacheCollector:
+    """Exports QUERY_CACHE and the dense-path LRU counters at scrape time (the caches keep plain ints)."""
+    def collect(self):
+        cache = globals().get("QUERY_CACHE")
+        if cache is None:
+            return
+        st = cache.stats()
+        for name, doc in (("hits", "Retrieval queries served from the cache"),
+                          ("misses", "Retrieval queries that ran the arcs"),
+                          ("evictions", "Cache entries dropped by the LRU bound"),
+                          ("expired", "Cache entries dropped by TTL")):
+            yield CounterMetricFamily(f"tw_query_cache_{name}", doc, value=st[name])
+        yield GaugeMetricFamily("tw_query_cache_entries", "Retrieval cache entries", value=st["entries"])
+        yield GaugeMetricFamily("tw_query_cache_generation", "Retrieval index generation", value=st["generation"])
+        # shared dense-path LRUs (retrieval/dense_cache.py)
+        for cname, label, lru in (("query_embed_cache", "Query embeddings", shared_embedding_cache()),
+                                  ("dense_hit_cache", "Dense search results", shared_hit_cache())):
+            st = lru.stats()
+            yield CounterMetricFamily(f"tw_{cname}_hits", f"{label} served from the cache", value=st["hits"])
+            yield CounterMetricFamily(f"tw_{cname}_misses", f"{label} computed", value=st["misses"])
+            yield GaugeMetricFamily(f"tw_{cname}_entries", f"{label} cached", value=st["entries"])
+
+REGISTRY.register(_QueryCacheCollector())
+
 # ---------- Models ----------
 class Health(BaseModel):
     ok: bool
@@ -150,6 +196,9 @@ class Diag(BaseModel):
 class AskRequest(BaseModel):
     user: str = "anon"
     question: str
+    # metadata restriction pushed into retrieval, e.g.
+    # {"series": ["TOBY_QL"], "tags": ["lore"], "lang": "en", "since": "2024-01-01", "until": 1735689600}
+    filters: Optional[Dict[str, Any]] = None
 
 class AskResponse(BaseModel):
     answer: str
@@ -392,32 +441,141 @@ def _fix_render_artifacts(text: str) -> str:
 _REPO_ROOT = Path(__file__).resolve().parents[3]
 SCROLLS_DIR = Path(os.getenv("LORE_SCROLLS_DIR", str(_REPO_ROOT / "lore-scrolls")))
 
-def _augment_index_for_series(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Prepend filename + inferred series tag + title into text to improve lexical recall."""
-    out: List[Dict[str, Any]] = []
-    rx_series = re.compile(r"^(TOBY_[A-Z]+)")
-    for r in rows:
-        rid = str(r.get("id", ""))
-        meta = r.get("meta", {}) or {}
-        title = str(meta.get("title", "")).strip()
-        fname = Path(rid).name
-        m = rx_series.match(fname)
-        series = m.group(1) if m else ""
-        prefix = " ".join(x for x in [fname, series, title] if x)
-        text = r.get("text", "") or ""
-        boosted = f"{prefix}\n\n{text}"
-        out.append({"id": rid, "text": boosted, "meta": meta})
-    return out
-
-# Build initial index/backends (with series-aware boost)
-LEX_INDEX = _augment_index_for_series(load_scroll_index(root=str(SCROLLS_DIR)))
-LEX_BACKEND = LocalRetriever(LEX_INDEX)
+# Filename, series (TOBY_QL, ...) and title are LexicalIndex fields next to
+# the body, weighted at scoring time, so LEX_INDEX and the arcs share the
+# ScrollIndex row dicts: every scroll's text is held once.
+# MIRROR_FIELD_WEIGHTS tunes the BM25F arc, e.g. "title=3,series=1.5,filename=1".
+_FIELD_WEIGHTS = {
+    k.strip(): float(v)
+    for k, _, v in (kv.partition("=") for kv in os.getenv("MIRROR_FIELD_WEIGHTS", "").split(",") if "=" in kv)
+}
 
-# ↑↑ Bump lexical recall for better surfacing of QL during tests
+# Passage mode: the retrieval arcs index ~800-char chunks (same splitter as
+# scripts/index_scrolls.py) instead of whole scrolls; the pipeline collapses
+# them per scroll before the final cut. LEX_INDEX stays one row per scroll.
+PASSAGE_INDEX = os.getenv("MIRROR_PASSAGE_INDEX", "0").lower() in {"1", "true", "yes", "on"}
+
+def _arc_rows(scroll_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return chunk_rows(scroll_rows) if PASSAGE_INDEX else scroll_rows
+
+def _apply_scroll_delta(delta) -> Dict[str, int]:
+    """Patch LEX_INDEX and the shared lexical index with a ScrollIndex.refresh() delta."""
+    global LEX_INDEX
+    if not delta:
+        return {"added": 0, "removed": 0}
+    upserted = delta.upserted
+    gone = set(delta.removed) | {r["id"] for r in upserted}
+    LEX_INDEX = sorted([r for r in LEX_INDEX if r["id"] not in gone] + upserted, key=lambda r: r["id"])
+    if CATALOG is not None:
+        CATALOG.update(upserted, removed=delta.removed)
+    return LEX_BACKEND.index.update(_arc_rows(upserted), removed=delta.removed)
+
+_REBUILD_LOCK = threading.Lock()
+
+# File name / title catalog behind /admin/index/list and /admin/index/search
+# (trigram-narrowed regex search, series counts). Built on first use, then
+# kept current by _apply_scroll_delta and full rebuilds.
+CATALOG: Optional[ScrollCatalog] = None
+_ADMIN_SEARCH_BUDGET_S = float(os.getenv("MIRROR_ADMIN_SEARCH_BUDGET_MS", "250")) / 1000.0
+
+def _catalog() -> ScrollCatalog:
+    global CATALOG
+    if CATALOG is None:
+        with _REBUILD_LOCK:
+            if CATALOG is None:
+                CATALOG = ScrollCatalog(LEX_INDEX)
+    return CATALOG
+
+# Boot from the index snapshot (parsed rows + lexical index, mmapped) when it
+# matches SCROLLS_DIR and the row config; scrolls changed since it was written
+# are re-parsed through the same delta path as /admin/retriever/rebuild.
+# Otherwise parse everything. SCROLLS remembers (mtime, size) per file.
+# MIRROR_INDEX_SNAPSHOT=0 disables the snapshot.
+_SNAPSHOT_PATH = os.getenv("MIRROR_INDEX_SNAPSHOT", str(Path(core.cfg.data_dir) / "lexical.snap"))
+if _SNAPSHOT_PATH.lower() in {"", "0", "false", "no", "off"}:
+    _SNAPSHOT_PATH = ""
+_SNAPSHOT_KEY = {"passages": PASSAGE_INDEX, "rows": "fields-1"}
+_SNAPSHOT_SAVED: Dict[str, Any] = {}   # "index": (id, generation) last written/loaded, + save stats
+
+def _save_snapshot() -> None:
+    """Write the snapshot unless the current index version is already on disk."""
+    if not _SNAPSHOT_PATH:
+        return
+    with _REBUILD_LOCK:
+        ix = LEX_BACKEND.index
+        if _SNAPSHOT_SAVED.get("index") == (id(ix), ix.generation):
+            return
+        t0 = time.perf_counter()
+        try:
+            out = save_snapshot(_SNAPSHOT_PATH, SCROLLS, ix, _SNAPSHOT_KEY)
+        except Exception as e:
+            print(f"[SNAPSHOT][ERR] {e}", flush=True)
+            return
+        _SNAPSHOT_SAVED.update(out, index=(id(ix), ix.generation), ts=time.time(),
+                               ms=round((time.perf_counter() - t0) * 1000.0, 2))
+
+# MIRROR_SCROLL_WORKERS: processes parsing scrolls on a full load/big refresh (1 = serial, 0 = all CPUs)
+_SCROLL_WORKERS = int(os.getenv("MIRROR_SCROLL_WORKERS", "1"))
+# Parsed frontmatter/meta per scroll (path + mtime/size, content-hash fallback); MIRROR_PARSE_CACHE=0 disables
+_PARSE_CACHE_PATH = os.getenv("MIRROR_PARSE_CACHE", str(Path(core.cfg.data_dir) / "parse_cache.sqlite"))
+PARSE_CACHE = ParseCache(_PARSE_CACHE_PATH) if _PARSE_CACHE_PATH.lower() not in {"", "0", "false", "no", "off"} else None
+
+_t_boot, _rss_boot = time.perf_counter(), rss_bytes()
+_loaded = load_snapshot(_SNAPSHOT_PATH, SCROLLS_DIR, _SNAPSHOT_KEY) if _SNAPSHOT_PATH else None
+if _loaded:
+    SCROLLS, _ix = _loaded
+    SCROLLS.workers, SCROLLS.parse_cache = _SCROLL_WORKERS, PARSE_CACHE
+    LEX_INDEX = sorted(SCROLLS.rows, key=lambda r: r["id"])
+    LEX_BACKEND = LocalRetriever(_ix)
+    _SNAPSHOT_SAVED["index"] = (id(_ix), _ix.generation)
+    _boot_delta = SCROLLS.refresh()
+    _apply_scroll_delta(_boot_delta)
+    _reparsed, _stale = len(_boot_delta.upserted), len(_boot_delta) > 0
+else:
+    SCROLLS = ScrollIndex(SCROLLS_DIR, workers=_SCROLL_WORKERS, parse_cache=PARSE_CACHE)
+    LEX_INDEX = sorted(SCROLLS.rows, key=lambda r: r["id"])
+    LEX_BACKEND = LocalRetriever(_arc_rows(LEX_INDEX))
+    _reparsed, _stale = len(LEX_INDEX), True
+BOOT_STATS = {
+    "snapshot": _SNAPSHOT_PATH or None,
+    "from_snapshot": bool(_loaded),
+    "scrolls_parsed": _reparsed,
+    "ms": round((time.perf_counter() - _t_boot) * 1000.0, 2),
+}
+if _SNAPSHOT_PATH and _stale:  # (re)write in the background, startup does not wait for it
+    threading.Thread(target=_save_snapshot, name="index-snapshot", daemon=True).start()
+BM25_BACKEND = BM25Retriever(LEX_BACKEND.index, field_weights=_FIELD_WEIGHTS)  # shares the inverted index
+_rss_now = rss_bytes()
+BOOT_STATS["rss_delta_bytes"] = (_rss_now - _rss_boot) if _rss_now is not None and _rss_boot is not None else None
+# chunk embeddings from scripts/index_scrolls.py (data/index), mmapped; reuses core's embedder
+# and its micro-batcher (TW_EMBED_BATCH), so concurrent /ask queries share encode + search calls
+DENSE_BACKEND = DenseRetriever(core.retriever, core.embedder, LEX_BACKEND.rows, batcher=core.dense)
+
+# BM25F (length-normalized, title-weighted) is the primary lexical arc, so the
+# candidate budget stays small. This changed the default ranking: the previous
+# setup (raw-tf lexical arc only, k=40, MIRROR_TOPK_FINAL=48) is
+#   MIRROR_ARCS=lexical MIRROR_ARC_K=40 MIRROR_TOPK_FINAL=48
+# Arcs run concurrently; one that misses MIRROR_ARC_TIMEOUT_S is dropped for that query.
+_ENABLED_ARCS = {a.strip() for a in os.getenv("MIRROR_ARCS", "bm25").split(",") if a.strip()}
+_ARC_K = int(os.getenv("MIRROR_ARC_K", "16"))
+_ARC_TIMEOUT_S = float(os.getenv("MIRROR_ARC_TIMEOUT_S", "2.0"))
+TOPK_FINAL_DEFAULT = 16
 ARCS = {
-    "lexical": ArcConfig(name="lexical", weight=1.0, k=40, enabled=True),
+    "bm25": ArcConfig(name="bm25", weight=1.0, k=_ARC_K, enabled="bm25" in _ENABLED_ARCS, timeout_s=_ARC_TIMEOUT_S),
+    "lexical": ArcConfig(name="lexical", weight=1.0, k=_ARC_K, enabled="lexical" in _ENABLED_ARCS, timeout_s=_ARC_TIMEOUT_S),
+    "dense": ArcConfig(name="dense", weight=1.0, k=_ARC_K, enabled="dense" in _ENABLED_ARCS, timeout_s=_ARC_TIMEOUT_S),
 }
-RETRIEVER = MultiArcRetriever(arcs=ARCS, backends={"lexical": LEX_BACKEND})
+
+def _backends() -> Dict[str, Any]:
+    return {"bm25": BM25_BACKEND, "lexical": LEX_BACKEND, "dense": DENSE_BACKEND}
+
+# Merged-result cache for repeated questions; rebuilds bump its generation.
+QUERY_CACHE = QueryCache(
+    max_entries=int(os.getenv("MIRROR_QUERY_CACHE", "256")),
+    ttl_s=float(os.getenv("MIRROR_QUERY_CACHE_TTL_S", "300")),
+)
+
+RETRIEVER = MultiArcRetriever(arcs=ARCS, backends=_backends(), cache=QUERY_CACHE)
 
 LLM = HTTPLLM(
     endpoint=os.getenv("LMSTUDIO_ENDPOINT", "http://127.0.0.1:1234/v1/chat/completions"),
@@ -464,6 +622,17 @@ def _collect_status() -> Dict[str, Any]:
         "uptime_seconds": round(time.time() - START_TS, 3),
         "requests": REQS_TOTAL,
         "retriever": rstats,
+        "reindex": {
+            "last": dict(_LAST_REBUILD),
+            "watcher": WATCHER.stats() if WATCHER else None,
+            "boot": BOOT_STATS,
+            "snapshot_saved": {k: v for k, v in _SNAPSHOT_SAVED.items() if k != "index"},
+        },
+        "memory": {
+            "rss_bytes": rss_bytes(),
+            "index_boot_rss_delta_bytes": BOOT_STATS.get("rss_delta_bytes"),
+            "lexical": LEX_BACKEND.index.memory_stats(),
+        },
         "learning": {"routes": routes, "top_topics": topics, "top_docs": top_docs, "lucidity": learning_lucidity},
         "version": str(core.cfg.version),
     }
@@ -496,15 +665,19 @@ def diag(n: int = Query(5, ge=1, le=50)) -> Diag:
         REQUEST_COUNT.labels("diag").inc()
         REQUEST_LATENCY.labels("diag").observe(time.perf_counter() - t0)
 
-# Make /reload call the proper rebuild logic
+# Make /reload call the proper rebuild logic (sync def: runs in the threadpool, off the event loop)
 @app.post("/reload")
-async def reload_endpoint():
+def reload_endpoint():
     return retriever_rebuild()
 
 @app.post("/ask", response_model=AskResponse)
 async def ask(req: AskRequest) -> AskResponse:
     t0 = time.perf_counter()
     try:
+        try:
+            meta_filters = normalize_filters(req.filters)
+        except ValueError as e:
+            return JSONResponse({"error": f"filters: {e}"}, status_code=400)
         user = req.user or "anon"
         q = (req.question or "").strip()
         route = router.route(q)
@@ -516,15 +689,15 @@ async def ask(req: AskRequest) -> AskResponse:
             depth=depth_mode,
         )
 
-        # env-based budgets (bumped defaults for better QL surfacing)
-        TOPK_FINAL     = int(os.getenv("MIRROR_TOPK_FINAL", 48))
+        # env-based budgets (BM25 ranks QL well without a wide candidate pool)
+        TOPK_FINAL     = int(os.getenv("MIRROR_TOPK_FINAL", TOPK_FINAL_DEFAULT))
         NOTES_USED     = int(os.getenv("MIRROR_NOTES_USED", 10))
         PER_NOTE_CHARS = int(os.getenv("MIRROR_PER_NOTE_CHARS", 1800))
 
         rag_out = PIPELINE.run(
             q, ctx,
             k=TOPK_FINAL,
-            filters={"use_docs": NOTES_USED, "per_note_chars": PER_NOTE_CHARS}
+            filters={"use_docs": NOTES_USED, "per_note_chars": PER_NOTE_CHARS, **meta_filters}
         )
 
         # --- QL-first doc ordering for meta/render helpers ---
@@ -708,12 +881,16 @@ async def debug_route(req: Request):
 
 @app.post("/debug/rag")
 async def debug_rag(req: AskRequest):
+    try:
+        meta_filters = normalize_filters(req.filters)
+    except ValueError as e:
+        return JSONResponse({"error": f"filters: {e}"}, status_code=400)
     user = req.user or "anon"
     q = (req.question or "").strip()
     route = router.route(q)
     depth_mode = _depth_to_mode(route.depth, route.mode)
     ctx = QueryContext(user_id=user, route_symbol=route.primary_symbol, depth=depth_mode)
-    rag_out = PIPELINE.run(q, ctx, k=16, filters=None)  # bumped for debug visibility
+    rag_out = PIPELINE.run(q, ctx, k=16, filters=meta_filters or None)  # bumped for debug visibility
 
     # Summarize docs with file + series for quick eyeballing of QL bias
     def _series_of_id(fid: str) -> str:
@@ -742,18 +919,77 @@ async def debug_rag(req: AskRequest):
         },
     }
 
-@app.post("/admin/retriever/rebuild")
-def retriever_rebuild():
-    global LEX_INDEX, LEX_BACKEND, RETRIEVER, PIPELINE
-    base_rows = load_scroll_index(root=str(SCROLLS_DIR))
-    LEX_INDEX = _augment_index_for_series(base_rows)
-    LEX_BACKEND = LocalRetriever(LEX_INDEX)
-    RETRIEVER = MultiArcRetriever(arcs=ARCS, backends={"lexical": LEX_BACKEND})
+_LAST_REBUILD: Dict[str, Any] = {}   # last rebuild (manual or watcher), shown on /status
+
+def _publish_backends() -> None:
+    """Re-point the arcs at the (patched or rebuilt) lexical index and drop cached results."""
+    global DENSE_BACKEND, RETRIEVER
+    DENSE_BACKEND = DenseRetriever(core.retriever, core.embedder, LEX_BACKEND.rows, batcher=core.dense)
+    RETRIEVER = MultiArcRetriever(arcs=ARCS, backends=_backends(), cache=QUERY_CACHE)
+    QUERY_CACHE.bump_generation()
     try:
         PIPELINE.retriever = RETRIEVER
     except Exception:
         pass
-    return {"ok": True, "count": len(LEX_INDEX), "dir": str(SCROLLS_DIR)}
+
+@app.post("/admin/retriever/rebuild")
+def retriever_rebuild(full: bool = False):
+    """
+    Incremental by default: re-parse only added/changed/removed scrolls
+    (ScrollIndex mtime+size) and patch the lexical index in place.
+    full=1 (or tombstones outnumbering live docs) re-reads the corpus.
+    The dense arc picks up a chunk index rewritten by scripts/index_scrolls.py
+    (e.g. --incremental) since the last load.
+    """
+    global LEX_INDEX, LEX_BACKEND, BM25_BACKEND, CATALOG
+    t0 = time.perf_counter()
+    with _REBUILD_LOCK:
+        ix = LEX_BACKEND.index
+        if full or ix.tombstones > len(ix):
+            SCROLLS.rebuild()
+            LEX_INDEX = sorted(SCROLLS.rows, key=lambda r: r["id"])
+            LEX_BACKEND = LocalRetriever(_arc_rows(LEX_INDEX))
+            BM25_BACKEND = BM25Retriever(LEX_BACKEND.index, field_weights=_FIELD_WEIGHTS)
+            if CATALOG is not None:
+                CATALOG = ScrollCatalog(LEX_INDEX)
+            mode, touched = "full", {"added": len(LEX_BACKEND.index), "removed": len(ix)}
+            delta_counts = {"added": len(LEX_INDEX), "changed": 0, "removed": 0}
+        else:
+            delta = SCROLLS.refresh()
+            mode, touched = "incremental", {"added": 0, "removed": 0}
+            delta_counts = {"added": len(delta.added), "changed": len(delta.changed), "removed": len(delta.removed)}
+            touched = _apply_scroll_delta(delta)
+        dense_reloaded = core.retriever.maybe_reload()
+        if mode == "full" or dense_reloaded or delta_counts["added"] + delta_counts["changed"] + delta_counts["removed"]:
+            _publish_backends()
+    out = {
+        "ok": True,
+        "mode": mode,
+        "count": len(LEX_INDEX),
+        "passages": len(LEX_BACKEND.index) if PASSAGE_INDEX else None,
+        "scrolls": delta_counts,
+        "docs_touched": touched["added"] + touched["removed"],
+        "dense_reloaded": dense_reloaded,
+        "parse_cache": PARSE_CACHE.last if PARSE_CACHE else None,
+        "ms": round((time.perf_counter() - t0) * 1000.0, 2),
+        "dir": str(SCROLLS_DIR),
+    }
+    _LAST_REBUILD.update(out, ts=time.time())
+    return out
+
+# Opt-in background reindex: MIRROR_WATCH_SCROLLS=1 (watchfiles/inotify if
+# installed, else stat poll) or =poll. Bursts are debounced into one
+# incremental rebuild; queries keep reading the previous snapshot meanwhile.
+_WATCH_MODE = os.getenv("MIRROR_WATCH_SCROLLS", "0").lower()
+WATCHER: Optional[ScrollWatcher] = None
+if _WATCH_MODE in {"1", "true", "yes", "on", "auto", "watchfiles", "poll"}:
+    WATCHER = ScrollWatcher(
+        SCROLLS_DIR,
+        on_batch=retriever_rebuild,
+        debounce_s=float(os.getenv("MIRROR_WATCH_DEBOUNCE_S", "1.0")),
+        poll_s=float(os.getenv("MIRROR_WATCH_POLL_S", "2.0")),
+        backend=_WATCH_MODE if _WATCH_MODE in {"watchfiles", "poll"} else "auto",
+    )
 
 @app.get("/metrics", include_in_schema=False)
 def metrics():
@@ -787,38 +1023,23 @@ def status_lucidity():
 # --- admin index list (basename-aware) ---
 @app.get("/admin/index/list")
 def index_list(prefix: str = ""):
-    def base(name_or_path: str) -> str:
-        return Path(name_or_path).name
-
-    data = LEX_INDEX
-    if prefix:
-        data = [d for d in data if base(d.get("id", "")).startswith(prefix)]
-
-    def count_series(pfx: str) -> int:
-        return sum(1 for d in LEX_INDEX if base(d.get("id", "")).startswith(pfx))
-
+    cat = _catalog()
     return {
         "dir": str(SCROLLS_DIR),
-        "count_total": len(LEX_INDEX),
-        "count_by_series": {
-            "TOBY_L":  count_series("TOBY_L"),
-            "TOBY_QA": count_series("TOBY_QA"),
-            "TOBY_F":  count_series("TOBY_F"),
-            "TOBY_QL": count_series("TOBY_QL"),
-        },
-        "sample": [d["meta"].get("title") for d in data[:15]],
+        "count_total": len(cat),
+        "count_by_series": {pfx: cat.count_prefix(pfx) for pfx in ("TOBY_L", "TOBY_QA", "TOBY_F", "TOBY_QL")},
+        "sample": cat.titles(prefix, limit=15),
     }
 
 # --- optional: quick search over index (title or filename regex) ---
 @app.get("/admin/index/search")
 def index_search(q: str):
-    rx = re.compile(q, re.I)
-    rows = []
-    for d in LEX_INDEX:
-        title = str(d["meta"].get("title", ""))
-        fname = Path(d["id"]).name
-        if rx.search(title) or rx.search(fname):
-            rows.append({"file": fname, "title": title})
-            if len(rows) >= 25:
-                break
-    return {"matches": rows, "total": len(rows)}
+    """
+    Case-insensitive regex over scroll titles and file names (first 25 by
+    id). Only scrolls containing the pattern's literal trigrams are tested;
+    the scan stops after MIRROR_ADMIN_SEARCH_BUDGET_MS ("complete": false).
+    """
+    try:
+        return _catalog().search(q, limit=25, budget_s=_ADMIN_SEARCH_BUDGET_S)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
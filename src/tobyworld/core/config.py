@@ -1,5 +1,6 @@
 # src/tobyworld/core/config.py
 from pathlib import Path
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Config(BaseSettings):
@@ -15,6 +16,10 @@ class Config(BaseSettings):
     # Retrieval / RAG
     embedding_model: str = "all-MiniLM-L6-v2"  # env: TW_EMBEDDING_MODEL
     rag_top_k: int = 5                         # env: TW_RAG_TOP_K
+    ann_nprobe: Optional[int] = None           # env: TW_ANN_NPROBE (IVF cells per query; None = meta.json)
+    ann_ef_search: Optional[int] = None        # env: TW_ANN_EF_SEARCH (HNSW efSearch; None = meta.json)
+    embed_batch: int = 32                      # env: TW_EMBED_BATCH (queries encoded + searched together; <= 1 = off)
+    embed_batch_wait_ms: float = 2.0           # env: TW_EMBED_BATCH_WAIT_MS (window a batch waits to fill)
 
     # Traits
     decay_half_life_days: float = 14.0         # env: TW_DECAY_HALF_LIFE_DAYS
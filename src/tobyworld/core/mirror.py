@@ -4,6 +4,8 @@ from typing import Tuple, Dict, Any
 
 from .config import Config
 from .ledger import Ledger
+from ..retrieval.batching import BatchedQuerySearch
+from ..retrieval.dense_cache import CachedDenseSearch, cached_query_encoder
 from ..retrieval.retriever import Retriever
 
 try:
@@ -18,11 +20,33 @@ class MirrorCore:
         self.ledger = Ledger()
 
         self.index_dir = Path(self.cfg.data_dir) / "index"
-        self.retriever = Retriever(self.index_dir)
+        self.retriever = Retriever(
+            self.index_dir,
+            nprobe=getattr(self.cfg, "ann_nprobe", None),
+            ef_search=getattr(self.cfg, "ann_ef_search", None),
+        )
 
         emb_model = getattr(self.cfg, "embedding_model", "all-MiniLM-L6-v2")
         self.embedder = SentenceTransformer(emb_model) if _HAS_ST else None
         self.rag_top_k = int(getattr(self.cfg, "rag_top_k", 5))
+        # concurrent questions share one encode() + one index search (retrieval/batching.py);
+        # repeated strings skip both (retrieval/dense_cache.py: shared query-embedding LRU,
+        # hit LRU keyed on the loaded index's stamp). The dense arc (DenseRetriever) goes
+        # through the same path.
+        self.dense = None
+        if self.embedder is not None:
+            encode = cached_query_encoder(
+                lambda texts: self.embedder.encode(texts, batch_size=len(texts), convert_to_numpy=True,
+                                                   normalize_embeddings=True),
+                emb_model,
+            )
+            batched = BatchedQuerySearch(
+                encode,
+                self.retriever.search_embeddings,
+                max_batch=int(getattr(self.cfg, "embed_batch", 32)),
+                max_wait_ms=float(getattr(self.cfg, "embed_batch_wait_ms", 2.0)),
+            )
+            self.dense = CachedDenseSearch(batched, str(self.index_dir), emb_model, lambda: self.retriever.stamp)
 
     def ask(self, user: str, question: str) -> Tuple[str, Dict[str, Any]]:
         if not question:
@@ -31,9 +55,8 @@ class MirrorCore:
         docs_used = 0
         answer = "This is a stubbed scroll response."
 
-        if self.retriever.ready and self.embedder is not None:
-            qv = self.embedder.encode([question], convert_to_numpy=True, normalize_embeddings=True)[0]
-            hits = self.retriever.search_embedding(qv, top_k=self.rag_top_k)
+        if self.retriever.ready and self.dense is not None:
+            hits = self.dense.search(question, top_k=self.rag_top_k)
             docs_used = len(hits)
             if hits:
                 top = ", ".join(Path(h.path).name for h in hits[:3])
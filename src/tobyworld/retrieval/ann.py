@@ -0,0 +1,191 @@
+# src/tobyworld/retrieval/ann.py
+"""
+FAISS index types for the chunk index (scripts/index_scrolls.py, Retriever).
+
+  flat    exact inner product (IndexFlatIP; IndexScalarQuantizer for
+          float16/int8 storage); cost grows linearly with the chunk count
+  ivf     IVF-Flat: k-means coarse quantizer over `nlist` cells, a query
+          scans the `nprobe` nearest cells (IVF-SQ for float16/int8)
+  ivfpq   IVF + product quantization (`pq_m` sub-vectors of `pq_bits`);
+          scores are approximate, Retriever rescores candidates in float32
+  hnsw    HNSW graph (`hnsw_m` links per node), `ef_search` candidates per
+          query (HNSW-SQ for float16/int8)
+
+meta.json records the choice as "ann": {"type": ..., build params,
+"nprobe"/"ef_search" defaults}; Retriever detects the type from the loaded
+index itself and applies nprobe / efSearch per query (SearchParameters, so
+concurrent queries with different settings don't share index state).
+With `ids`, vectors carry those ids (IVF natively, flat / HNSW wrapped in
+an IndexIDMap) so the incremental indexer (retrieval/incremental.py) can
+remove and add chunks in place.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+
+import math
+import numpy as np
+
+try:
+    import faiss  # type: ignore
+    _HAS_FAISS = True
+except Exception:
+    faiss = None
+    _HAS_FAISS = False
+
+ANN_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+APPROX_SCORES = ("ivfpq",)        # index scores are not exact: rescore candidates
+DEFAULT_NPROBE = 16
+DEFAULT_EF_SEARCH = 64
+
+
+def default_nlist(n: int) -> int:
+    """~4·sqrt(n) cells, with at least 39 training points per cell (FAISS's minimum)."""
+    return int(max(1, min(round(4 * math.sqrt(max(n, 1))), n // 39)))
+
+
+def default_pq_m(dim: int) -> int:
+    """Largest divisor of dim giving sub-vectors of >= 8 dims (384 → 48 bytes/vector)."""
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def _sq_type(storage: str):
+    return faiss.ScalarQuantizer.QT_fp16 if storage == "float16" else faiss.ScalarQuantizer.QT_8bit
+
+
+def _train_sample(embs: np.ndarray, n_max: int, seed: int = 0) -> np.ndarray:
+    if len(embs) <= n_max:
+        return embs
+    idx = np.random.default_rng(seed).choice(len(embs), n_max, replace=False)
+    return embs[np.sort(idx)]
+
+
+def build_faiss_index(
+    embs: np.ndarray,
+    index_type: str = "flat",
+    storage: str = "float32",
+    nlist: Optional[int] = None,
+    pq_m: Optional[int] = None,
+    pq_bits: int = 8,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    ids: Optional[np.ndarray] = None,
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    (trained FAISS index holding embs, meta.json "ann" fields). Inner-product
+    metric throughout; ids (int64, one per row) replace the default 0..n-1.
+    """
+    if not _HAS_FAISS:
+        raise RuntimeError("faiss is not installed")
+    if index_type not in ANN_TYPES:
+        raise ValueError(f"unknown index type {index_type!r} (expected one of {ANN_TYPES})")
+    embs = np.ascontiguousarray(embs, dtype=np.float32)
+    n, dim = embs.shape
+    ip = faiss.METRIC_INNER_PRODUCT
+    info: Dict[str, Any] = {"type": index_type}
+
+    if index_type == "flat":
+        if storage == "float32":
+            index = faiss.IndexFlatIP(dim)
+        else:
+            index = faiss.IndexScalarQuantizer(dim, _sq_type(storage), ip)
+            index.train(embs)
+    elif index_type in ("ivf", "ivfpq"):
+        nlist = int(nlist or default_nlist(n))
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivfpq":
+            pq_m = int(pq_m or default_pq_m(dim))
+            if dim % pq_m:
+                raise ValueError(f"pq_m={pq_m} must divide the embedding dim {dim}")
+            pq_bits = int(max(1, min(pq_bits, int(math.log2(max(2, n // 39))))))  # 2**bits centroids need data
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_bits, ip)
+            info.update(pq_m=pq_m, pq_bits=pq_bits)
+        elif storage == "float32":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, ip)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, _sq_type(storage), ip)
+        index.train(_train_sample(embs, max(256 * nlist, 2 ** info.get("pq_bits", 0) * 64)))
+        info.update(nlist=nlist, nprobe=int(min(nlist, nprobe or DEFAULT_NPROBE)))
+    else:  # hnsw
+        if storage == "float32":
+            index = faiss.IndexHNSWFlat(dim, int(hnsw_m), ip)
+        else:
+            index = faiss.IndexHNSWSQ(dim, _sq_type(storage), int(hnsw_m), ip)
+            index.train(embs)
+        index.hnsw.efConstruction = int(ef_construction)
+        info.update(hnsw_m=int(hnsw_m), ef_construction=int(ef_construction),
+                    ef_search=int(ef_search or DEFAULT_EF_SEARCH))
+    if ids is None:
+        index.add(embs)
+        return index, info
+    if index_type not in ("ivf", "ivfpq"):
+        index = faiss.IndexIDMap(index)
+    index.add_with_ids(embs, np.ascontiguousarray(ids, dtype=np.int64))
+    return index, info
+
+
+def _base(index: Any) -> Any:
+    """The index inside an IndexIDMap wrapper (the index itself otherwise)."""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def ann_type(index: Any) -> str:
+    """ANN_TYPES entry of a loaded FAISS index ("flat" for anything else)."""
+    if not _HAS_FAISS or index is None:
+        return "flat"
+    index = _base(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def has_ids(index: Any) -> bool:
+    """Vectors can be added by id (IndexIDMap, IVF); all but HNSW also support remove_ids."""
+    return _HAS_FAISS and isinstance(index, (faiss.IndexIDMap, faiss.IndexIVF))
+
+
+def search_params(kind: str, nprobe: Optional[int] = None, ef_search: Optional[int] = None, sel: Any = None):
+    """
+    Per-query SearchParameters for index.search(..., params=...); None =
+    index defaults. sel: an IDSelector restricting the ids returned (HNSW
+    soft deletes, see retrieval/incremental.py).
+    """
+    if kind in ("ivf", "ivfpq") and nprobe:
+        return faiss.SearchParametersIVF(nprobe=int(nprobe))
+    if kind == "hnsw" and (ef_search or sel is not None):
+        params = faiss.SearchParametersHNSW(sel=sel) if sel is not None else faiss.SearchParametersHNSW()
+        if ef_search:
+            params.efSearch = int(ef_search)
+        return params
+    return None
+
+
+# ---- indexer CLI (scripts/index_scrolls.py, build_index.py, build_faiss_index.py) ----
+def add_ann_args(ap) -> None:
+    """--index-type and its build/search knobs on an argparse parser."""
+    import os
+    ap.add_argument("--index-type", choices=ANN_TYPES, default=os.environ.get("TW_INDEX_TYPE", "flat"),
+                    help="FAISS index: flat (exact), ivf, ivfpq (IVF + product quantization), hnsw")
+    ap.add_argument("--nlist", type=int, default=None, help="IVF cells (default ~4*sqrt(chunks))")
+    ap.add_argument("--pq-m", type=int, default=None, help="IVF-PQ sub-vectors, must divide the dim (default dim/8)")
+    ap.add_argument("--hnsw-m", type=int, default=32, help="HNSW links per node")
+    ap.add_argument("--nprobe", type=int, default=None,
+                    help=f"default IVF cells scanned per query, stored in meta.json (default {DEFAULT_NPROBE})")
+    ap.add_argument("--ef-search", type=int, default=None,
+                    help=f"default HNSW candidate list per query, stored in meta.json (default {DEFAULT_EF_SEARCH})")
+
+
+def ann_kwargs(args) -> Dict[str, Any]:
+    """build_faiss_index() keyword arguments from add_ann_args() options."""
+    return {"index_type": args.index_type, "nlist": args.nlist, "pq_m": args.pq_m,
+            "hnsw_m": args.hnsw_m, "nprobe": args.nprobe, "ef_search": args.ef_search}
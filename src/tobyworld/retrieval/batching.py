@@ -0,0 +1,137 @@
+# src/tobyworld/retrieval/batching.py
+"""
+Micro-batching for query embedding + dense search.
+
+Encoding one query per request leaves most of the matrix throughput of
+the CPU unused and serializes requests on the GIL. A MicroBatcher collects
+the requests that arrive within `max_wait_ms` of the first one (at most
+`max_batch`), hands them to fn(items) in one call on its worker thread and
+resolves each caller's Future with its own result.
+
+BatchedQuerySearch applies that to dense lookups: one encode() call for
+every query text in the window and one batched search (Retriever.
+search_embeddings, or a FAISS index.search over all rows). Used by
+MirrorCore.ask, the dense arc and pluggable.FaissRetriever:
+  dense = BatchedQuerySearch(encode, retriever.search_embeddings, max_batch=32, max_wait_ms=2.0)
+  hits = dense.search("who is toby", top_k=5)
+max_batch <= 1 disables batching: calls run directly in the caller's thread.
+"""
+from __future__ import annotations
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    submit(item) → Future of fn([..., item, ...])[i]. fn gets the items of
+    one window in arrival order and returns one result per item; if it
+    raises, every Future of that batch gets the exception.
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], Sequence[Any]], max_batch: int = 32,
+                 max_wait_ms: float = 2.0, name: str = "micro-batcher"):
+        self.fn = fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._q: "queue.Queue[Optional[Tuple[Any, Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: Any) -> Future:
+        fut: Future = Future()
+        if self.max_batch <= 1:  # batching off: run inline
+            self._run([(item, fut)])
+            return fut
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                    self._thread.start()
+        self._q.put((item, fut))
+        return fut
+
+    def __call__(self, item: Any, timeout: Optional[float] = None) -> Any:
+        return self.submit(item).result(timeout)
+
+    def close(self) -> None:
+        """Stop the worker after the queued requests (later submits start a new one)."""
+        with self._lock:
+            t, self._thread = self._thread, None
+        if t is not None:
+            self._q.put(None)
+            t.join()
+
+    def _run(self, batch: List[Tuple[Any, Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = self.fn([item for item, _ in batch])
+        except BaseException as e:  # every caller sees the failure
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        for (_, fut), res in zip(batch, results):
+            fut.set_result(res)
+
+    def _loop(self) -> None:
+        q = self._q
+        while True:
+            first = q.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait_s
+            stop = False
+            while len(batch) < self.max_batch:
+                left = deadline - time.perf_counter()
+                try:
+                    nxt = q.get(timeout=left) if left > 0 else q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._run(batch)
+            if stop:
+                return
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "items": self.items,
+                "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0}
+
+
+class BatchedQuerySearch:
+    """
+    search(text, top_k) → that query's hits, computed together with the
+    other queries of its window:
+      encode(texts) → (b, dim) float32 query vectors (normalized)
+      search(Q, k)  → b hit lists, k hits each (searched with the window's
+                      largest top_k, each caller keeps its own top_k)
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray],
+                 search: Callable[[np.ndarray, int], List[List[Any]]],
+                 max_batch: int = 32, max_wait_ms: float = 2.0, name: str = "dense-batcher"):
+        self.encode = encode
+        self._search = search
+        self.batcher = MicroBatcher(self._run, max_batch=max_batch, max_wait_ms=max_wait_ms, name=name)
+
+    def _run(self, items: List[Tuple[str, int]]) -> List[List[Any]]:
+        Q = np.asarray(self.encode([text for text, _ in items]), dtype=np.float32)
+        k = max(top_k for _, top_k in items)
+        return [hits[:top_k] for hits, (_, top_k) in zip(self._search(Q, k), items)]
+
+    def search(self, text: str, top_k: int = 5, timeout: Optional[float] = None) -> List[Any]:
+        return self.batcher((text, int(top_k)), timeout)
+
+    def close(self) -> None:
+        self.batcher.close()
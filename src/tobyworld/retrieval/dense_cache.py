@@ -0,0 +1,163 @@
+# src/tobyworld/retrieval/dense_cache.py
+"""
+Process-wide LRU caches for the dense query path.
+
+  embeddings  (model, text) → float32 query vector
+  hits        (index, model, text, top_k, index stamp) → hits
+
+The guiding-question provider asks MirrorCore the same prompt over and
+over, and popular questions repeat; the embedding cache keeps the
+transformer forward pass to one per distinct string and model. The hit
+cache skips the index search as well; its keys carry the stamp of the
+index that answered (file inode / mtime / size), so a rebuilt or
+reloaded index never serves old hits - stale entries age out through
+the LRU.
+
+Keys hold the exact query text, and a miss encodes that same text, so a
+cached vector is always the one an uncached call would produce (case and
+whitespace can both change a tokenizer's output).
+
+MirrorCore, the dense arc (through MirrorCore.dense) and
+pluggable.FaissRetriever share the two caches returned by
+shared_embedding_cache() / shared_hit_cache(), sized by
+TW_QUERY_EMBED_CACHE (default 1024 vectors) and TW_DENSE_HIT_CACHE
+(default 512 result lists); 0 disables either.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import os
+import threading
+
+import numpy as np
+
+
+def model_key(name: str) -> str:
+    """Hub names with and without the sentence-transformers/ prefix load the same weights."""
+    return name[len("sentence-transformers/"):] if name.startswith("sentence-transformers/") else name
+
+
+class LRUCache:
+    """Thread-safe bounded LRU with hit / miss / eviction counters; max_entries=0 stores nothing."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max(0, int(max_entries))
+        self.hits = self.misses = self.evictions = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            val = self._data.get(key)
+            if val is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return val
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions}
+
+
+# ---- shared instances ----
+_SHARED: Dict[str, LRUCache] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def _shared(name: str, env: str, default: int) -> LRUCache:
+    with _SHARED_LOCK:
+        if name not in _SHARED:
+            _SHARED[name] = LRUCache(int(os.environ.get(env, default)))
+        return _SHARED[name]
+
+
+def shared_embedding_cache() -> LRUCache:
+    return _shared("embeddings", "TW_QUERY_EMBED_CACHE", 1024)
+
+
+def shared_hit_cache() -> LRUCache:
+    return _shared("hits", "TW_DENSE_HIT_CACHE", 512)
+
+
+# ---- wrappers ----
+def cached_query_encoder(encode: Callable[[List[str]], np.ndarray], model: str,
+                         cache: Optional[LRUCache] = None) -> Callable[[List[str]], np.ndarray]:
+    """
+    encode(texts) → (b, dim) float32, encoding only the texts (each distinct
+    text once) whose vector is not cached for this model.
+    Drop-in for BatchedQuerySearch's encode.
+    """
+    cache = shared_embedding_cache() if cache is None else cache
+    model = model_key(model)
+
+    def run(texts: List[str]) -> np.ndarray:
+        keys = [(model, t) for t in texts]
+        vecs: Dict[tuple, np.ndarray] = {}
+        for k in keys:
+            if k not in vecs:
+                v = cache.get(k)
+                if v is not None:
+                    vecs[k] = v
+        todo = list(dict.fromkeys(k for k in keys if k not in vecs))
+        if todo:
+            out = np.asarray(encode([k[1] for k in todo]), dtype=np.float32)
+            for k, v in zip(todo, out):
+                v = v.copy()
+                v.setflags(write=False)  # shared between callers
+                vecs[k] = v
+                cache.put(k, v)
+        return np.stack([vecs[k] for k in keys])
+
+    return run
+
+
+class CachedDenseSearch:
+    """
+    search(text, top_k) through the hit cache in front of a dense searcher
+    (BatchedQuerySearch or anything with .search(text, top_k)).
+      namespace  which index (its directory) - several share one cache
+      stamp()    version of the index that answers (e.g. its file stat);
+                 part of every key, so a new index misses
+    Callers get their own list; hits themselves are shared.
+    """
+
+    def __init__(self, inner: Any, namespace: str, model: str, stamp: Callable[[], Hashable],
+                 cache: Optional[LRUCache] = None):
+        self.inner = inner
+        self.namespace = namespace
+        self.model = model
+        self.stamp = stamp
+        self.cache = shared_hit_cache() if cache is None else cache
+
+    def search(self, text: str, top_k: int = 5, timeout: Optional[float] = None) -> List[Any]:
+        key = (self.namespace, self.model, text, int(top_k), self.stamp())
+        hits = self.cache.get(key)
+        if hits is None:
+            hits = tuple(self.inner.search(text, top_k, timeout))
+            self.cache.put(key, hits)
+        return list(hits)
+
+    def close(self) -> None:
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,236 @@
+# src/tobyworld/retrieval/embed_cache.py
+"""
+Persistent chunk-embedding cache for the indexer scripts.
+
+One namespace directory per (model name, normalize flag, dtype) under the
+cache root (default data/embed_cache):
+  vectors.f32 | vectors.f16   append-only (rows, dim) matrix, read via np.memmap
+  keys.bin                    offset table: the sha256 of row i's chunk text
+                              at bytes [32*i, 32*i + 32)
+  meta.json                   model, normalize, dtype, dim
+Rows are appended vectors-first (both files fsynced), so a run killed
+mid-write leaves at worst a tail of vectors without keys or a partial key;
+open truncates both files back to the last complete row, so later appends
+stay aligned. Identical chunk
+text across scrolls, renamed files and unchanged chunks of a rebuilt index
+are encoded once.
+
+CachedEncoder wraps a model's encode(texts): it looks texts up in the cache,
+encodes only the misses (each distinct text once) in batches sized by padded
+token count, longest first, and keeps hit-rate / chunks-per-second counters
+for the indexers to print.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+import hashlib
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+DTYPES = ("float32", "float16")
+DEFAULT_BATCH_TOKENS = 8192
+_KEY = 32  # sha256 digest bytes
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).digest()
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per word-piece) for batching; no tokenizer call."""
+    return max(1, len(text) // 4)
+
+
+class EmbeddingCache:
+    """Vectors of one (model, normalize, dtype) namespace; see the module docstring for the layout."""
+
+    def __init__(self, root: Path, model: str, normalize: bool = True, dtype: str = "float32"):
+        if dtype not in DTYPES:
+            raise ValueError(f"unknown cache dtype {dtype!r} (expected one of {DTYPES})")
+        self.model, self.normalize, self.dtype = model, bool(normalize), np.dtype(dtype)
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model).strip("_")[-48:] or "model"
+        tag = hashlib.sha256(f"{model}\0{int(self.normalize)}".encode("utf-8")).hexdigest()[:8]
+        ext = "f16" if dtype == "float16" else "f32"
+        self.dir = Path(root) / f"{slug}-{'n' if self.normalize else 'r'}-{ext}-{tag}"
+        self._vec_p = self.dir / f"vectors.{ext}"
+        self._key_p = self.dir / "keys.bin"
+        self.dim: Optional[int] = None
+        self._rows: Dict[bytes, int] = {}
+        self._n = 0
+        self._mm: Optional[np.ndarray] = None
+        self._open()
+
+    def _open(self) -> None:
+        try:
+            meta = json.loads((self.dir / "meta.json").read_text(encoding="utf-8"))
+            keys = self._key_p.read_bytes()
+            nbytes = self._vec_p.stat().st_size
+        except (OSError, ValueError):
+            return
+        self.dim = int(meta["dim"])
+        row = self.dim * self.dtype.itemsize
+        n = min(len(keys) // _KEY, nbytes // row)
+        if nbytes != n * row:  # drop the tail of an interrupted put()
+            os.truncate(self._vec_p, n * row)
+        if len(keys) != n * _KEY:
+            os.truncate(self._key_p, n * _KEY)
+        self._rows = {keys[i * _KEY:(i + 1) * _KEY]: i for i in range(n)}
+        self._n = n
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._rows
+
+    def _matrix(self) -> np.ndarray:
+        if self._mm is None or self._mm.shape[0] < self._n:
+            self._mm = np.memmap(self._vec_p, dtype=self.dtype, mode="r", shape=(self._n, self.dim))
+        return self._mm
+
+    def get(self, keys: Sequence[bytes]) -> np.ndarray:
+        """float32 rows of cached keys (KeyError for a miss); only those rows are read."""
+        rows = np.fromiter((self._rows[k] for k in keys), dtype=np.int64, count=len(keys))
+        if not len(rows):
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.asarray(self._matrix()[rows], dtype=np.float32)
+
+    def put(self, keys: Sequence[bytes], vecs: np.ndarray) -> None:
+        """Append vectors for new keys (keys already cached are skipped)."""
+        vecs = np.asarray(vecs, dtype=np.float32)
+        if self.dim is None:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self.dim = int(vecs.shape[1])
+            meta = {"model": self.model, "normalize": self.normalize, "dtype": self.dtype.name, "dim": self.dim}
+            (self.dir / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+            for p in (self._vec_p, self._key_p):  # drop leftovers of an unfinished first write
+                p.unlink(missing_ok=True)
+        elif vecs.shape[1] != self.dim:
+            raise ValueError(f"{self.model}: cached dim {self.dim}, got {vecs.shape[1]}")
+        new, seen = [], set()
+        for i, k in enumerate(keys):
+            if k not in self._rows and k not in seen:
+                seen.add(k)
+                new.append(i)
+        if not new:
+            return
+        with open(self._vec_p, "ab") as f:
+            f.write(np.ascontiguousarray(vecs[new], dtype=self.dtype).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._key_p, "ab") as f:
+            f.write(b"".join(keys[i] for i in new))
+            f.flush()
+            os.fsync(f.fileno())
+        for i in new:
+            self._rows[keys[i]] = self._n
+            self._n += 1
+
+    def nbytes(self) -> int:
+        return self._n * (self.dim or 0) * self.dtype.itemsize
+
+
+def length_batches(lengths: Sequence[int], batch_tokens: int = DEFAULT_BATCH_TOKENS,
+                   max_batch: int = 256) -> List[List[int]]:
+    """
+    Positions grouped longest first so every batch pads to at most
+    batch_tokens (batch size x its longest text); similar lengths share a
+    batch, so little compute goes to padding.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    out: List[List[int]] = []
+    cur: List[int] = []
+    for i in order:
+        longest = lengths[cur[0]] if cur else lengths[i]
+        if cur and ((len(cur) + 1) * longest > batch_tokens or len(cur) >= max_batch):
+            out.append(cur)
+            cur = []
+        cur.append(i)
+    if cur:
+        out.append(cur)
+    return out
+
+
+class CachedEncoder:
+    """
+    encode(texts) → float32 matrix, through an optional EmbeddingCache:
+      CachedEncoder(lambda ts: model.encode(ts, batch_size=len(ts), ...), cache)
+    Texts are keyed and encoded exactly as given (no normalization), so a
+    cached build yields the same vectors as an uncached one.
+    Counters accumulate over calls: texts, unique, hits (distinct texts
+    found in the cache), encoded, seconds, encode_s.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], cache: Optional[EmbeddingCache] = None,
+                 batch_tokens: int = DEFAULT_BATCH_TOKENS, token_len: Callable[[str], int] = approx_tokens):
+        self.encode = encode
+        self.cache = cache
+        self.batch_tokens = max(1, int(batch_tokens))
+        self.token_len = token_len
+        self.stats = {"texts": 0, "unique": 0, "hits": 0, "encoded": 0, "seconds": 0.0, "encode_s": 0.0}
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        t0 = time.perf_counter()
+        keys = [text_key(t) for t in texts]
+        first: Dict[bytes, int] = {}
+        for i, k in enumerate(keys):
+            first.setdefault(k, i)
+        cache = self.cache
+        misses = [k for k in first if cache is None or k not in cache]
+        local: Dict[bytes, np.ndarray] = {}
+        t_enc = time.perf_counter()
+        for batch in length_batches([self.token_len(texts[first[k]]) for k in misses], self.batch_tokens):
+            bkeys = [misses[j] for j in batch]
+            vecs = np.asarray(self.encode([texts[first[k]] for k in bkeys]), dtype=np.float32)
+            if cache is not None:
+                cache.put(bkeys, vecs)
+            else:
+                local.update(zip(bkeys, vecs))
+        enc_s = time.perf_counter() - t_enc
+        if cache is not None:
+            out = cache.get(keys)
+        elif keys:
+            out = np.stack([local[k] for k in keys])
+        else:
+            out = np.zeros((0, 0), dtype=np.float32)
+        s = self.stats
+        s["texts"] += len(texts)
+        s["unique"] += len(first)
+        s["hits"] += len(first) - len(misses)
+        s["encoded"] += len(misses)
+        s["encode_s"] += enc_s
+        s["seconds"] += time.perf_counter() - t0
+        return out
+
+    def report(self) -> str:
+        s = self.stats
+        if not s["texts"]:
+            return "embedding cache: nothing to encode"
+        rate = s["texts"] / s["seconds"] if s["seconds"] > 0 else float("inf")
+        return (f"embedding cache: {s['hits']}/{s['unique']} distinct texts cached "
+                f"({100.0 * s['hits'] / max(1, s['unique']):.1f}% hit rate), {s['encoded']} encoded "
+                f"in {s['encode_s']:.1f}s; {s['texts']} chunks at {rate:.0f} chunks/s")
+
+
+# ---- indexer CLI (scripts/index_scrolls.py, build_index.py, build_faiss_index.py) ----
+def add_cache_args(ap) -> None:
+    """--embed-cache / --embed-cache-dtype / --batch-tokens on an argparse parser."""
+    ap.add_argument("--embed-cache", default=os.environ.get("TW_EMBED_CACHE", "data/embed_cache"),
+                    help="embedding cache dir keyed by model + normalize + chunk sha256 ('0' disables)")
+    ap.add_argument("--embed-cache-dtype", choices=DTYPES, default=os.environ.get("TW_EMBED_CACHE_DTYPE", "float32"),
+                    help="cached vector precision (float16 halves the cache; vectors come back as float32)")
+    ap.add_argument("--batch-tokens", type=int, default=DEFAULT_BATCH_TOKENS,
+                    help="padded tokens per encode batch (texts are grouped by length)")
+
+
+def cached_encoder(args, encode: Callable[[List[str]], np.ndarray], model: str, normalize: bool) -> CachedEncoder:
+    """CachedEncoder from add_cache_args() options."""
+    root = str(args.embed_cache or "").strip()
+    cache = None
+    if root and root.lower() not in {"0", "off", "false", "no", "none"}:
+        cache = EmbeddingCache(Path(root), model, normalize, args.embed_cache_dtype)
+    return CachedEncoder(encode, cache, batch_tokens=args.batch_tokens)
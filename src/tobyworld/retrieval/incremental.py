@@ -0,0 +1,204 @@
+# src/tobyworld/retrieval/incremental.py
+"""
+Incremental writer for the chunk index read by Retriever
+(embeddings.npy + vectors.faiss + meta.json).
+
+meta.json "items" doubles as the chunk manifest:
+  items[row] = {"path", "chunk", "sha"}   sha = content hash of the chunk text
+  items[row] = null                       tombstone (chunk changed or removed)
+Row r of embeddings.npy (and of the compact codes) is the chunk with FAISS
+vector id r, so a hit maps straight back to its item. An update re-embeds
+only chunks whose (path, chunk, sha) is new, tombstones the rows of changed
+and deleted ones (zeroed, removed from the FAISS index by id), and appends
+the new rows with fresh ids. HNSW graphs can't remove nodes: their removed
+vectors stay in the graph for routing and Retriever filters the tombstoned
+ids per query (IDSelector). Once tombstones outnumber live rows the layout
+is compacted (rows renumbered, index rebuilt from the stored vectors; still
+no re-embedding). A different model / normalize setting embeds everything
+again; a different index type, storage or build parameter only rebuilds the
+index.
+
+Files are replaced by rename, meta.json last, so a serving Retriever keeps
+reading its mmapped generation until Retriever.maybe_reload() picks up the
+new one.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from .ann import ann_type, build_faiss_index, has_ids
+from .quant import save_compact, save_npy
+
+try:
+    import faiss  # type: ignore
+    _HAS_FAISS = True
+except Exception:
+    faiss = None
+    _HAS_FAISS = False
+
+MANIFEST_VERSION = 1
+_BUILD_KEYS = ("nlist", "pq_m", "hnsw_m")  # changing one of these needs a fresh index
+
+
+def chunk_sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()[:32]
+
+
+def _load_previous(out_dir: Path, model: str, normalize: bool) -> Tuple[Dict[str, Any], Optional[np.ndarray]]:
+    """(meta, float32 embeddings) of a reusable earlier index; ({}, None) when it must be embedded afresh."""
+    try:
+        meta = json.loads((out_dir / "meta.json").read_text(encoding="utf-8"))
+        embs = np.load(out_dir / "embeddings.npy")
+    except (OSError, ValueError):
+        return {}, None
+    items = meta.get("items") or []
+    if (meta.get("manifest_version") != MANIFEST_VERSION or meta.get("model") != model
+            or bool(meta.get("normalize", True)) != bool(normalize) or len(items) != len(embs)):
+        return {}, None
+    return meta, np.asarray(embs, dtype=np.float32)
+
+
+def _reusable_index(path: Path, prev: Dict[str, Any], ann: Dict[str, Any], storage: str):
+    """The previous FAISS index if it can be patched by id for this build, else None."""
+    built = prev.get("ann") or {}
+    if prev.get("storage", "float32") != storage or built.get("type") != ann.get("index_type", "flat"):
+        return None
+    if any(ann.get(k) and k in built and ann[k] != built[k] for k in _BUILD_KEYS):
+        return None
+    try:
+        index = faiss.read_index(str(path))
+    except (RuntimeError, OSError):
+        return None
+    return index if has_ids(index) else None
+
+
+def update_index(
+    out_dir: Path,
+    chunks: Iterable[Dict[str, Any]],
+    encode: Callable[[List[str]], np.ndarray],
+    model: str,
+    normalize: bool = True,
+    storage: str = "float32",
+    ann: Optional[Dict[str, Any]] = None,
+    incremental: bool = True,
+    index_file: str = "vectors.faiss",
+) -> Dict[str, Any]:
+    """
+    Write the index for chunks ({"path", "chunk", "text"} dicts) into out_dir,
+    re-embedding only new / changed chunks when incremental and the previous
+    index was built with the same model. encode(texts) returns one vector
+    per text. ann = build_faiss_index() keyword arguments (ann_kwargs()).
+    index_file names the FAISS file (build_faiss_index.py: lore.index).
+    Returns counts: chunks, embedded, reused, removed, tombstones,
+    compacted, index ("updated" | "rebuilt" | "none"), seconds.
+    """
+    t0 = time.perf_counter()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ann = dict(ann or {})
+    index_p = out_dir / index_file
+    prev, embs = _load_previous(out_dir, model, normalize) if incremental else ({}, None)
+    items: List[Optional[Dict[str, Any]]] = list(prev.get("items") or []) if embs is not None else []
+
+    live: Dict[Tuple[str, int], Tuple[int, str]] = {}
+    for row, it in enumerate(items):
+        if it is not None:
+            live[(it["path"], int(it["chunk"]))] = (row, it.get("sha", ""))
+    wanted, fresh = set(), []
+    for c in chunks:
+        key, sha = (str(c["path"]), int(c["chunk"])), chunk_sha(c["text"])
+        wanted.add(key)
+        old = live.get(key)
+        if old is None or old[1] != sha:
+            fresh.append((key, sha, c["text"]))
+    fresh_keys = {f[0] for f in fresh}
+    gone = sorted(row for key, (row, _) in live.items() if key not in wanted or key in fresh_keys)
+
+    vecs = np.zeros((0, embs.shape[1] if embs is not None else 0), dtype=np.float32)
+    if fresh:
+        vecs = np.asarray(encode([f[2] for f in fresh]), dtype=np.float32)
+        if normalize:
+            # cosine via inner product on L2-normalized vectors
+            vecs = vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12)
+    if embs is None:
+        embs = vecs
+    elif len(vecs):
+        if vecs.shape[1] != embs.shape[1]:
+            raise ValueError(f"embedding dim changed ({embs.shape[1]} -> {vecs.shape[1]}) under the same model name")
+        embs = np.concatenate([embs, vecs])
+
+    for row in gone:
+        items[row] = None
+    if gone:
+        embs[gone] = 0.0
+    new_ids = np.arange(len(items), len(items) + len(fresh), dtype=np.int64)
+    items.extend({"path": key[0], "chunk": key[1], "sha": sha} for key, sha, _ in fresh)
+
+    n_live = len(items) - sum(it is None for it in items)
+    tombstones = len(items) - n_live
+    compacted = tombstones > n_live
+    if compacted:  # renumber the live rows
+        keep = [r for r, it in enumerate(items) if it is not None]
+        items = [items[r] for r in keep]
+        embs = embs[keep]
+        tombstones = 0
+    changed = bool(fresh or gone or compacted) or not prev
+
+    if changed or prev.get("storage", "float32") != storage:
+        fmt = save_compact(out_dir, embs, storage)
+    else:
+        fmt = {k: prev[k] for k in ("format_version", "storage", "codes", "scales") if k in prev}
+    status = "none"
+    if _HAS_FAISS:
+        index = None if compacted or not prev else _reusable_index(index_p, prev, ann, storage)
+        if index is not None:
+            if gone and ann_type(index) != "hnsw":  # HNSW: soft delete, filtered at query time
+                index.remove_ids(np.asarray(gone, dtype=np.int64))
+            if fresh:
+                index.add_with_ids(np.ascontiguousarray(vecs), new_ids)
+            fmt["ann"] = dict(prev.get("ann") or {})
+            fmt["ann"].update({k: int(ann[k]) for k in ("nprobe", "ef_search") if ann.get(k)})
+            status = "updated" if changed else "none"
+        elif n_live:
+            rows = np.asarray([r for r, it in enumerate(items) if it is not None], dtype=np.int64)
+            index, fmt["ann"] = build_faiss_index(embs[rows], storage=storage, ids=rows, **ann)
+            status = "rebuilt"
+        else:  # every chunk removed: NumPy search over the empty matrix
+            index_p.unlink(missing_ok=True)
+        if status != "none":
+            tmp = index_p.with_name(index_p.name + ".tmp")
+            faiss.write_index(index, str(tmp))
+            os.replace(tmp, index_p)
+    if changed:
+        save_npy(out_dir / "embeddings.npy", embs)
+
+    meta = {
+        "items": items,
+        "model": model,
+        "normalize": normalize,
+        "manifest_version": MANIFEST_VERSION,
+        "tombstones": tombstones,
+        **fmt,
+    }
+    if changed or status != "none" or meta != {k: v for k, v in prev.items() if k != "generation"}:
+        # meta.json last: its new stamp is what Retriever.maybe_reload() watches
+        meta["generation"] = int(prev.get("generation", 0)) + 1
+        tmp = out_dir / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta, indent=1), encoding="utf-8")
+        os.replace(tmp, out_dir / "meta.json")
+    return {
+        "chunks": n_live,
+        "embedded": len(fresh),
+        "reused": n_live - len(fresh),
+        "removed": len(gone),
+        "tombstones": tombstones,
+        "compacted": compacted,
+        "index": status,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
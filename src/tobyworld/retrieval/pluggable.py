@@ -1,8 +1,12 @@
 # src/tobyworld/retrieval/pluggable.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
-import re
+from typing import Any, Dict, List
+import json
+import threading
+
+from tobyworld.agentic_rag.lexical_index import LexicalIndex, tokenize
+from .snippet_store import SnippetStore, snippet_record
 
 # ----- Base protocol -----
 class BaseRetriever:
@@ -13,111 +17,157 @@ class BaseRetriever:
 class LocalRetriever(BaseRetriever):
     def __init__(self, root: Path):
         self.base = root
-        self._cache: Dict[Path, str] = {}
         self._index: List[Path] = []
         self._build_index()
 
     def _build_index(self):
         exts = {".md", ".markdown", ".txt"}
         self._index = sorted(p for p in self.base.rglob("*") if p.is_file() and p.suffix.lower() in exts)
-
-    def _read(self, p: Path) -> str:
-        s = self._cache.get(p)
-        if s is None:
-            try:
-                s = p.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                s = ""
-            self._cache[p] = s
-        return s
-
-    @staticmethod
-    def _tok(s: str): return re.findall(r"[A-Za-z0-9_#@]+", s.lower())
-    def _score(self, text: str, qtok: List[str]) -> float:
-        t = self._tok(text)
-        if not t: return 0.0
-        tf = sum(t.count(x) for x in set(qtok))
-        phrase = " ".join(qtok)
-        return float(tf) + (2.0 if phrase and phrase in text.lower() else 0.0)
+        rows, recs = [], []
+        for p in self._index:
+            tx = self._read(p)
+            rows.append({"id": str(p), "text": tx, "meta": {}})
+            recs.append(snippet_record(p, tx))
+        # positional inverted index: tf + phrase bonus without rescanning texts per query;
+        # body text only, like before fields existed (path tokens such as "md" never score)
+        self._lex = LexicalIndex(rows, field_weights={"filename": 0.0, "series": 0.0})
+        # tokens + positions now live in the postings and title + snippet in the store, so the
+        # full texts are dropped (this index is built once, never update()d)
+        for row in rows:
+            row["text"] = ""
+        # title + snippet per doc, precomputed: search() opens no file and scans no text
+        self._snips = SnippetStore.from_records(recs)
 
     @staticmethod
-    def _first(text: str, n=200):
-        for ln in text.splitlines():
-            ln = ln.strip()
-            if ln: return (ln[:n-3]+"...") if len(ln)>n else ln
-        return text[:n]
+    def _read(p: Path) -> str:
+        try:
+            return p.read_text(encoding="utf-8", errors="ignore")
+        except Exception:
+            return ""
 
     @staticmethod
-    def _nice_title(path: Path, text: str) -> str:
-        for ln in text.splitlines():
-            if ln.strip().startswith("#"):
-                return re.sub(r"^#+\\s*", "", ln).strip()
-        return path.stem.replace("_"," ").replace("-"," ").strip() or path.name
+    def _tok(s: str): return tokenize(s)
 
     def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        qtok = self._tok(query)
-        scored: List[Tuple[float, Path]] = []
-        for p in self._index:
-            tx = self._read(p)
-            sc = self._score(tx, qtok)
-            if sc > 0: scored.append((sc, p))
-        scored.sort(key=lambda x: (-x[0], str(x[1])))
+        scored = self._lex.search(query, k=top_k)
         hits = []
-        for sc, p in scored[:max(1, top_k)]:
-            tx = self._read(p)
+        for doc, sc in scored:
+            path, title, snippet = self._snips.get(doc)
             hits.append({
-                "title": self._nice_title(p, tx),
-                "path": str(p),
+                "title": title,
+                "path": path,
                 "score": round(sc, 3),
-                "snippet": self._first(tx),
+                "snippet": snippet,
             })
         return hits
 
 # ----- FAISS + embeddings -----
 class FaissRetriever(BaseRetriever):
-    def __init__(self, root: Path, index_path: Path, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(self, root: Path, index_path: Path, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 max_batch: int = 32, max_wait_ms: float = 2.0):
         import faiss, numpy as np  # noqa
         from sentence_transformers import SentenceTransformer  # noqa
 
         self.root = root
         self.index_path = index_path
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
+        self._lock = threading.Lock()
+        self._state = self._load()  # (stamp, index, paths, search params, snippets, selector), swapped whole
+        # concurrent searches share one encode() and one index.search (retrieval/batching.py);
+        # repeated strings skip the encode (shared query-embedding LRU) and, until lore.index
+        # changes, the search (shared hit LRU keyed on its stamp) - retrieval/dense_cache.py
+        from .batching import BatchedQuerySearch
+        from .dense_cache import CachedDenseSearch, cached_query_encoder
+        batched = BatchedQuerySearch(cached_query_encoder(self._encode, model_name), self._search_rows,
+                                     max_batch=max_batch, max_wait_ms=max_wait_ms, name="faiss-batcher")
+        self._dense = CachedDenseSearch(batched, str(index_path), model_name, self._current_stamp)
 
-        # load index + metadata
-        self.index = faiss.read_index(str(index_path / "lore.index"))
-        self.paths = (index_path / "paths.txt").read_text(encoding="utf-8").splitlines()
+    def _stamp(self):
+        """lore.index + paths.txt (inode, mtime_ns, size); paths.txt is rewritten after the index."""
+        try:
+            sts = [(self.index_path / f).stat() for f in ("lore.index", "paths.txt")]
+        except OSError:
+            return None
+        return tuple((st.st_ino, st.st_mtime_ns, st.st_size) for st in sts)
 
-    @staticmethod
-    def _first(text: str, n=200):
-        for ln in text.splitlines():
-            ln = ln.strip()
-            if ln: return (ln[:n-3]+"...") if len(ln)>n else ln
-        return text[:n]
+    def _load(self):
+        import faiss
+        import numpy as np
+        # ANN index (build_faiss_index.py --index-type): nprobe / efSearch recorded at build time
+        from .ann import ann_type, search_params
+        stamp = self._stamp()
+        index = faiss.read_index(str(self.index_path / "lore.index"))
+        # one line per vector id; split("\n") keeps trailing blank (removed) lines that splitlines() drops
+        paths = (self.index_path / "paths.txt").read_text(encoding="utf-8").split("\n")
+        try:
+            ann = json.loads((self.index_path / "meta.json").read_text(encoding="utf-8")).get("ann") or {}
+        except (OSError, ValueError):
+            ann = {}
+        # titles + snippets per vector id (build_faiss_index.py); older indexes fall back to reading the file
+        snips = None
+        try:
+            snips = SnippetStore.open(self.index_path / "snippets.bin")
+        except (OSError, ValueError):
+            pass
+        if snips is not None and len(snips) != len(paths):
+            snips = None  # from another build
+        # removed docs (blank lines) stay in an --incremental HNSW graph: exclude them in the search,
+        # like Retriever, so a query still gets top_k live hits
+        kind, sel = ann_type(index), None
+        dead = [i for i, p in enumerate(paths) if not p]
+        if kind == "hnsw" and dead:
+            batch = faiss.IDSelectorBatch(np.asarray(dead, dtype=np.int64))
+            sel = (faiss.IDSelectorNot(batch), batch)  # the batch it wraps: kept alive
+        params = search_params(kind, ann.get("nprobe"), ann.get("ef_search"), sel[0] if sel else None)
+        return stamp, index, paths, params, snips, sel
 
-    @staticmethod
-    def _nice_title(path: Path, text: str) -> str:
-        for ln in text.splitlines():
-            if ln.strip().startswith("#"):
-                return re.sub(r"^#+\\s*", "", ln).strip()
-        return path.stem.replace("_"," ").replace("-"," ").strip() or path.name
+    def _current_stamp(self):
+        """Stamp of the index searched from now on, reloading it first if its files changed on disk."""
+        stamp = self._stamp()
+        if stamp is not None and stamp != self._state[0]:
+            with self._lock:
+                if stamp != self._state[0]:
+                    try:
+                        self._state = self._load()
+                    except Exception:
+                        pass  # mid-rewrite: keep serving the loaded index, retry next query
+        return self._state[0]
+
+    def _encode(self, texts: List[str]):
+        return self.model.encode(texts, batch_size=len(texts), normalize_embeddings=True).astype("float32")
+
+    def _search_rows(self, Q, k: int) -> List[List[tuple]]:
+        """
+        (score, path, title, snippet) per query row, all from the index
+        generation that scored it; title / snippet are None without a
+        snippet store.
+        """
+        _, index, paths, params, snips, _sel = self._state
+        if params is not None:
+            D, I = index.search(Q, k, params=params)
+        else:
+            D, I = index.search(Q, k)
+        out = []
+        for d, i in zip(D.tolist(), I.tolist()):
+            row = []
+            for s, j in zip(d, i):
+                if j < 0 or j >= len(paths) or not paths[j]:
+                    continue  # blank path = removed (--incremental)
+                row.append((s,) + (snips.get(j) if snips is not None else (paths[j], None, None)))
+            out.append(row)
+        return out
 
     def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        import faiss, numpy as np
-        qv = self.model.encode([query], normalize_embeddings=True)
-        D, I = self.index.search(qv.astype("float32"), top_k)
         hits: List[Dict[str, Any]] = []
-        for d, i in zip(D[0], I[0]):
-            if i < 0: continue
-            p = Path(self.paths[i])
-            try:
-                tx = p.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                tx = ""
+        for d, path, title, snippet in self._dense.search(query, top_k):
+            if title is None:  # index built before snippets.bin existed
+                path, title, snippet = snippet_record(path, LocalRetriever._read(Path(path)))
             hits.append({
-                "title": self._nice_title(p, tx),
-                "path": str(p),
+                "title": title,
+                "path": path,
                 "score": float(d),
-                "snippet": self._first(tx),
+                "snippet": snippet,
             })
         return hits
 
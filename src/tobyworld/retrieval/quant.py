@@ -0,0 +1,90 @@
+# src/tobyworld/retrieval/quant.py
+"""
+Compact embedding storage for the chunk index (see Retriever / index_scrolls.py).
+
+Index format (meta.json "format_version"):
+  1 (or missing)  embeddings.npy float32 only
+  2               + "storage": "float32" | "float16" | "int8"
+                  + "codes": compact matrix file (float16 / int8)
+                  + "scales": per-vector float32 scales (int8 only)
+The float32 matrix is always kept: search runs over the compact codes and
+only the top candidates are rescored exactly from the (mmapped) float32 rows.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 2
+STORAGES = ("float32", "float16", "int8")
+BLOCK_ROWS = 1024  # rows upcast per block in block_scores (buffer stays cache-resident)
+
+
+def quantize(embs: np.ndarray, storage: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    (codes, scales) for storage:
+      float32 → (None, None)
+      float16 → (embs as float16, None)
+      int8    → symmetric per-vector scalar quantization, x ≈ codes * scale
+    """
+    if storage not in STORAGES:
+        raise ValueError(f"unknown storage {storage!r} (expected one of {STORAGES})")
+    embs = np.asarray(embs, dtype=np.float32)
+    if storage == "float32":
+        return None, None
+    if storage == "float16":
+        return embs.astype(np.float16), None
+    amax = np.abs(embs).max(axis=1)
+    scales = np.where(amax > 0, amax / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(embs / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def save_npy(path: Path, arr: np.ndarray) -> None:
+    """np.save through a temp file + rename: a Retriever mmapping the old file keeps reading it intact."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def save_compact(out_dir: Path, embs: np.ndarray, storage: str) -> Dict[str, Any]:
+    """Write the compact files next to embeddings.npy; returns the meta.json fields."""
+    codes, scales = quantize(embs, storage)
+    meta: Dict[str, Any] = {"format_version": FORMAT_VERSION, "storage": storage}
+    if codes is not None:
+        meta["codes"] = f"embeddings.{'f16' if storage == 'float16' else 'i8'}.npy"
+        save_npy(Path(out_dir) / meta["codes"], codes)
+    if scales is not None:
+        meta["scales"] = "embeddings.scale.npy"
+        save_npy(Path(out_dir) / meta["scales"], scales)
+    return meta
+
+
+def block_scores(codes: np.ndarray, scales: Optional[np.ndarray], q: np.ndarray,
+                 block: int = BLOCK_ROWS) -> np.ndarray:
+    """Approximate inner products codes·q in float32, upcasting `block` rows at a time."""
+    q = np.asarray(q, dtype=np.float32).ravel()
+    n = codes.shape[0]
+    out = np.empty(n, dtype=np.float32)
+    buf = np.empty((min(block, n), codes.shape[1]), dtype=np.float32)
+    for i in range(0, n, block):
+        b = buf[:min(block, n - i)]
+        b[...] = codes[i:i + block]
+        np.dot(b, q, out=out[i:i + b.shape[0]])
+    if scales is not None:
+        out *= scales
+    return out
+
+
+def top_candidates(sims: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n largest sims (unordered)."""
+    n = min(int(n), sims.shape[0])
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    if n == sims.shape[0]:
+        return np.arange(n)
+    return np.argpartition(-sims, n - 1)[:n]
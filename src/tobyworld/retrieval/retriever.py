@@ -4,8 +4,12 @@ from pathlib import Path
 from typing import List, Optional, Tuple, Dict, Any
 
 import json
+import threading
 import numpy as np
 
+from .ann import APPROX_SCORES, ann_type, search_params
+from .quant import block_scores, top_candidates
+
 try:
     import faiss  # type: ignore
     _HAS_FAISS = True
@@ -19,47 +23,169 @@ class Hit:
     score: float
 
 class Retriever:
-    def __init__(self, index_dir: Path):
+    """
+    Chunk-embedding search over an index dir written by scripts/index_scrolls.py.
+    With a compact index (meta.json format_version >= 2, storage float16/int8,
+    see retrieval/quant.py) the scan runs over the compact codes and the top
+    `top_k * rescore_factor` candidates are rescored exactly in float32.
+    vectors.faiss may be an ANN index (retrieval/ann.py): `ann` is detected
+    from the loaded index, nprobe (IVF) / ef_search (HNSW) default to the
+    values in meta.json "ann" unless given here, and search_embedding()
+    can override them per query. IVF-PQ scores are rescored like compact
+    storage.
+    An incrementally updated index (retrieval/incremental.py) has null
+    items for removed chunks; those rows never surface (HNSW keeps them
+    in the graph: an IDSelector excludes them per query). maybe_reload()
+    swaps in a newer index once its meta.json changed on disk; queries in
+    flight finish on the previous generation; `stamp` identifies the one
+    loaded (retrieval/dense_cache.py keys cached hits on it).
+    """
+
+    _STATE = ("ready", "storage", "ann", "nprobe", "ef_search", "_embs", "_codes", "_scales",
+              "_meta", "_faiss", "_dead", "_sel", "_stamp")
+
+    def __init__(self, index_dir: Path, rescore_factor: int = 4,
+                 nprobe: Optional[int] = None, ef_search: Optional[int] = None):
         self.index_dir = Path(index_dir)
+        self.rescore_factor = max(1, int(rescore_factor))
+        self._opts = (nprobe, ef_search)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = (self.index_dir / "meta.json").stat()
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @property
+    def stamp(self) -> Optional[Tuple[int, int, int]]:
+        """(inode, mtime_ns, size) of the loaded meta.json; changes with every index swapped in."""
+        return self._stamp
+
+    def maybe_reload(self) -> bool:
+        """Load the index again if meta.json changed since the last load; True when a new index was swapped in."""
+        stamp = self._stat()
+        if stamp == self._stamp:
+            return False
+        fresh = Retriever(self.index_dir, self.rescore_factor, *self._opts)
+        if fresh._stamp != stamp or (not fresh.ready and fresh._meta is not None):
+            return False  # rewritten mid-load: the next call picks up the finished index
+        with self._lock:
+            for k in self._STATE:
+                setattr(self, k, getattr(fresh, k))
+        return True
+
+    def _load(self):
         self.ready = False
+        self.storage = "float32"
+        self.ann = "flat"
+        self.nprobe, self.ef_search = self._opts
         self._embs: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
         self._meta: Optional[Dict[str, Any]] = None
         self._faiss = None
-        self._load()
-
-    def _load(self):
+        self._dead: Optional[np.ndarray] = None
+        self._sel: Optional[Tuple[Any, Any]] = None  # (IDSelectorNot, the batch it wraps: kept alive)
+        self._stamp = self._stat()
         meta_p = self.index_dir / "meta.json"
         embs_p = self.index_dir / "embeddings.npy"
         if not meta_p.exists() or not embs_p.exists():
             return
         with meta_p.open("r", encoding="utf-8") as f:
             self._meta = json.load(f)
-        self._embs = np.load(embs_p)
+        # memory-mapped: pages load on first touch and are shared through the
+        # OS page cache across workers (never written through)
+        self._embs = np.load(embs_p, mmap_mode="r")
+        if int(self._meta.get("format_version", 1)) >= 2:
+            self.storage = str(self._meta.get("storage", "float32"))
+            if self._meta.get("codes"):
+                self._codes = np.load(self.index_dir / self._meta["codes"], mmap_mode="r")
+            if self._meta.get("scales"):
+                self._scales = np.load(self.index_dir / self._meta["scales"], mmap_mode="r")
         if _HAS_FAISS:
             faiss_p = self.index_dir / "vectors.faiss"
             if faiss_p.exists():
                 self._faiss = faiss.read_index(str(faiss_p))
+                self.ann = ann_type(self._faiss)
+                built = self._meta.get("ann") or {}
+                self.nprobe = self.nprobe or built.get("nprobe")
+                self.ef_search = self.ef_search or built.get("ef_search")
+        items = self._meta.get("items", [])
+        if self._meta.get("tombstones"):
+            self._dead = np.asarray([i for i, it in enumerate(items) if it is None], dtype=np.int64)
+            if self.ann == "hnsw" and self._dead.size:
+                batch = faiss.IDSelectorBatch(self._dead)
+                self._sel = (faiss.IDSelectorNot(batch), batch)
+        if len(items) != self._embs.shape[0]:
+            return  # files from different generations (caught mid-update): not ready until reloaded
         self.ready = True
 
-    def search_embedding(self, q: np.ndarray, top_k: int = 5) -> List[Hit]:
-        if not self.ready or self._embs is None or self._meta is None:
+    def search_embedding(self, q: np.ndarray, top_k: int = 5,
+                         nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> List[Hit]:
+        return self.search_embeddings(np.asarray(q).reshape(1, -1), top_k, nprobe, ef_search)[0]
+
+    def search_embeddings(self, qs: np.ndarray, top_k: int = 5,
+                          nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> List[List[Hit]]:
+        """search_embedding() for a (b, dim) batch of queries: one index.search / matrix product for all rows."""
+        qs = np.ascontiguousarray(qs, dtype=np.float32)
+        qs = qs.reshape(len(qs), -1)
+        with self._lock:  # one consistent generation, even across a maybe_reload()
+            if not self.ready or self._embs is None or self._meta is None:
+                return [[] for _ in range(len(qs))]
+            embs, codes, scales, index, dead = self._embs, self._codes, self._scales, self._faiss, self._dead
+            sel = self._sel[0] if self._sel is not None else None
+            items = self._meta.get("items", [])
+            kind, storage = self.ann, self.storage
+            nprobe, ef_search = nprobe or self.nprobe, ef_search or self.ef_search
+        if not len(qs):
             return []
-        q = q.astype(np.float32)
+        compact = storage != "float32" or (index is not None and kind in APPROX_SCORES)
+        n_cand = top_k * self.rescore_factor if compact else top_k
         # assume embeddings are normalized → cosine via inner product
-        if self._faiss is not None:
-            D, I = self._faiss.search(q.reshape(1, -1), top_k)
-            idxs = I[0].tolist()
-            scores = D[0].tolist()
+        if index is not None:
+            params = search_params(kind, nprobe, ef_search, sel)
+            if params is not None:
+                D, I = index.search(qs, n_cand, params=params)
+            else:
+                D, I = index.search(qs, n_cand)
+            cands = [(I[r].tolist(), D[r].tolist()) for r in range(len(qs))]
         else:
-            sims = (self._embs @ q.reshape(-1, 1)).ravel()
-            idxs = np.argsort(-sims)[:top_k].tolist()
-            scores = sims[idxs].tolist()
+            if codes is not None:
+                sims = np.stack([block_scores(codes, scales, q) for q in qs])
+            else:
+                sims = np.ascontiguousarray((embs @ qs.T).T)
+            if dead is not None and dead.size:
+                sims[:, dead] = -np.inf  # removed chunks (zero rows until compaction)
+            cands = []
+            for row in sims:
+                if codes is not None:
+                    idxs = top_candidates(row, n_cand).tolist()
+                else:
+                    idxs = np.argsort(-row)[:top_k].tolist()
+                cands.append((idxs, row[idxs].tolist()))
 
-        items = self._meta.get("items", [])
-        out: List[Hit] = []
-        for i, s in zip(idxs, scores):
-            if i < 0 or i >= len(items):
-                continue
-            it = items[i]
-            out.append(Hit(path=it["path"], chunk=it["chunk"], score=float(s)))
+        out: List[List[Hit]] = []
+        for q, (idxs, scores) in zip(qs, cands):
+            if compact:
+                idxs, scores = self._rescore(embs, idxs, q, top_k)
+            hits: List[Hit] = []
+            for i, s in zip(idxs, scores):
+                if i < 0 or i >= len(items) or items[i] is None or s == -np.inf:
+                    continue
+                it = items[i]
+                hits.append(Hit(path=it["path"], chunk=it["chunk"], score=float(s)))
+            out.append(hits)
         return out
+
+    @staticmethod
+    def _rescore(embs: np.ndarray, idxs: List[int], q: np.ndarray, top_k: int) -> Tuple[List[int], List[float]]:
+        """Exact float32 scores for the candidates; only their rows are read from the mmap."""
+        cand = np.unique(np.asarray([i for i in idxs if i >= 0], dtype=np.int64))
+        if cand.size == 0:
+            return [], []
+        exact = np.asarray(embs[cand], dtype=np.float32) @ q
+        order = np.lexsort((cand, -exact))[:top_k]
+        return cand[order].tolist(), exact[order].tolist()
@@ -0,0 +1,102 @@
+# src/tobyworld/retrieval/snippet_store.py
+"""
+Precomputed (path, title, snippet) per indexed document, so the
+pluggable retrievers serve hits without opening or scanning the scroll.
+
+File layout (snippets.bin, little-endian), one record per index row:
+  magic    b"TWSNIP01"
+  n        uint64, records
+  offsets  uint64[3n + 1], byte offsets into the blob; record i's fields
+           are blob[offsets[3i + f] : offsets[3i + f + 1]], f = path, title, snippet
+  blob     UTF-8 strings
+SnippetStore.open() memory-maps the file once (the descriptor is closed
+right away); get(i) slices the mapping, so a query does no file I/O and
+pages are shared across workers. build_faiss_index.py writes it next to
+lore.index (row = vector id, empty record for a removed doc);
+LocalRetriever keeps the same layout in a bytes buffer.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable, Tuple, Union
+import mmap
+import os
+import re
+
+import numpy as np
+
+MAGIC = b"TWSNIP01"
+_HEAD = len(MAGIC) + 8
+_HEADING = re.compile(r"^#+\s*")
+
+Record = Tuple[str, str, str]  # (path, title, snippet)
+
+
+def first_line(text: str, n: int = 200) -> str:
+    """First non-blank line, cut to n chars ("..." marks a cut)."""
+    for ln in text.splitlines():
+        ln = ln.strip()
+        if ln:
+            return (ln[:n - 3] + "...") if len(ln) > n else ln
+    return text[:n]
+
+
+def nice_title(path: Path, text: str) -> str:
+    """First markdown heading, else the file stem with _ / - as spaces."""
+    for ln in text.splitlines():
+        if ln.strip().startswith("#"):
+            return _HEADING.sub("", ln.strip()).strip()
+    return path.stem.replace("_", " ").replace("-", " ").strip() or path.name
+
+
+def snippet_record(path: Union[str, Path], text: str) -> Record:
+    return str(path), nice_title(Path(path), text), first_line(text)
+
+
+def encode_records(records: Iterable[Record]) -> bytes:
+    parts = [s.encode("utf-8", "surrogatepass") for rec in records for s in rec]
+    offsets = np.zeros(len(parts) + 1, dtype="<u8")
+    np.cumsum([len(p) for p in parts], out=offsets[1:])
+    n = len(parts) // 3
+    return MAGIC + np.uint64(n).astype("<u8").tobytes() + offsets.tobytes() + b"".join(parts)
+
+
+def write_snippet_store(path: Path, records: Iterable[Record]) -> int:
+    """Write atomically (tmp + replace); returns the file size."""
+    data = encode_records(records)
+    tmp = Path(str(path) + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+class SnippetStore:
+    """Read side over a snippets.bin mapping (open) or an in-memory buffer (from_records)."""
+
+    def __init__(self, buf: Union[bytes, mmap.mmap]):
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError("not a snippet store")
+        self._buf = buf
+        self._n = int(np.frombuffer(buf, dtype="<u8", count=1, offset=len(MAGIC))[0])
+        self._off = np.frombuffer(buf, dtype="<u8", count=3 * self._n + 1, offset=_HEAD)
+        self._base = _HEAD + 8 * (3 * self._n + 1)
+
+    @classmethod
+    def open(cls, path: Path) -> "SnippetStore":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_records(cls, records: Iterable[Record]) -> "SnippetStore":
+        return cls(encode_records(records))
+
+    def __len__(self) -> int:
+        return self._n
+
+    def get(self, i: int) -> Record:
+        o = self._off[3 * i:3 * i + 4].tolist()
+        b, buf = self._base, self._buf
+        return tuple(buf[b + o[f]:b + o[f + 1]].decode("utf-8", "surrogatepass") for f in range(3))  # type: ignore[return-value]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._buf)
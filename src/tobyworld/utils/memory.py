@@ -0,0 +1,29 @@
+# src/tobyworld/utils/memory.py — process memory probes for /debug/status
+from __future__ import annotations
+from typing import Optional
+import os
+import sys
+
+try:
+    import resource
+    _HAS_RESOURCE = True
+except Exception:  # Windows
+    resource = None
+    _HAS_RESOURCE = False
+
+
+def rss_bytes() -> Optional[int]:
+    """
+    Current resident set size of this process, or None if unknown:
+      - Linux: /proc/self/statm (current RSS)
+      - elsewhere: getrusage() peak RSS, the closest portable figure
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if _HAS_RESOURCE:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KiB elsewhere
+    return None
@@ -0,0 +1,110 @@
+# src/tobyworld/utils/parse_cache.py — persistent scroll parse cache (SQLite)
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Iterable, Sequence, Tuple
+import sqlite3
+import threading
+
+# Bump when read_scroll's output for the same bytes changes (drops every entry).
+PARSER_VERSION = "1"
+
+# (path, mtime, size, sha256 of the bytes, meta JSON, body offset, timestamp-from-mtime)
+Record = Tuple[str, float, int, str, str, int, int]
+
+
+class ParseCache:
+    """
+    path -> parsed scroll metadata, so re-reading an unchanged scroll skips
+    frontmatter/title/date parsing (see scroll_loader.read_scrolls):
+      - (mtime, size) equal to the stored stamp → hit
+      - else sha256 of the bytes equal to the stored hash → hit (touched,
+        copied or checked out again); the stamp is refreshed
+      - else a miss: the caller parses and put()s a new record
+    Counters: hits_stamp / hits_hash / misses (cumulative) and `last`, the
+    same counts for the most recent read_scrolls() call.
+    """
+
+    def __init__(self, db_path: Path | str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS info (k TEXT PRIMARY KEY, v TEXT)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrolls (
+              path TEXT PRIMARY KEY,
+              mtime REAL NOT NULL,
+              size INTEGER NOT NULL,
+              sha TEXT NOT NULL,
+              meta_json TEXT NOT NULL,
+              body_off INTEGER NOT NULL,   -- body = decoded text[body_off:]
+              ts_mtime INTEGER NOT NULL    -- meta.timestamp fell back to the file mtime
+            )
+        """)
+        row = self._conn.execute("SELECT v FROM info WHERE k = 'parser_version'").fetchone()
+        if not row or row[0] != PARSER_VERSION:
+            self._conn.execute("DELETE FROM scrolls")
+            self._conn.execute("INSERT OR REPLACE INTO info VALUES ('parser_version', ?)", (PARSER_VERSION,))
+        self._conn.commit()
+        self.hits_stamp = self.hits_hash = self.misses = 0
+        self.last: Dict[str, Any] = {}
+
+    def fetch(self, paths: Sequence[str]) -> Dict[str, Record]:
+        out: Dict[str, Record] = {}
+        with self._lock:
+            for i in range(0, len(paths), 500):  # stay under SQLITE_MAX_VARIABLE_NUMBER
+                part = list(paths[i:i + 500])
+                q = f"SELECT * FROM scrolls WHERE path IN ({','.join('?' * len(part))})"
+                for rec in self._conn.execute(q, part):
+                    out[rec[0]] = rec
+        return out
+
+    def put(self, records: Iterable[Record]) -> None:
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO scrolls VALUES (?, ?, ?, ?, ?, ?, ?)", list(records))
+            self._conn.commit()
+
+    def touch(self, stamps: Iterable[Tuple[float, int, str]]) -> None:
+        """(mtime, size, path): new stamp for content that hash-matched."""
+        with self._lock:
+            self._conn.executemany("UPDATE scrolls SET mtime = ?, size = ? WHERE path = ?", list(stamps))
+            self._conn.commit()
+
+    def prune(self, keep: Iterable[str], prefix: str = "") -> int:
+        """Drop entries under prefix whose path is not in keep (scrolls deleted from disk)."""
+        keep = set(keep)
+        with self._lock:
+            gone = [(p,) for (p,) in self._conn.execute("SELECT path FROM scrolls")
+                    if p.startswith(prefix) and p not in keep]
+            self._conn.executemany("DELETE FROM scrolls WHERE path = ?", gone)
+            self._conn.commit()
+        return len(gone)
+
+    def record(self, hits_stamp: int, hits_hash: int, misses: int) -> None:
+        self.hits_stamp += hits_stamp
+        self.hits_hash += hits_hash
+        self.misses += misses
+        self.last = _counts(hits_stamp, hits_hash, misses)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**_counts(self.hits_stamp, self.hits_hash, self.misses), "last": dict(self.last)}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scrolls").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _counts(hits_stamp: int, hits_hash: int, misses: int) -> Dict[str, Any]:
+    total = hits_stamp + hits_hash + misses
+    return {
+        "hits_stamp": hits_stamp,
+        "hits_hash": hits_hash,
+        "misses": misses,
+        "hit_ratio": round((hits_stamp + hits_hash) / total, 4) if total else None,
+    }
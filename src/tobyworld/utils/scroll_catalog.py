@@ -0,0 +1,298 @@
+# src/tobyworld/utils/scroll_catalog.py — file name / title lookups for the admin index endpoints
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from heapq import nsmallest
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+import os
+import re
+import threading
+import time
+
+from .scroll_loader import series_of
+
+try:  # the regex parser; `sre_parse` is its deprecated alias on 3.11+
+    from re import _parser as sre_parse, _constants as sre_c
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants as sre_c
+
+_REPEATS = tuple(getattr(sre_c, op) for op in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(sre_c, op))
+_GROUPS = tuple(getattr(sre_c, op) for op in ("SUBPATTERN", "ATOMIC_GROUP") if hasattr(sre_c, op))
+MAX_PATTERN_LEN = 256
+
+# Literal plan of a regex: text every match must contain.
+#   None                anything (no usable literal)
+#   "abc"               that substring (lowercased, ASCII, >= 3 chars)
+#   ("and", [plans])    all of them
+#   ("or", [plans])     at least one
+Plan = Union[None, str, Tuple[str, list]]
+
+
+def _trigrams(s: str) -> Set[str]:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def _sub_items(op, av) -> list:
+    return av[-1] if op == sre_c.SUBPATTERN else av
+
+
+def literal_plan(items) -> Plan:
+    """
+    Required literals of a parsed pattern (sre_parse.parse(...)). Runs of
+    ASCII literals are kept; anything else (classes, `.`, optional parts,
+    anchors, lookarounds, backrefs) ends a run. A repeat with min >= 1
+    requires its body; a branch needs one of its alternatives. Lowercased,
+    so the plan holds for case-insensitive matching too.
+    """
+    parts: List[Plan] = []
+    run: List[str] = []
+
+    def flush():
+        if len(run) >= 3:
+            parts.append("".join(run))
+        run.clear()
+
+    for op, av in items:
+        if op == sre_c.LITERAL and av < 128:
+            run.append(chr(av).lower())
+            continue
+        flush()
+        if op in _GROUPS:
+            parts.append(literal_plan(_sub_items(op, av)))
+        elif op in _REPEATS and av[0] >= 1:
+            parts.append(literal_plan(av[2]))
+        elif op == sre_c.BRANCH:
+            alts = [literal_plan(a) for a in av[1]]
+            parts.append(None if any(a is None for a in alts) else ("or", alts))
+    flush()
+    parts = [p for p in parts if p is not None]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ("and", parts)
+
+
+def _backtracking_risk(items, depth: int = 0) -> bool:
+    """A repeat inside a repeat, or a repeated alternation: the shapes that backtrack exponentially."""
+    for op, av in items:
+        if op in _REPEATS:
+            if av[1] > 1 and depth:
+                return True
+            if _backtracking_risk(av[2], depth + (av[1] > 1)):
+                return True
+        elif op in _GROUPS:
+            if _backtracking_risk(_sub_items(op, av), depth):
+                return True
+        elif op == sre_c.BRANCH:
+            if depth or any(_backtracking_risk(a, depth) for a in av[1]):
+                return True
+        elif op in (sre_c.ASSERT, sre_c.ASSERT_NOT):
+            if _backtracking_risk(av[1], depth):
+                return True
+    return False
+
+
+class ScrollCatalog:
+    """
+    File name + title of every scroll, for /admin/index/list and
+    /admin/index/search:
+      - trigram postings over lowercased "name\\ntitle": search() only runs
+        the regex on scrolls holding every trigram of the pattern's required
+        literals (literal_plan), within a time budget
+      - series counts (TOBY_QL, ...) and file names in sorted order, so
+        listings and counts are a bisect instead of a corpus scan
+    update() applies a ScrollIndex delta. Doc numbers are append-only, so
+    postings stay sorted; removed scrolls are tombstones until they
+    outnumber the live ones.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]] = ()):
+        self._lock = threading.Lock()
+        self._reset()
+        self._add(rows)
+
+    def _reset(self) -> None:
+        self._ids: List[Optional[str]] = []    # doc -> scroll id (None = removed)
+        self._names: List[str] = []
+        self._titles: List[str] = []
+        self._doc: Dict[str, int] = {}         # scroll id -> live doc
+        self._grams: Dict[str, array] = defaultdict(lambda: array("I"))  # trigram -> ascending docs
+        self._by_name: List[Tuple[str, str]] = []  # sorted (file name, id)
+        self._by_id: List[str] = []            # sorted ids
+        self._series: Counter = Counter()
+        self.tombstones = 0
+
+    def _add(self, rows: Iterable[Dict[str, Any]]) -> None:
+        by_name, by_id, grams = [], [], self._grams
+        for r in rows:
+            rid = str(r.get("id") or "")
+            name = os.path.basename(rid)
+            title = str((r.get("meta") or {}).get("title", ""))
+            doc = len(self._ids)
+            self._ids.append(rid)
+            self._names.append(name)
+            self._titles.append(title)
+            self._doc[rid] = doc
+            for g in _trigrams(f"{name}\n{title}".lower()):
+                grams[g].append(doc)
+            by_name.append((name, rid))
+            by_id.append(rid)
+            self._series[series_of(name)] += 1
+        # timsort merges the new run into the sorted lists in ~O(n + k log k)
+        self._by_name.extend(by_name)
+        self._by_name.sort()
+        self._by_id.extend(by_id)
+        self._by_id.sort()
+
+    def _drop(self, rid: str) -> None:
+        doc = self._doc.pop(rid, None)
+        if doc is None:
+            return
+        name = self._names[doc]
+        self._ids[doc] = None
+        del self._by_name[bisect_left(self._by_name, (name, rid))]
+        del self._by_id[bisect_left(self._by_id, rid)]
+        s = series_of(name)
+        self._series[s] -= 1
+        if not self._series[s]:
+            del self._series[s]
+        self.tombstones += 1
+
+    def update(self, rows: Iterable[Dict[str, Any]] = (), removed: Iterable[str] = ()) -> None:
+        """Upsert rows / delete scroll ids."""
+        rows = list(rows or [])
+        with self._lock:
+            for rid in list(removed or ()) + [str(r.get("id") or "") for r in rows]:
+                self._drop(rid)
+            self._add(rows)
+            if self.tombstones > len(self._doc):  # compact: renumber the live scrolls
+                live = [{"id": self._ids[d], "meta": {"title": self._titles[d]}} for d in sorted(self._doc.values())]
+                self._reset()
+                self._add(live)
+
+    def __len__(self) -> int:
+        return len(self._doc)
+
+    # ---- listings -----------------------------------------------------------
+    def series_counts(self) -> Dict[str, int]:
+        """Scrolls per series (TOBY_QL, ...; "" = no TOBY_* prefix)."""
+        with self._lock:
+            return dict(self._series)
+
+    def _name_range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self._by_name, (prefix,))
+        return lo, bisect_left(self._by_name, (prefix + "\U0010ffff",), lo)
+
+    def count_prefix(self, prefix: str) -> int:
+        """Scrolls whose file name starts with prefix."""
+        with self._lock:
+            lo, hi = self._name_range(prefix)
+            return hi - lo
+
+    def titles(self, prefix: str = "", limit: int = 15) -> List[str]:
+        """Titles of the first `limit` scrolls by id, optionally only those whose file name starts with prefix."""
+        with self._lock:
+            if not prefix:
+                rids = self._by_id[:limit]
+            else:
+                lo, hi = self._name_range(prefix)
+                rids = nsmallest(limit, (rid for _, rid in self._by_name[lo:hi]))
+            return [self._titles[self._doc[rid]] for rid in rids]
+
+    # ---- regex search -------------------------------------------------------
+    def _size(self, plan: Plan) -> int:
+        """Upper bound on the docs plan can match (cheap: posting lengths only)."""
+        if plan is None:
+            return len(self._ids)
+        if isinstance(plan, str):
+            return min(len(self._grams.get(g, ())) for g in _trigrams(plan))
+        sizes = [self._size(p) for p in plan[1]]
+        return min(sum(sizes), len(self._ids)) if plan[0] == "or" else min(sizes)
+
+    def _intersect(self, docs: Set[int], lit: str) -> Set[int]:
+        """
+        docs ∩ postings of lit's trigrams, smallest first. A list more than 8x
+        the current set costs more to walk than the regex checks it would
+        save, so it (and every longer one) is skipped.
+        """
+        for p in sorted((self._grams.get(g, ()) for g in _trigrams(lit)), key=len):
+            if len(docs) <= 64 or len(p) > 8 * len(docs):
+                break
+            docs = docs.intersection(p)
+        return docs
+
+    def _plan_docs(self, plan: Plan) -> Optional[Set[int]]:
+        """
+        Docs that can satisfy plan (a superset of the matches), None = no
+        useful narrowing (plan matches over a quarter of the scrolls). For an
+        "and" only the smallest part is expanded; literal parts then narrow it.
+        """
+        if plan is None or self._size(plan) * 4 > len(self._doc):
+            return None
+        if isinstance(plan, str):
+            lists = sorted((self._grams.get(g, ()) for g in _trigrams(plan)), key=len)
+            return self._intersect(set(lists[0]), plan)
+        op, subs = plan
+        if op == "or":
+            return set().union(*(self._plan_docs(p) for p in subs))
+        subs = sorted(subs, key=self._size)
+        docs = self._plan_docs(subs[0])
+        for p in subs[1:]:
+            if isinstance(p, str):
+                docs = self._intersect(docs, p)
+        return docs
+
+    def search(self, pattern: str, limit: int = 25, budget_s: float = 0.25) -> Dict[str, Any]:
+        """
+        Scrolls whose file name or title matches pattern (case-insensitive),
+        in id order, at most `limit`. Raises ValueError for an invalid
+        pattern, one over MAX_PATTERN_LEN, or one with nested / alternated
+        repeats (catastrophic backtracking can't be interrupted mid-match).
+        Stops early once budget_s is spent ("complete": False).
+        """
+        if len(pattern) > MAX_PATTERN_LEN:
+            raise ValueError(f"pattern longer than {MAX_PATTERN_LEN} characters")
+        try:
+            parsed = sre_parse.parse(pattern, re.I)
+            rx = re.compile(pattern, re.I)
+        except re.error as e:
+            raise ValueError(f"invalid pattern: {e}") from None
+        if _backtracking_risk(parsed):
+            raise ValueError("nested or alternated repeats are not allowed (e.g. (a+)+, (a|b)*)")
+
+        t0 = time.perf_counter()
+        deadline = t0 + budget_s
+        with self._lock:
+            cands = self._plan_docs(literal_plan(parsed))
+            if cands is None or len(cands) ** 2 > 100 * len(self._doc):
+                # common literals: an id-order walk reaches `limit` matches sooner than sorting every candidate
+                doc_of = self._doc
+                order = (doc_of[rid] for rid in self._by_id)
+                if cands is not None:
+                    order = (d for d in order if d in cands)
+                n_cands = len(doc_of) if cands is None else len(cands)
+            else:
+                ids = self._ids
+                order = sorted((d for d in cands if ids[d] is not None), key=ids.__getitem__)
+                n_cands = len(order)
+            matches: List[Dict[str, str]] = []
+            scanned, complete = 0, True
+            for doc in order:
+                if scanned % 64 == 0 and time.perf_counter() > deadline:
+                    complete = False
+                    break
+                scanned += 1
+                title, name = self._titles[doc], self._names[doc]
+                if rx.search(title) or rx.search(name):
+                    matches.append({"file": name, "title": title})
+                    if len(matches) >= limit:
+                        break
+        return {
+            "matches": matches,
+            "total": len(matches),
+            "candidates": n_cands,
+            "scanned": scanned,
+            "complete": complete,
+            "ms": round((time.perf_counter() - t0) * 1000.0, 2),
+        }
@@ -1,13 +1,21 @@
 # src/tobyworld/utils/scroll_loader.py
 from __future__ import annotations
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Iterable, Tuple, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, Iterable, Sequence, Tuple, Any
+import hashlib
+import os
 import re
 import json
+import threading
 import time
 from datetime import datetime
 
+if TYPE_CHECKING:
+    from .parse_cache import ParseCache, Record
+
 # ── Markdown / filename cleaners (kept local to avoid cross-module deps)
 _MD_HEADING = re.compile(r"^\s*#{1,6}\s*")
 _MD_INLINE  = re.compile(r"[*_`~]+")
@@ -15,9 +23,19 @@ _PREFIX_CODE = re.compile(r"^(?:[A-Za-z]{1,5}_?)?\d{2,4}\s*[–-]\s*", re.UNICOD
 _IMG_MD = re.compile(r"!\[[^\]]*\]\([^)]+\)")
 _LINK_MD = re.compile(r"\[([^\]]+)\]\([^)]+\)")
 _FRONTMATTER = re.compile(r"^---\s*\n(.*?)\n---\s*\n", re.S)
+_SERIES = re.compile(r"^(TOBY_[A-Z]+)")
 
 SUPPORTED_EXTS = {".md", ".markdown", ".mdx", ".txt"}
 
+def scroll_name(row: Dict[str, Any]) -> str:
+    """File name of the scroll a row comes from (passages: their scroll's)."""
+    return os.path.basename(str((row.get("meta") or {}).get("scroll_id") or row.get("id") or ""))
+
+def series_of(name: str) -> str:
+    """Series prefix of a scroll file name ("TOBY_QL012_x.md" -> "TOBY_QL"), or ""."""
+    m = _SERIES.match(name)
+    return m.group(1) if m else ""
+
 def _clean_md_line(s: str) -> str:
     s = (s or "").strip()
     s = _MD_HEADING.sub("", s).strip()
@@ -71,6 +89,17 @@ def _parse_frontmatter(text: str) -> Tuple[Dict[str, Any], str]:
 
 def _parse_timestamp(meta: Dict[str, Any], fallback_path: Optional[Path]) -> float:
     # Priority: meta.timestamp, meta.date, file mtime
+    ts = _meta_timestamp(meta)
+    if ts is not None:
+        return ts
+    if fallback_path:
+        try:
+            return float(fallback_path.stat().st_mtime)
+        except Exception:
+            return 0.0
+    return 0.0
+
+def _meta_timestamp(meta: Dict[str, Any]) -> Optional[float]:
     for key in ("timestamp", "date", "updated_at", "created_at"):
         v = meta.get(key)
         if not v:
@@ -90,12 +119,7 @@ def _parse_timestamp(meta: Dict[str, Any], fallback_path: Optional[Path]) -> flo
             return datetime.fromisoformat(str(v)).timestamp()
         except Exception:
             pass
-    if fallback_path:
-        try:
-            return float(fallback_path.stat().st_mtime)
-        except Exception:
-            return 0.0
-    return 0.0
+    return None
 
 def _first_heading(body: str) -> Optional[str]:
     for ln in body.splitlines():
@@ -127,9 +151,16 @@ def read_scroll(path: Path) -> ScrollRow:
         raw = path.read_text(encoding="utf-8", errors="ignore")
     except Exception:
         raw = ""
+    return _parse_scroll(path, raw)[0]
+
+def _parse_scroll(path: Path, raw: str) -> Tuple[ScrollRow, int, bool]:
+    """read_scroll's parse step: (row, body offset in raw, timestamp is the file mtime)."""
     fm, body = _parse_frontmatter(raw)
     title = _natural_title(path, body, fm.get("title"))
-    ts = _parse_timestamp(fm, path)
+    ts = _meta_timestamp(fm)
+    ts_mtime = ts is None
+    if ts_mtime:
+        ts = _parse_timestamp({}, path)
     lang = fm.get("lang") or fm.get("language")
     tags = fm.get("tags") if isinstance(fm.get("tags"), list) else (fm.get("tags") or [])
     if isinstance(tags, str):
@@ -149,88 +180,359 @@ def read_scroll(path: Path) -> ScrollRow:
         if k not in meta:
             meta[k] = v
 
-    return ScrollRow(id=str(path), text=body, meta=meta)
+    return ScrollRow(id=str(path), text=body, meta=meta), len(raw) - len(body), ts_mtime
 
 def iter_scroll_paths(base: Path) -> Iterable[Path]:
     for p in base.rglob("*"):
         if p.is_file() and p.suffix.lower() in SUPPORTED_EXTS:
             yield p
 
-def load_scroll_index(root: Optional[Path | str] = None) -> List[Dict[str, Any]]:
+# ── Parallel parsing: frontmatter regexes + date strptime are CPU-bound
+PARSE_CHUNK = 64  # files per process-pool task
+Stamp = Tuple[float, int]  # (mtime, size)
+
+def _row_dict(p: Path | str) -> Dict[str, Any]:
+    row = read_scroll(Path(p))
+    return {"id": row.id, "text": row.text, "meta": row.meta}
+
+def _decode(raw: bytes) -> str:
+    """What Path.read_text(encoding="utf-8", errors="ignore") returns for these bytes."""
+    text = raw.decode("utf-8", errors="ignore")
+    return text.replace("\r\n", "\n").replace("\r", "\n") if "\r" in text else text
+
+def _stat(p: str) -> Stamp:
+    try:
+        st = os.stat(p)
+        return float(st.st_mtime), int(st.st_size)
+    except OSError:
+        return 0.0, -1
+
+def _row_record(p: str, stamp: Optional[Stamp]) -> Tuple[Dict[str, Any], "Record"]:
+    """Parse one scroll (as read_scroll does) plus its ParseCache record."""
+    try:
+        raw = Path(p).read_bytes()
+    except Exception:
+        raw = b""
+    row, body_off, ts_mtime = _parse_scroll(Path(p), _decode(raw))
+    mtime, size = stamp or _stat(p)
+    rec = (p, mtime, size, hashlib.sha256(raw).hexdigest(),
+           json.dumps(row.meta, ensure_ascii=False), body_off, int(ts_mtime))
+    return {"id": row.id, "text": row.text, "meta": row.meta}, rec
+
+def _read_chunk(items: List[Tuple[str, Optional[Stamp]]], records: bool = False) -> List[Any]:
+    if records:
+        return [_row_record(p, st) for p, st in items]
+    return [_row_dict(p) for p, _ in items]
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """None/1 → serial; 0 → one process per CPU; n → n processes."""
+    if workers is None:
+        return 1
+    workers = int(workers)
+    return (os.cpu_count() or 1) if workers <= 0 else workers
+
+def _parse_many(items: List[Tuple[str, Optional[Stamp]]], workers: Optional[int],
+                chunk_size: int, records: bool) -> List[Any]:
+    n = resolve_workers(workers)
+    if n <= 1 or len(items) <= chunk_size * n:
+        return _read_chunk(items, records)
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    out: List[Any] = []
+    with ProcessPoolExecutor(max_workers=n) as ex:
+        for part in ex.map(_read_chunk, chunks, [records] * len(chunks)):
+            out.extend(part)
+    return out
+
+def _cached_row(sp: str, rec: "Record", stamp: Stamp, raw: bytes) -> Dict[str, Any]:
+    meta = json.loads(rec[4])
+    if rec[6]:  # no date in the frontmatter: timestamp is the file mtime
+        meta["timestamp"] = stamp[0]
+    return {"id": sp, "text": _decode(raw)[rec[5]:], "meta": meta}
+
+def read_scrolls(paths: Sequence[Path | str], workers: Optional[int] = None,
+                 chunk_size: int = PARSE_CHUNK, cache: Optional["ParseCache"] = None,
+                 stamps: Optional[Dict[str, Stamp]] = None) -> List[Dict[str, Any]]:
+    """
+    Rows for paths, in the given order (same dicts as a serial read_scroll
+    loop). With workers > 1 the paths are cut into chunk_size chunks parsed
+    on a ProcessPoolExecutor; map() keeps chunk order. Corpora of at most
+    one chunk per worker are parsed inline (pool startup would dominate).
+    With a ParseCache, unchanged scrolls (stamp or content hash) are only
+    read and sliced at the cached body offset; the rest is parsed and
+    stored. stamps (path -> (mtime, size), e.g. from a scan) saves a stat.
+    """
+    keys = [str(p) for p in paths]
+    stamps = stamps or {}
+    if cache is None:
+        return _parse_many([(k, None) for k in keys], workers, chunk_size, records=False)
+
+    known = cache.fetch(keys)
+    out: List[Optional[Dict[str, Any]]] = [None] * len(keys)
+    todo: List[int] = []
+    touched: List[Tuple[float, int, str]] = []
+    hits_stamp = hits_hash = 0
+    for i, sp in enumerate(keys):
+        rec = known.get(sp)
+        stamp = stamps.get(sp) or _stat(sp)
+        if rec is None:
+            todo.append(i)
+            continue
+        try:
+            with open(sp, "rb") as f:  # no Path(): this loop is the warm-rebuild hot path
+                raw = f.read()
+        except OSError:
+            todo.append(i)
+            continue
+        if (rec[1], rec[2]) == stamp:
+            hits_stamp += 1
+        elif hashlib.sha256(raw).hexdigest() == rec[3]:
+            hits_hash += 1
+            touched.append((stamp[0], stamp[1], sp))
+        else:
+            todo.append(i)
+            continue
+        out[i] = _cached_row(sp, rec, stamp, raw)
+
+    parsed = _parse_many([(keys[i], stamps.get(keys[i])) for i in todo], workers, chunk_size, records=True)
+    for i, (row, _) in zip(todo, parsed):
+        out[i] = row
+    if parsed:
+        cache.put(rec for _, rec in parsed)
+    if touched:
+        cache.touch(touched)
+    cache.record(hits_stamp, hits_hash, len(todo))
+    return out  # type: ignore[return-value]
+
+def load_scroll_index(root: Optional[Path | str] = None, workers: Optional[int] = None,
+                      cache: Optional["ParseCache"] = None) -> List[Dict[str, Any]]:
     """
     Public API: returns a list of dicts shaped like:
       { "id": str, "text": str, "meta": {"path": str, "title": str, "timestamp": float, ...} }
+    sorted by path. workers / cache: see read_scrolls (None/1 serial, 0 = all CPUs).
     """
     base = Path(root) if root else (Path(__file__).resolve().parents[2] / "lore-scrolls")
     base.mkdir(parents=True, exist_ok=True)
-    rows: List[Dict[str, Any]] = []
-    for p in sorted(iter_scroll_paths(base)):
-        row = read_scroll(p)
-        rows.append({"id": row.id, "text": row.text, "meta": row.meta})
-    return rows
+    return read_scrolls(sorted(iter_scroll_paths(base)), workers=workers, cache=cache)
+
+# ── Passages: the chunker shared with scripts/index_scrolls.py
+def chunk_markdown(text: str, max_len: int = 800) -> List[str]:
+    """
+    Split a scroll body into passages: blank-line paragraphs (whitespace
+    collapsed), greedily joined while they fit in max_len characters.
+    A paragraph longer than max_len becomes its own passage.
+    """
+    paras = [re.sub(r"\s+", " ", x).strip() for x in re.split(r"\n\s*\n", text or "") if x.strip()]
+    chunks: List[str] = []
+    cur = ""
+    for para in paras:
+        if len(cur) + 1 + len(para) <= max_len:
+            cur = f"{cur}\n{para}".strip()
+        else:
+            if cur:
+                chunks.append(cur)
+            cur = para
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+def chunk_rows(rows: Iterable[Dict[str, Any]], max_len: int = 800, min_len: int = 20) -> List[Dict[str, Any]]:
+    """
+    Passage rows for load_scroll_index() output:
+      { "id": "<scroll id>#<i>", "text": chunk, "meta": {...scroll meta, "scroll_id": str, "chunk": i} }
+    Chunk numbering matches the dense index (index_scrolls.py): passages
+    shorter than min_len are skipped but keep their number.
+    """
+    out: List[Dict[str, Any]] = []
+    for r in rows:
+        rid = str(r.get("id", ""))
+        meta = r.get("meta", {}) or {}
+        for i, chunk in enumerate(chunk_markdown(r.get("text", "") or "", max_len)):
+            if len(chunk) < min_len:
+                continue
+            out.append({"id": f"{rid}#{i}", "text": chunk, "meta": {**meta, "scroll_id": rid, "chunk": i}})
+    return out
 
 # Optional lightweight caching index for long-running processes (server, jobs)
+@dataclass
+class ScrollDelta:
+    """What ScrollIndex.refresh() found: new/changed rows and removed ids."""
+    added: List[Dict[str, Any]]
+    changed: List[Dict[str, Any]]
+    removed: List[str]
+
+    @property
+    def upserted(self) -> List[Dict[str, Any]]:
+        return self.added + self.changed
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+def _scan_stamps(base: Path) -> Dict[str, Tuple[float, int]]:
+    """path -> (mtime, size) for every scroll under base; one stat per file (os.scandir)."""
+    out: Dict[str, Tuple[float, int]] = {}
+    stack = [str(base)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir():
+                        stack.append(e.path)
+                    elif e.is_file() and os.path.splitext(e.name)[1].lower() in SUPPORTED_EXTS:
+                        st = e.stat()
+                        out[e.path] = (float(st.st_mtime), int(st.st_size))
+                except OSError:
+                    continue
+    return out
+
+RowKey = Tuple[float, str, str]  # ScrollIndex order: (-timestamp, title, id)
+
+def _row_key(row: Dict[str, Any]) -> RowKey:
+    meta = row["meta"]
+    return -(meta.get("timestamp") or 0.0), meta.get("title", ""), row["id"]
+
 class ScrollIndex:
-    def __init__(self, root: Optional[Path | str] = None):
+    """
+    Scroll rows (same shape as load_scroll_index) that can be refreshed
+    incrementally: refresh() stats every file and re-parses only those
+    added, removed, or whose (mtime, size) changed.
+
+    Keyed store: id -> (order key, row) plus parallel sorted lists of order
+    keys and rows (newest first, then title, then id), so an upsert/delete
+    is a dict op + one bisect instead of a list scan and a full re-sort.
+    rows / snapshot() hand out one immutable tuple per generation, shared
+    by all readers until the next change.
+    """
+
+    def __init__(self, root: Optional[Path | str] = None, workers: Optional[int] = None,
+                 parse_cache: Optional["ParseCache"] = None):
         self.root = Path(root) if root else (Path(__file__).resolve().parents[2] / "lore-scrolls")
-        self._cache: Dict[str, float] = {}   # path -> last_mtime
-        self._rows: List[Dict[str, Any]] = []
+        self.workers = workers  # read_scrolls() process count for rebuild/refresh
+        self.parse_cache = parse_cache
+        self._cache: Dict[str, Tuple[float, int]] = {}   # path -> (mtime, size) when parsed
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._init_store()
         self.rebuild()
 
+    def _init_store(self) -> None:
+        self._by_id: Dict[str, Tuple[RowKey, Dict[str, Any]]] = {}
+        self._keys: List[RowKey] = []             # sorted
+        self._rows: List[Dict[str, Any]] = []     # parallel to _keys
+        self._gen = 0
+        self._snap: Tuple[int, Tuple[Dict[str, Any], ...]] = (0, ())
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_state(cls, root: Path | str, rows: Iterable[Dict[str, Any]],
+                   stamps: Dict[str, Tuple[float, int]], workers: Optional[int] = None,
+                   parse_cache: Optional["ParseCache"] = None) -> "ScrollIndex":
+        """Restore saved rows + (mtime, size) stamps without parsing; refresh() then picks up disk changes."""
+        si = cls.__new__(cls)
+        si.root = Path(root)
+        si.workers = workers
+        si.parse_cache = parse_cache
+        si.root.mkdir(parents=True, exist_ok=True)
+        si._cache = {sp: (float(m), int(z)) for sp, (m, z) in stamps.items()}
+        si._init_store()
+        si._load(rows)
+        return si
+
+    # ---- keyed store ----------------------------------------------------------
+    def _load(self, rows: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._by_id = {r["id"]: (_row_key(r), r) for r in rows}
+            ordered = sorted(self._by_id.values(), key=lambda e: e[0])
+            self._keys = [k for k, _ in ordered]
+            self._rows = [r for _, r in ordered]
+            self._gen += 1
+
+    def _apply(self, upserted: Iterable[Dict[str, Any]], removed: Iterable[str]) -> None:
+        """Upsert rows by id and delete ids: O(log N) search + one list memmove each."""
+        with self._lock:
+            keys, rows, by_id = self._keys, self._rows, self._by_id
+            for rid in removed:
+                old = by_id.pop(rid, None)
+                if old is not None:
+                    i = bisect_left(keys, old[0])
+                    del keys[i], rows[i]
+            for row in upserted:
+                old = by_id.get(row["id"])
+                if old is not None:
+                    i = bisect_left(keys, old[0])
+                    del keys[i], rows[i]
+                key = _row_key(row)
+                by_id[row["id"]] = (key, row)
+                i = bisect_left(keys, key)
+                keys.insert(i, key)
+                rows.insert(i, row)
+            self._gen += 1
+
+    @property
+    def generation(self) -> int:
+        """Bumped on every change; snapshot() rows are fixed per generation."""
+        return self._gen
+
+    def snapshot(self) -> Tuple[int, Tuple[Dict[str, Any], ...]]:
+        """(generation, rows in order), materialized once per generation."""
+        snap = self._snap
+        if snap[0] != self._gen:
+            with self._lock:
+                snap = self._snap
+                if snap[0] != self._gen:
+                    snap = self._snap = (self._gen, tuple(self._rows))
+        return snap
+
+    def get(self, rid: str) -> Optional[Dict[str, Any]]:
+        ent = self._by_id.get(rid)
+        return ent[1] if ent is not None else None
+
+    def __contains__(self, rid: object) -> bool:
+        return rid in self._by_id
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    # ---- disk sync --------------------------------------------------------------
     def rebuild(self) -> int:
-        self._rows.clear()
-        self._cache.clear()
-        count = 0
-        for p in iter_scroll_paths(self.root):
-            try:
-                st = p.stat()
-                self._cache[str(p)] = float(st.st_mtime)
-            except Exception:
-                self._cache[str(p)] = 0.0
-            row = read_scroll(p)
-            self._rows.append({"id": row.id, "text": row.text, "meta": row.meta})
-            count += 1
-        # deterministic order
-        self._rows.sort(key=lambda r: (-(r["meta"].get("timestamp") or 0.0), r["meta"].get("title", "")))
-        return count
+        self._cache = _scan_stamps(self.root)
+        rows = read_scrolls(list(self._cache), workers=self.workers, cache=self.parse_cache, stamps=self._cache)
+        if self.parse_cache is not None:
+            self.parse_cache.prune(self._cache, prefix=str(self.root))
+        self._load(rows)
+        return len(self)
+
+    def refresh(self) -> ScrollDelta:
+        """Re-parse only added/changed scrolls, drop removed ones; returns the delta."""
+        current = _scan_stamps(self.root)
+        removed = [sp for sp in self._cache if sp not in current]
+        for sp in removed:
+            self._cache.pop(sp, None)
+
+        stale = [sp for sp, stamp in current.items() if self._cache.get(sp) != stamp]
+        added: List[Dict[str, Any]] = []
+        changed: List[Dict[str, Any]] = []
+        for sp, row in zip(stale, read_scrolls(stale, workers=self.workers, cache=self.parse_cache, stamps=current)):
+            (added if sp not in self._cache else changed).append(row)
+            self._cache[sp] = current[sp]
+
+        delta = ScrollDelta(added=added, changed=changed, removed=removed)
+        if delta:
+            self._apply(delta.upserted, removed)
+        return delta
 
     def maybe_refresh(self) -> int:
-        """Check mtimes and refresh only changed/added files. Returns number of changed files."""
-        changed = 0
-        current_paths = {str(p): p for p in iter_scroll_paths(self.root)}
-        # detect removed
-        known_paths = set(self._cache.keys())
-        removed = known_paths - set(current_paths.keys())
-        if removed:
-            self._rows = [r for r in self._rows if r["id"] not in removed]
-            for rp in removed:
-                self._cache.pop(rp, None)
-            changed += len(removed)
-
-        # detect added/modified
-        for sp, p in current_paths.items():
-            try:
-                mtime = float(p.stat().st_mtime)
-            except Exception:
-                mtime = 0.0
-            if sp not in self._cache or self._cache[sp] != mtime:
-                self._cache[sp] = mtime
-                row = read_scroll(p)
-                # replace or append
-                found = False
-                for i, r in enumerate(self._rows):
-                    if r["id"] == sp:
-                        self._rows[i] = {"id": row.id, "text": row.text, "meta": row.meta}
-                        found = True
-                        break
-                if not found:
-                    self._rows.append({"id": row.id, "text": row.text, "meta": row.meta})
-                changed += 1
-
-        if changed:
-            self._rows.sort(key=lambda r: (-(r["meta"].get("timestamp") or 0.0), r["meta"].get("title", "")))
-        return changed
+        """Check mtimes/sizes and refresh only changed/added files. Returns number of changed files."""
+        return len(self.refresh())
+
+    @property
+    def rows(self) -> Tuple[Dict[str, Any], ...]:
+        """Current rows in order (read-only snapshot; see snapshot())."""
+        return self.snapshot()[1]
 
     @property
-    def rows(self) -> List[Dict[str, Any]]:
-        return self._rows[:]
+    def stamps(self) -> Dict[str, Tuple[float, int]]:
+        """path -> (mtime, size) of every parsed scroll (the snapshot manifest)."""
+        return dict(self._cache)
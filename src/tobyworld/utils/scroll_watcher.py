@@ -0,0 +1,133 @@
+# src/tobyworld/utils/scroll_watcher.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+import os
+import threading
+import time
+
+from .scroll_loader import SUPPORTED_EXTS, _scan_stamps
+
+try:  # inotify / FSEvents / ReadDirectoryChangesW (ships with uvicorn[standard])
+    import watchfiles
+    _HAS_WATCHFILES = True
+except Exception:
+    watchfiles = None
+    _HAS_WATCHFILES = False
+
+BACKENDS = ("auto", "watchfiles", "poll")
+
+
+class ScrollWatcher:
+    """
+    Background thread that calls on_batch() once per burst of scroll changes
+    under root (e.g. a git pull touching hundreds of files):
+      - events come from watchfiles when installed, else an os.scandir stat
+        poll every poll_s seconds (backend="poll" forces it)
+      - a batch fires once no change has been seen for debounce_s; a steady
+        stream of changes is cut at max_wait_s
+    on_batch does the reindex (incremental in the server); its exceptions
+    are recorded in stats(), never raised into the thread.
+    """
+
+    def __init__(
+        self,
+        root: Path | str,
+        on_batch: Callable[[], Any],
+        debounce_s: float = 1.0,
+        poll_s: float = 2.0,
+        max_wait_s: float = 30.0,
+        backend: str = "auto",
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown watcher backend {backend!r} (expected one of {BACKENDS})")
+        self.root = Path(root)
+        self.on_batch = on_batch
+        self.debounce_s = max(0.0, float(debounce_s))
+        self.poll_s = max(0.01, float(poll_s))
+        self.max_wait_s = max(self.debounce_s, float(max_wait_s))
+        self.backend = "watchfiles" if backend != "poll" and _HAS_WATCHFILES else "poll"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "batches": 0, "paths": 0, "errors": 0,
+            "last_ts": None, "last_ms": None, "last_paths": 0, "last_result": None, "last_error": None,
+        }
+
+    # ---- lifecycle ---------------------------------------------------------
+    def start(self) -> "ScrollWatcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="scroll-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": self.backend, "running": self.running, "debounce_s": self.debounce_s, **self._stats}
+
+    # ---- event sources: each yields the number of changed paths per burst ---
+    def _watchfiles_bursts(self) -> Iterator[int]:
+        base = watchfiles.DefaultFilter()  # skips .git, __pycache__, editor swap files
+
+        def keep(change, path: str) -> bool:
+            ext = os.path.splitext(path)[1].lower()
+            return base(change, path) and (ext in SUPPORTED_EXTS or not ext)  # no ext: a moved/removed dir
+
+        for changes in watchfiles.watch(
+            self.root, watch_filter=keep, stop_event=self._stop,
+            step=int(self.debounce_s * 1000), debounce=int(self.max_wait_s * 1000),
+        ):
+            yield len({p for _, p in changes})
+
+    def _poll_bursts(self) -> Iterator[int]:
+        def diff(a, b) -> set:
+            return {k for k in a.keys() | b.keys() if a.get(k) != b.get(k)}
+
+        last = _scan_stamps(self.root)
+        while not self._stop.wait(self.poll_s):
+            cur = _scan_stamps(self.root)
+            if cur == last:
+                continue
+            first, changed, last = time.monotonic(), diff(last, cur), cur
+            # settle: keep looking until a quiet debounce window (or max_wait_s)
+            while time.monotonic() - first < self.max_wait_s and not self._stop.wait(self.debounce_s):
+                cur = _scan_stamps(self.root)
+                if cur == last:
+                    break
+                changed |= diff(last, cur)
+                last = cur
+            if not self._stop.is_set():
+                yield len(changed)
+
+    def _run(self) -> None:
+        bursts = self._watchfiles_bursts() if self.backend == "watchfiles" else self._poll_bursts()
+        for n in bursts:
+            t0 = time.perf_counter()
+            result, err = None, None
+            try:
+                result = self.on_batch()
+            except Exception as e:
+                err = f"{type(e).__name__}: {e}"
+            with self._lock:
+                st = self._stats
+                st["batches"] += 1
+                st["paths"] += n
+                st["last_ts"] = time.time()
+                st["last_ms"] = round((time.perf_counter() - t0) * 1000.0, 2)
+                st["last_paths"] = n
+                st["last_result"] = result
+                if err:
+                    st["errors"] += 1
+                    st["last_error"] = err
@@ -4,3 +4,7 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 SRC = os.path.join(ROOT, "src")
 if SRC not in sys.path:
     sys.path.insert(0, SRC)
+
+# importing tobyworld.api.server must not write data/lexical.snap / parse_cache.sqlite into the checkout
+os.environ.setdefault("MIRROR_INDEX_SNAPSHOT", "0")
+os.environ.setdefault("MIRROR_PARSE_CACHE", "0")
@@ -56,3 +56,17 @@ def test_metrics_exposes_counters():
     assert "tw_uptime_seconds" in body
     # latency histogram should have a count line for at least one route
     assert 'tw_request_latency_seconds_count{route="ask"}' in body
+
+
+def test_default_arcs_and_budgets():
+    # BM25F-only retrieval with 16-candidate budgets is the default since the
+    # bm25 arc landed; MIRROR_ARCS / MIRROR_ARC_K / MIRROR_TOPK_FINAL restore the old ones
+    import os
+    import pytest
+    from tobyworld.api import server
+
+    if any(os.getenv(v) for v in ("MIRROR_ARCS", "MIRROR_ARC_K")):
+        pytest.skip("arc defaults overridden by the environment")
+    assert {name for name, cfg in server.ARCS.items() if cfg.enabled} == {"bm25"}
+    assert {cfg.k for cfg in server.ARCS.values()} == {16}
+    assert server.TOPK_FINAL_DEFAULT == 16
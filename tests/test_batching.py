@@ -0,0 +1,57 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from tobyworld.retrieval.batching import BatchedQuerySearch, MicroBatcher
+from tobyworld.retrieval.retriever import Retriever
+
+
+def test_concurrent_queries_share_encode_and_search_calls(tmp_path):
+    rng = np.random.default_rng(2)
+    embs = rng.standard_normal((200, 16)).astype(np.float32)
+    embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+    np.save(tmp_path / "embeddings.npy", embs)
+    (tmp_path / "meta.json").write_text(json.dumps({"items": [{"path": f"s{i}.md", "chunk": 0} for i in range(200)]}))
+    r = Retriever(tmp_path)
+    r._faiss = None
+    encode_sizes = []
+
+    def encode(texts):
+        encode_sizes.append(len(texts))
+        return np.stack([embs[int(t)] for t in texts])
+
+    dense = BatchedQuerySearch(encode, r.search_embeddings, max_batch=8, max_wait_ms=50.0)
+    results = {}
+    start = threading.Barrier(16)
+
+    def ask(i):
+        start.wait()
+        results[i] = dense.search(str(i), top_k=1 + i % 3)
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    dense.close()
+    assert sum(encode_sizes) == 16 and len(encode_sizes) < 16 and max(encode_sizes) <= 8
+    for i, hits in results.items():
+        alone = r.search_embedding(embs[i], top_k=1 + i % 3)  # same as one query at a time
+        assert [h.path for h in hits] == [h.path for h in alone]
+        assert np.allclose([h.score for h in hits], [h.score for h in alone], atol=1e-6)
+        assert hits[0].path == f"s{i}.md"
+
+
+def test_batch_failure_reaches_every_caller():
+    def boom(items):
+        raise RuntimeError("encoder down")
+
+    b = MicroBatcher(boom, max_batch=4, max_wait_ms=1.0)
+    futs = [b.submit(i) for i in range(3)]
+    for f in futs:
+        with pytest.raises(RuntimeError, match="encoder down"):
+            f.result(timeout=5)
+    b.close()
+    assert MicroBatcher(lambda xs: [x * 2 for x in xs], max_batch=1)(21) == 42  # batching off: inline
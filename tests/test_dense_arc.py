@@ -0,0 +1,139 @@
+import json
+
+import numpy as np
+
+from tobyworld.agentic_rag.multi_arc_retrieval import DenseRetriever
+from tobyworld.retrieval.retriever import Retriever
+
+
+class _Embedder:
+    def __init__(self, vec):
+        self.vec = np.asarray(vec, dtype=np.float32)
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        return np.stack([self.vec for _ in texts])
+
+
+def test_dense_arc_maps_chunks_to_scroll_rows(tmp_path):
+    embs = np.array([[1, 0, 0], [0.9, 0.1, 0], [0, 1, 0], [0.8, 0, 0.2]], dtype=np.float32)
+    np.save(tmp_path / "embeddings.npy", embs)
+    items = [
+        {"path": "lore-scrolls/TOBY_QL001.md", "chunk": 0},
+        {"path": "lore-scrolls/TOBY_QL001.md", "chunk": 1},
+        {"path": "lore-scrolls/TOBY_QA002.md", "chunk": 0},
+        {"path": "lore-scrolls/TOBY_L003.md", "chunk": 2},
+    ]
+    (tmp_path / "meta.json").write_text(json.dumps({"items": items}))
+    rows = [
+        {"id": "/srv/lore-scrolls/TOBY_QA002.md", "text": "b", "meta": {"path": "/srv/lore-scrolls/TOBY_QA002.md"}},
+        {"id": "/srv/lore-scrolls/TOBY_QL001.md", "text": "a", "meta": {"path": "/srv/lore-scrolls/TOBY_QL001.md"}},
+        {"id": "/srv/lore-scrolls/TOBY_L003.md", "text": "c", "meta": {"path": "/srv/lore-scrolls/TOBY_L003.md"}},
+    ]
+
+    r = Retriever(tmp_path)
+    assert isinstance(r._embs, np.memmap)
+    hits = DenseRetriever(r, _Embedder([1, 0, 0]), rows).retrieve("who is toby", k=2)
+    assert [h.doc_id for h in hits] == ["/srv/lore-scrolls/TOBY_QL001.md", "/srv/lore-scrolls/TOBY_L003.md"]
+    assert hits[0].score == 1.0 and hits[0].meta["dense_chunk"] == 0
+    assert hits[0].text == "a"
+
+
+def test_dense_arc_is_empty_without_index(tmp_path):
+    arc = DenseRetriever(Retriever(tmp_path), _Embedder([1, 0]), [])
+    assert not arc.ready
+    assert arc.retrieve("toby") == []
+
+
+def test_compact_storage_rescores_to_float32_ranking(tmp_path):
+    from tobyworld.retrieval.quant import save_compact
+
+    rng = np.random.default_rng(3)
+    embs = rng.standard_normal((500, 32)).astype(np.float32)
+    embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+    items = [{"path": f"s{i}.md", "chunk": 0} for i in range(len(embs))]
+    q = embs[7] + 0.3 * rng.standard_normal(32).astype(np.float32)
+    ref = None
+    for storage in ("float32", "float16", "int8"):
+        d = tmp_path / storage
+        d.mkdir()
+        np.save(d / "embeddings.npy", embs)
+        (d / "meta.json").write_text(json.dumps({"items": items, **save_compact(d, embs, storage)}))
+        r = Retriever(d)
+        r._faiss = None
+        assert r.storage == storage and (r._codes is None) == (storage == "float32")
+        hits = [(h.path, round(h.score, 5)) for h in r.search_embedding(q, top_k=10)]
+        ref = ref or hits
+        assert hits == ref  # exact float32 scores after rescoring
+
+
+def test_ann_index_types_are_detected_and_tunable_per_query(tmp_path):
+    import pytest
+    faiss = pytest.importorskip("faiss")
+    from tobyworld.retrieval.ann import build_faiss_index
+
+    rng = np.random.default_rng(5)
+    centers = rng.standard_normal((16, 32)).astype(np.float32)
+    embs = centers[rng.integers(0, 16, 4000)] + 0.5 * rng.standard_normal((4000, 32)).astype(np.float32)
+    embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+    items = [{"path": f"s{i}.md", "chunk": 0} for i in range(len(embs))]
+    q = embs[11]
+    exact = set(np.argsort(-(embs @ q))[:10].tolist())
+    for kind in ("flat", "ivf", "ivfpq", "hnsw"):
+        d = tmp_path / kind
+        d.mkdir()
+        np.save(d / "embeddings.npy", embs)
+        index, info = build_faiss_index(embs, kind, nlist=32, nprobe=4)
+        faiss.write_index(index, str(d / "vectors.faiss"))
+        (d / "meta.json").write_text(json.dumps({"items": items, "ann": info}))
+        r = Retriever(d, rescore_factor=40)  # IVF-PQ: rank 400 coarse candidates exactly
+        assert r.ann == kind and info["type"] == kind
+        if kind.startswith("ivf"):
+            assert r.nprobe == 4 and info["nlist"] == 32
+        # exhaustive settings → the exact top-10, with exact (rescored) scores
+        hits = r.search_embedding(q, top_k=10, nprobe=32, ef_search=4000)
+        assert {int(h.path[1:-3]) for h in hits} == exact
+        assert abs(hits[0].score - 1.0) < 1e-5
+
+
+def test_incremental_update_embeds_only_changed_chunks(tmp_path):
+    import pytest
+    pytest.importorskip("faiss")
+    from tobyworld.retrieval.incremental import update_index
+
+    rng = np.random.default_rng(9)
+    vocab = {}
+
+    def encode(texts):
+        encoded.extend(texts)
+        return np.stack([vocab.setdefault(t, rng.standard_normal(16).astype(np.float32)) for t in texts])
+
+    chunks = lambda: [{"path": p, "chunk": 0, "text": t} for p, t in docs.items()]  # noqa: E731
+    for kind in ("flat", "ivf", "hnsw"):
+        d = tmp_path / kind
+        docs = {f"s{i}.md": f"scroll {i}" for i in range(300)}
+        encoded = []
+        stats = update_index(d, chunks(), encode, "m", ann={"index_type": kind, "nlist": 4})
+        assert stats["embedded"] == 300 and stats["index"] == "rebuilt"
+        r = Retriever(d)
+        assert r.ann == kind and not r.maybe_reload()
+
+        encoded = []
+        docs["s5.md"] = "scroll five, revised"
+        del docs["s7.md"]
+        docs["s300.md"] = "a new scroll"
+        stats = update_index(d, chunks(), encode, "m", ann={"index_type": kind, "nlist": 4})
+        assert sorted(encoded) == ["a new scroll", "scroll five, revised"]
+        assert (stats["removed"], stats["reused"], stats["tombstones"]) == (2, 298, 2)
+        assert stats["index"] == "updated"  # by id; HNSW keeps removed nodes, filtered per query
+        assert r.maybe_reload()
+        for path, text in (("s5.md", "scroll five, revised"), ("s300.md", "a new scroll"), ("s9.md", "scroll 9")):
+            hit = r.search_embedding(vocab[text] / np.linalg.norm(vocab[text]), top_k=1, nprobe=4, ef_search=300)[0]
+            assert hit.path == path and abs(hit.score - 1.0) < 1e-5
+        stale = vocab["scroll 7"] / np.linalg.norm(vocab["scroll 7"])
+        assert "s7.md" not in {h.path for h in r.search_embedding(stale, top_k=300, nprobe=4, ef_search=300)}
+        r._faiss = None  # NumPy fallback skips the tombstoned rows too
+        assert "s7.md" not in {h.path for h in r.search_embedding(stale, top_k=300)}
+
+        encoded = []
+        assert update_index(d, chunks(), encode, "m", ann={"index_type": kind, "nlist": 4})["embedded"] == 0
+        assert encoded == [] and not r.maybe_reload()  # nothing changed: files untouched
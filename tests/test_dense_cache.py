@@ -0,0 +1,69 @@
+import json
+import os
+
+import numpy as np
+
+from tobyworld.retrieval.batching import BatchedQuerySearch
+from tobyworld.retrieval.dense_cache import CachedDenseSearch, LRUCache, cached_query_encoder
+from tobyworld.retrieval.retriever import Retriever
+
+
+def _write(d, embs, names):
+    np.save(d / "embeddings.npy", embs)
+    (d / "meta.json").write_text(json.dumps({"items": [{"path": n, "chunk": 0} for n in names]}))
+
+
+def test_repeated_queries_encode_once_and_hits_follow_the_index(tmp_path):
+    embs = np.eye(4, dtype=np.float32)
+    _write(tmp_path, embs, ["a.md", "b.md", "c.md", "d.md"])
+    r = Retriever(tmp_path)
+    r._faiss = None
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return np.stack([embs[len(t.split()) - 1] for t in texts])
+
+    vecs, hits_lru = LRUCache(8), LRUCache(8)
+    dense = CachedDenseSearch(
+        BatchedQuerySearch(cached_query_encoder(encode, "m", vecs), r.search_embeddings, max_batch=1),
+        str(tmp_path), "m", lambda: r.stamp, cache=hits_lru)
+
+    first = dense.search("who is toby", top_k=1)
+    assert [h.path for h in first] == ["c.md"]
+    assert dense.search("who is toby", top_k=1) == first
+    assert calls == [["who is toby"]] and hits_lru.hits == 1
+    dense.search("who is toby", top_k=2)  # new top_k: searched again, but not re-encoded
+    assert len(calls) == 1 and vecs.hits == 1
+    assert cached_query_encoder(encode, "other", vecs)(["who is toby"]).shape == (1, 4) and len(calls) == 2
+
+    # a rebuilt index changes the stamp: the cached hits are not served again
+    _write(tmp_path, embs, ["a.md", "b.md", "z.md", "d.md"])
+    os.utime(tmp_path / "meta.json", ns=(1, 1))
+    assert r.maybe_reload()
+    assert [h.path for h in dense.search("who is toby", top_k=1)] == ["z.md"]
+    assert len(calls) == 2  # the query vector is still reused
+    dense.close()
+
+
+def test_cached_vectors_match_uncached_encode():
+    def encode(texts):  # whitespace-sensitive, like a real tokenizer
+        return np.stack([np.array([len(t), t.count(" "), t.count("\t")], dtype=np.float32) for t in texts])
+
+    texts = ["who is toby", "  who is\ttoby ", "Who is Toby", "who is toby"]
+    enc = cached_query_encoder(encode, "m", LRUCache(8))
+    assert np.array_equal(enc(texts), encode(texts))
+    assert np.array_equal(enc(texts[::-1]), encode(texts[::-1]))  # served from the cache
+
+
+def test_lru_bound_evicts_least_recently_used():
+    lru = LRUCache(2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert lru.get("b") is None and lru.get("a") == 1 and len(lru) == 2
+    assert lru.stats()["evictions"] == 1
+    off = LRUCache(0)
+    off.put("a", 1)
+    assert off.get("a") is None
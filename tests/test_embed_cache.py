@@ -0,0 +1,65 @@
+import numpy as np
+
+from tobyworld.retrieval.embed_cache import CachedEncoder, EmbeddingCache, length_batches, text_key
+
+
+def _fake_model(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.stack([np.full(8, len(t), dtype=np.float32) for t in texts])
+    return encode
+
+
+def test_cached_encoder_encodes_each_text_once_across_runs(tmp_path):
+    texts = ["alpha", "beta beta", "alpha", "gamma gamma gamma", "beta beta"]
+    calls = []
+    enc = CachedEncoder(_fake_model(calls), EmbeddingCache(tmp_path, "m", dtype="float16"))
+    first = enc(texts)
+    assert sorted(t for c in calls for t in c) == ["alpha", "beta beta", "gamma gamma gamma"]
+    assert first.dtype == np.float32 and first[:, 0].tolist() == [5, 9, 5, 17, 9]
+
+    calls.clear()  # new process: the cache is reopened from disk
+    enc = CachedEncoder(_fake_model(calls), EmbeddingCache(tmp_path, "m", dtype="float16"))
+    assert np.array_equal(enc(texts + ["delta"]), np.vstack([first, np.full((1, 8), 5)]))
+    assert calls == [["delta"]]
+    assert (enc.stats["hits"], enc.stats["unique"], enc.stats["encoded"]) == (3, 4, 1)
+
+    # another model or normalize flag is its own namespace
+    assert len(EmbeddingCache(tmp_path, "m", normalize=False, dtype="float16")) == 0
+    assert len(EmbeddingCache(tmp_path, "other", dtype="float16")) == 0
+
+
+def test_length_batches_bound_padded_tokens():
+    lengths = [3, 100, 7, 100, 50, 2, 60, 1]
+    batches = length_batches(lengths, batch_tokens=200)
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    for b in batches:
+        assert len(b) * max(lengths[i] for i in b) <= 200 or len(b) == 1
+    assert batches[0] == [1, 3]  # longest first
+
+
+def test_reopen_truncates_an_interrupted_put(tmp_path):
+    cache = EmbeddingCache(tmp_path, "m")
+    cache.put([text_key("a")], np.array([[1, 0, 0]], dtype=np.float32))
+    with open(cache._vec_p, "ab") as f:  # killed after the vectors, mid-way through the keys
+        f.write(np.array([9, 9, 9], dtype=np.float32).tobytes())
+    with open(cache._key_p, "ab") as f:
+        f.write(b"\x01" * 10)
+
+    cache = EmbeddingCache(tmp_path, "m")
+    assert len(cache) == 1
+    cache.put([text_key("b")], np.array([[0, 1, 0]], dtype=np.float32))
+    cache = EmbeddingCache(tmp_path, "m")
+    assert len(cache) == 2
+    assert cache.get([text_key("a"), text_key("b")]).tolist() == [[1, 0, 0], [0, 1, 0]]
+
+
+def test_cached_build_matches_uncached_build(tmp_path):
+    def encode(texts):  # whitespace-sensitive, like a real tokenizer
+        return np.stack([np.array([len(t), t.count(" "), t.count("\n")], dtype=np.float32) for t in texts])
+
+    texts = ["toby  pond", "toby pond", "toby pond\n", "Toby pond", "toby pond"]
+    plain = CachedEncoder(encode)(texts)
+    assert np.array_equal(plain, encode(texts))
+    assert np.array_equal(CachedEncoder(encode, EmbeddingCache(tmp_path, "m"))(texts), plain)
+    assert np.array_equal(CachedEncoder(encode, EmbeddingCache(tmp_path, "m"))(texts), plain)  # all hits
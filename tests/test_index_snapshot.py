@@ -0,0 +1,62 @@
+import random
+
+from tobyworld.agentic_rag.index_snapshot import load_snapshot, save_snapshot
+from tobyworld.agentic_rag.lexical_index import BM25Scorer, LexicalIndex
+from tobyworld.utils.scroll_loader import ScrollIndex
+
+WORDS = ["toby", "patience", "pond", "mirror", "silence", "leaf", "taboshi", "rune", "frog", "w1", "w2", "w3"]
+
+
+def _write(root, n, seed=5):
+    rng = random.Random(seed)
+    for i in range(n):
+        body = "\n\n".join(" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30))) for _ in range(3))
+        (root / f"TOBY_QL{i:03d}.md").write_text(f"---\ntitle: {rng.choice(WORDS)} {i}\n---\n{body}\n", encoding="utf-8")
+
+
+def _searches(ix):
+    bm = BM25Scorer(ix)
+    queries = ["toby", "silence pond", "leaf of taboshi", "frog rune mirror", "nothing"]
+    return [([ix.rows[d]["id"] for d, _ in ix.search(q, k=10)], [ix.rows[d]["id"] for d, _ in bm.search(q, k=10)])
+            for q in queries]
+
+
+def test_snapshot_roundtrip_matches_fresh_build(tmp_path):
+    root, snap = tmp_path / "scrolls", tmp_path / "lexical.snap"
+    root.mkdir()
+    _write(root, 60)
+    si = ScrollIndex(root)
+    ix = LexicalIndex(si.rows)
+    ix.update([], removed=[si.rows[0]["id"]])  # tombstones are compacted on save
+    save_snapshot(snap, si, ix, key={"v": 1})
+
+    si2, ix2 = load_snapshot(snap, root, key={"v": 1})
+    assert len(ix2) == len(ix) == 59 and ix2.tombstones == 0
+    assert all(si2.get(r["id"]) is r for r in ix2.live_rows())  # row dicts held once
+    mem = ix2.memory_stats()
+    assert mem["mapped_postings"] == mem["postings"] > 0  # nothing decoded yet
+    assert _searches(ix2) == _searches(LexicalIndex(ix.live_rows()))
+    assert si2.stamps == si.stamps and [r["id"] for r in si2.rows] == [r["id"] for r in si.rows]
+
+    assert load_snapshot(snap, root, key={"v": 2}) is None
+    assert load_snapshot(tmp_path / "missing.snap", root) is None
+    (tmp_path / "junk.snap").write_bytes(b"not a snapshot")
+    assert load_snapshot(tmp_path / "junk.snap", root) is None
+
+
+def test_snapshot_then_refresh_reparses_only_stale_scrolls(tmp_path):
+    root, snap = tmp_path / "scrolls", tmp_path / "lexical.snap"
+    root.mkdir()
+    _write(root, 20)
+    si = ScrollIndex(root)
+    save_snapshot(snap, si, LexicalIndex(si.rows))
+
+    (root / "TOBY_QL003.md").write_text("---\ntitle: edited\n---\nzebra toby\n", encoding="utf-8")
+    (root / "TOBY_QL004.md").unlink()
+    si2, ix2 = load_snapshot(snap, root)
+    delta = si2.refresh()
+    assert [r["id"].rsplit("/", 1)[-1] for r in delta.changed] == ["TOBY_QL003.md"]
+    assert [p.rsplit("/", 1)[-1] for p in delta.removed] == ["TOBY_QL004.md"] and not delta.added
+    ix2.update(delta.upserted, removed=delta.removed)
+    assert _searches(ix2) == _searches(LexicalIndex(ix2.live_rows()))
+    assert [ix2.rows[d]["id"] for d, _ in ix2.search("zebra", k=3)] == [str(root / "TOBY_QL003.md")]
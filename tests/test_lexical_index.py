@@ -0,0 +1,329 @@
+import random
+
+from tobyworld.agentic_rag.lexical_index import LexicalIndex, tokenize
+from tobyworld.agentic_rag.multi_arc_retrieval import LocalRetriever
+
+WORDS = ["toby", "patience", "pond", "mirror", "silence", "leaf", "taboshi", "rune", "frog", "w1", "w2", "w3"]
+
+
+def _legacy_score(row, q_tokens):
+    """
+    The original per-row LocalRetriever formula (full scan) over the row as
+    the server used to index it: "filename series title" prepended to the
+    text. The phrase bonus counts within the body or the title, not across.
+    """
+    text = row.get("text") or ""
+    title = str(((row.get("meta") or {}).get("title") or ""))
+    name = row["id"].rsplit("/", 1)[-1]
+    series = name.split("0", 1)[0] if name.startswith("TOBY_") else ""
+    tokens = tokenize(" ".join(x for x in (name, series, title) if x) + "\n\n" + text)
+    if not tokens:
+        return 0.0
+    tf = sum(tokens.count(t) for t in set(q_tokens))
+    q_phrase = " ".join(q_tokens)
+    bonus = 2.0 if q_phrase and (q_phrase in text.lower() or q_phrase in title.lower()) else 0.0
+    title = title.lower()
+    title_bonus = 1.0 if title and any(t in title for t in q_tokens) else 0.0
+    return float(tf) + bonus + title_bonus
+
+
+def _rows(n, seed=3):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 40)))
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 3))).title()
+        rows.append({"id": f"TOBY_QL{i:04d}.md", "text": text, "meta": {"title": title}})
+    return rows
+
+
+def test_index_scores_match_legacy_formula():
+    rows = _rows(300)
+    idx = LexicalIndex(rows)
+    rng = random.Random(11)
+    for _ in range(50):
+        q_tokens = [rng.choice(WORDS) for _ in range(rng.randint(1, 3))]
+        got = idx.score(q_tokens)
+        for doc, row in enumerate(rows):
+            shared = set(q_tokens) & set(tokenize(row["text"] + " " + row["meta"]["title"]))
+            if shared:
+                assert got[doc] == _legacy_score(row, q_tokens)
+            else:
+                assert doc not in got
+
+
+def test_local_retriever_orders_by_score_then_id():
+    rows = [
+        {"id": "b.md", "text": "toby toby", "meta": {"title": "B"}},
+        {"id": "a.md", "text": "toby toby", "meta": {"title": "A"}},
+        {"id": "c.md", "text": "pond", "meta": {"title": "Toby"}},
+    ]
+    hits = LocalRetriever(rows).retrieve("toby", k=8)
+    assert [h.doc_id for h in hits] == ["a.md", "b.md", "c.md"]
+    assert hits[0].score == 2.0 + 2.0  # tf + phrase bonus
+    assert hits[2].score == 1.0 + 2.0 + 1.0  # title tf + title phrase + title bonus
+
+
+def test_filename_and_series_are_fields():
+    rows = [
+        {"id": "lore/TOBY_QL001_patience.md", "text": "the pond", "meta": {"title": "Patience"}},
+        {"id": "lore/TOBY_F002_pond.md", "text": "pond pond", "meta": {"title": "Pond"}},
+        {"id": "lore/TOBY_QL001_patience.md#1", "text": "leaf", "meta": {"scroll_id": "lore/TOBY_QL001_patience.md"}},
+    ]
+    idx = LexicalIndex(rows)
+    nf = len(idx.FIELDS)
+    p = idx.postings["toby_ql"]
+    assert list(p.docs) == [0, 2] and list(p.tfs[:nf]) == [0, 0, 0, 1]
+    assert list(idx.postings["toby_f002_pond"].tfs) == [0, 0, 1, 0]
+    assert list(idx.field_lens["filename"]) == [2, 2, 2] and list(idx.field_lens["series"]) == [1, 1, 1]
+    assert [d for d, _ in idx.search("toby_ql", k=5)] == [0, 2]
+
+
+def test_bm25_matches_reference_and_normalizes_length():
+    import math
+    from tobyworld.agentic_rag.lexical_index import BM25Scorer
+
+    rows = _rows(200, seed=5)
+    idx = LexicalIndex(rows)
+    bm = BM25Scorer(idx, k1=1.2, b=0.75, field_weights={"text": 1.0, "title": 2.0})
+    n = len(rows)
+    toks = [(tokenize(r["text"]), tokenize(r["meta"]["title"])) for r in rows]
+    avg = [sum(len(t[f]) for t in toks) / n for f in (0, 1)]
+    for q in (["toby"], ["pond", "mirror"], ["rune", "w1", "taboshi"]):
+        got = bm.score(q)
+        for doc, (body, title) in enumerate(toks):
+            ref = 0.0
+            for t in set(q):
+                df = sum(1 for b_, t_ in toks if t in b_ or t in t_)
+                if not df:
+                    continue
+                idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+                x = sum(w * fld.count(t) / (0.25 + 0.75 * len(fld) / avg[f])
+                        for f, (w, fld) in enumerate(((1.0, body), (2.0, title))) if fld.count(t))
+                if x:
+                    ref += idf * x * 2.2 / (x + 1.2)
+            assert abs(got.get(doc, 0.0) - ref) < 1e-9
+
+    short = {"id": "short.md", "text": "toby pond", "meta": {"title": ""}}
+    long_ = {"id": "long.md", "text": "toby " + "w9 " * 200, "meta": {"title": ""}}
+    hits = BM25Scorer(LexicalIndex([long_, short])).search("toby", k=2)
+    assert [d for d, _ in hits] == [1, 0]
+
+
+def test_phrase_bonus_uses_token_positions():
+    rows = [
+        {"id": "a.md", "text": "The silence within the Mirror", "meta": {}},
+        {"id": "b.md", "text": "within, silence; the mirror", "meta": {}},
+    ]
+    idx = LexicalIndex(rows)
+    assert idx.phrase_docs(["silence", "within"]) == [0]
+    assert idx.phrase_docs(["the", "mirror"]) == [0, 1]
+    got = idx.score(["silence", "within"])
+    assert got == {0: 4.0, 1: 2.0}
+
+
+def _zipf_rows(n, rng):
+    vocab = WORDS + [f"z{i}" for i in range(60)]
+    weights = [1.0 / (i + 1) for i in range(len(vocab))]
+    rows = []
+    for i in range(n):
+        body = rng.choices(vocab, weights=weights, k=rng.randint(0, 80))
+        title = rng.choices(vocab, weights=weights, k=rng.randint(0, 3))
+        rows.append({"id": f"s{rng.randint(0, 10**6):07d}_{i}.md", "text": " ".join(body),
+                     "meta": {"title": " ".join(title)}})
+    return rows, vocab, weights
+
+
+def _assert_same_ranking(got, ref, tol=1e-9):
+    assert len(got) == len(ref)
+    for (gd, gs), (rd, rs) in zip(got, ref):
+        assert abs(gs - rs) <= tol
+        if gd != rd:
+            # only legal when the two docs are tied on score
+            assert any(abs(s - gs) <= tol for d, s in ref if d == gd)
+
+
+def test_maxscore_matches_exhaustive_randomized():
+    from tobyworld.agentic_rag.lexical_index import BM25Scorer
+
+    rng = random.Random(2024)
+    for trial in range(12):
+        rows, vocab, weights = _zipf_rows(rng.randint(1, 400), rng)
+        idx = LexicalIndex(rows)
+        bm = BM25Scorer(idx, k1=rng.uniform(0.5, 2.0), b=rng.uniform(0.0, 1.0))
+        for _ in range(25):
+            q = rng.choices(vocab + ["missing"], weights=weights + [0.5], k=rng.randint(1, 4))
+            k = rng.randint(1, 30)
+            query = " ".join(q)
+            assert idx.search(query, k=k) == idx.top_k(idx.score(tokenize(query)), k)
+            _assert_same_ranking(bm.search(query, k=k), idx.top_k(bm.score(tokenize(query)), k))
+
+
+def test_maxscore_skips_postings_of_frequent_terms():
+    from tobyworld.agentic_rag.lexical_index import BM25Scorer
+
+    rows, _, _ = _zipf_rows(2000, random.Random(9))
+    bm = BM25Scorer(LexicalIndex(rows))
+    stats = {}
+    bm.search("toby z40", k=10, stats=stats)
+    assert stats["postings_touched"] < stats["postings_total"]
+
+
+def _by_id(idx, hits):
+    return [(idx.rows[d]["id"], round(s, 9)) for d, s in hits]
+
+
+def test_update_matches_fresh_build():
+    from tobyworld.agentic_rag.lexical_index import BM25Scorer
+
+    rng = random.Random(17)
+    rows, vocab, weights = _zipf_rows(300, rng)
+    idx = LexicalIndex(rows)
+    bm = BM25Scorer(idx)
+    bm.search("toby pond", k=5)  # warm caches that update() must invalidate
+
+    changed = [dict(r, text=r["text"] + " taboshi taboshi") for r in rows[:20]]
+    added = [{"id": f"new{i}.md", "text": "taboshi rune pond", "meta": {"title": "New"}} for i in range(5)]
+    removed = [r["id"] for r in rows[20:40]]
+    got = idx.update(changed + added, removed=removed)
+    assert got == {"added": 25, "removed": 40}
+    assert len(idx) == 300 - 20 + 5 and idx.tombstones == 40
+
+    live = changed + rows[40:] + added
+    fresh = LexicalIndex(live)
+    fresh_bm = BM25Scorer(fresh)
+    assert sorted(r["id"] for r in idx.live_rows()) == sorted(r["id"] for r in live)
+    for q in ("taboshi", "toby pond", "rune taboshi pond", "z3 z7"):
+        assert _by_id(idx, idx.search(q, k=15)) == _by_id(fresh, fresh.search(q, k=15))
+        assert _by_id(idx, bm.search(q, k=15)) == _by_id(fresh, fresh_bm.search(q, k=15))
+
+
+def test_update_replaces_all_passages_of_a_scroll():
+    rows = [
+        {"id": "a.md#0", "text": "toby pond", "meta": {"scroll_id": "a.md"}},
+        {"id": "a.md#1", "text": "toby leaf", "meta": {"scroll_id": "a.md"}},
+        {"id": "b.md#0", "text": "toby rune", "meta": {"scroll_id": "b.md"}},
+    ]
+    idx = LexicalIndex(rows)
+    snap = idx.snapshot()
+    idx.update([{"id": "a.md#0", "text": "mirror", "meta": {"scroll_id": "a.md"}}])
+    assert [idx.rows[d]["id"] for d, _ in idx.search("toby", k=5)] == ["b.md#0"]
+    assert idx.search("mirror", k=5)[0][0] == 3
+    # the previous snapshot is untouched
+    assert list(snap[1]["toby"].docs) == [0, 1, 2] and "mirror" not in snap[1]
+    idx.update(removed=["b.md"])
+    assert idx.search("toby", k=5) == [] and len(idx) == 1
+
+
+def test_positions_are_gap_varint_coded():
+    from tobyworld.agentic_rag.lexical_index import decode_positions, encode_positions
+
+    for pos in ([], [0], [5, 6, 7], [3, 200, 201, 70000, 70000 + 2**21]):
+        assert decode_positions(encode_positions(pos)) == pos
+    assert len(encode_positions([1, 2, 3])) == 3
+
+    far = {"id": "far.md", "text": " ".join(["w"] * 300) + " silence within", "meta": {}}
+    idx = LexicalIndex([far, {"id": "near.md", "text": "silence within", "meta": {}}])
+    assert idx.phrase_docs(["silence", "within"]) == [0, 1]
+    assert idx.postings["silence"].positions_at(0) == [300]
+
+
+def test_memory_stats_count_postings():
+    idx = LexicalIndex([{"id": f"{i}.md", "text": "toby pond leaf toby", "meta": {"title": "Toby"}}
+                        for i in range(50)])
+    st = idx.memory_stats()
+    # toby/pond/leaf + the file name tokens "<i>" and "md"
+    assert st["postings"] == sum(len(p) for p in idx.postings.values()) == 250
+    assert st["tokens"] == 3 + 50 + 1 and st["mapped_postings"] == 0
+    assert st["total_bytes"] == st["postings_bytes"] + st["vocab_bytes"] + st["doc_bytes"]
+    assert idx.memory_stats() is st  # cached until the next update()
+    idx.update(removed=["0.md"])
+    assert idx.memory_stats()["postings"] == 245
+
+
+def test_filtered_search_matches_filtered_reference():
+    from tobyworld.agentic_rag.lexical_index import BM25Scorer
+    from tobyworld.agentic_rag.meta_filters import normalize_filters, row_matches
+
+    rng = random.Random(11)
+    rows, vocab, weights = _zipf_rows(600, rng)
+    series, tags = ["TOBY_QL", "TOBY_QA", "TOBY_L", "notes"], ["lore", "epoch", "rune"]
+    for i, r in enumerate(rows):
+        r["id"] = f"/scrolls/{series[i % 4]}{i:04d}.md"
+        r["meta"].update(timestamp=1.7e9 + i * 86400.0, lang=rng.choice(["en", "EN", "ja"]),
+                         tags=rng.sample(tags, rng.randint(0, 2)))
+    idx = LexicalIndex(rows)
+    bm = BM25Scorer(idx)
+    cases = [{"series": "TOBY_QL"}, {"series": ["TOBY_QA", "TOBY_L"], "lang": "en"}, {"tags": "rune"},
+             {"since": "2024-01-15", "until": 1.7e9 + 100 * 86400.0}, {"series": "TOBY_QL", "tags": ["lore", "epoch"]},
+             {"lang": "fr"}, {"use_docs": 3}]
+
+    def check():
+        for f in cases:
+            mask, nf = idx.doc_mask(f), normalize_filters(f)
+            assert (mask is None) == (not nf)
+            ok = {d for d in range(len(idx.rows)) if d in idx._groups.get(idx.rows[d]["id"], ()) and row_matches(idx.rows[d], nf)}
+            if mask is not None:
+                assert set(mask.docs()) == ok
+            for q in ("toby", "toby pond z3", "z10 rune", "missing"):
+                ref = {d: s for d, s in idx.score(tokenize(q)).items() if d in ok}
+                assert idx.search(q, k=7, mask=mask) == idx.top_k(ref, 7)
+                bref = {d: s for d, s in bm.score(tokenize(q)).items() if d in ok}
+                _assert_same_ranking(bm.search(q, k=7, mask=mask), idx.top_k(bref, 7))
+
+    check()
+    changed = [dict(rows[5], meta=dict(rows[5]["meta"], tags=["rune"], lang="ja"))]
+    idx.update(changed, removed=[rows[1]["id"], rows[2]["id"]])
+    check()
+
+    stats = {}
+    idx.search("toby", k=5, stats=stats, mask=idx.doc_mask({"series": "TOBY_QL", "tags": "rune"}))
+    assert stats["filtered_docs"] < 100 and stats["postings_touched"] < stats["postings_total"]
+
+
+def test_update_prepares_bm25_state_on_the_writer(monkeypatch):
+    import tobyworld.agentic_rag.lexical_index as li
+
+    rows, _, _ = _zipf_rows(200, random.Random(5))
+    idx = LexicalIndex(rows)
+    bm = li.BM25Scorer(idx)
+    bm.search("toby pond", k=5)
+    before = dict(bm._state.impacts)
+    assert before
+
+    idx.update(removed=["no-such.md"])  # new generation, same docs: impact orders carried as is
+    assert bm._state.generation == idx.generation
+    assert all(bm._state.impacts[t][1] is before[t][1] for t in before)
+
+    idx.update([dict(rows[0], text=rows[0]["text"] + " toby")])  # norms moved: recomputed by the writer
+    assert bm._state.generation == idx.generation and set(before) <= set(bm._state.impacts)
+
+    calls = []
+    monkeypatch.setattr(bm, "_prepare", lambda *a: calls.append("prepare"))
+    monkeypatch.setattr(li, "impact_order", lambda *a: calls.append("impact_order"))
+    bm.search("toby pond", k=5)
+    assert calls == []  # nothing rebuilt on the request path
+
+
+def test_pluggable_local_retriever_scores_body_text_only(tmp_path):
+    from tobyworld.retrieval.pluggable import LocalRetriever as PluggableLocal
+
+    (tmp_path / "TOBY_QL001_pond.md").write_text("a leaf falls\n", encoding="utf-8")
+    (tmp_path / "TOBY_L002_leaf.md").write_text("the pond is still\npond\n", encoding="utf-8")
+    r = PluggableLocal(tmp_path)
+    assert [h["path"] for h in r.search("pond", top_k=5)] == [str(tmp_path / "TOBY_L002_leaf.md")]
+    assert r.search("md", top_k=5) == [] and r.search("toby_ql", top_k=5) == []
+    assert r.search("pond", top_k=5)[0]["score"] == 2.0 + 2.0  # body tf + phrase bonus
+
+
+def test_bare_date_until_covers_the_whole_day():
+    from tobyworld.agentic_rag.meta_filters import normalize_filters, row_matches
+
+    noon = 1704110400.0  # 2024-01-01T12:00:00Z
+    rows = [{"id": f"/scrolls/TOBY_QL{i:04d}.md", "text": "toby pond", "meta": {"timestamp": noon + i * 86400.0}}
+            for i in range(3)]
+    idx = LexicalIndex(rows)
+    f = {"since": "2024-01-01", "until": "2024-01-02"}
+    assert [row_matches(r, normalize_filters(f)) for r in rows] == [True, True, False]
+    assert set(idx.doc_mask(f).docs()) == {0, 1}
+    assert set(idx.doc_mask({"until": "2024-01-02T00:00:00"}).docs()) == {0}  # explicit time stays as given
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from tobyworld.agentic_rag.base import DocBlob
+from tobyworld.agentic_rag.multi_arc_retrieval import ArcConfig, MultiArcRetriever, Retriever
+
+
+class _Arc(Retriever):
+    def __init__(self, hits, delay=0.0, fail=False):
+        self.hits, self.delay, self.fail = hits, delay, fail
+
+    def retrieve(self, query, k=8, filters=None):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("backend down")
+        return [DocBlob(d, "", {}, s) for d, s in self.hits[:k]]
+
+
+def test_arcs_run_concurrently_and_slow_arc_is_dropped():
+    release = threading.Event()
+
+    class Hung(Retriever):
+        def retrieve(self, query, k=8, filters=None):
+            release.wait(5)
+            return [DocBlob("late.md", "", {}, 99.0)]
+
+    mar = MultiArcRetriever(
+        arcs={
+            "a": ArcConfig("a", k=4, timeout_s=1.0),
+            "b": ArcConfig("b", k=4, timeout_s=1.0),
+            "slow": ArcConfig("slow", k=4, timeout_s=0.05),
+            "bad": ArcConfig("bad", k=4),
+        },
+        backends={
+            "a": _Arc([("x.md", 1.0)], delay=0.2),
+            "b": _Arc([("y.md", 2.0)], delay=0.2),
+            "slow": Hung(),
+            "bad": _Arc([], fail=True),
+        },
+    )
+    t0 = time.perf_counter()
+    hits = mar.retrieve("q", k=8)
+    elapsed = time.perf_counter() - t0
+    release.set()
+    assert elapsed < 0.35  # a and b overlapped; the hung arc did not stall the answer
+    assert [h.doc_id for h in hits] == ["y.md", "x.md"]
+    assert mar.last_stats["per_arc"] == {"a": 1, "b": 1, "slow": "timeout", "bad": "error"}
+
+
+def test_merge_is_deterministic_regardless_of_finish_order():
+    a_hits = [("d1.md", 1.0), ("d2.md", 0.5), ("d3.md", 1.5)]
+    b_hits = [("d2.md", 0.5), ("d4.md", 2.0), ("d0.md", 1.5)]
+    results = []
+    for da, db in ((0.0, 0.05), (0.05, 0.0)):
+        mar = MultiArcRetriever(
+            arcs={"a": ArcConfig("a", weight=1.0), "b": ArcConfig("b", weight=1.0)},
+            backends={"a": _Arc(a_hits, delay=da), "b": _Arc(b_hits, delay=db)},
+        )
+        results.append([(h.doc_id, h.score) for h in mar.retrieve("q", k=8)])
+    assert results[0] == results[1]
+    assert results[0] == [("d4.md", 2.0), ("d0.md", 1.5), ("d3.md", 1.5), ("d1.md", 1.0), ("d2.md", 1.0)]
+
+
+def test_query_cache_copies_and_invalidates_by_generation():
+    from tobyworld.agentic_rag.multi_arc_retrieval import QueryCache
+
+    calls = []
+
+    class Counting(Retriever):
+        def retrieve(self, query, k=8, filters=None):
+            calls.append(query)
+            return [DocBlob("a.md", "text", {"title": "A"}, 2.0)]
+
+    cache = QueryCache(max_entries=2, ttl_s=60)
+    mar = MultiArcRetriever(arcs={"a": ArcConfig("a")}, backends={"a": Counting()}, cache=cache)
+    first = mar.retrieve("Who is  Toby?", k=4)
+    first[0].score, first[0].text = 0.0, "trimmed"
+    first[0].meta["title"] = "edited"
+    again = mar.retrieve("who is toby?", k=4)
+    assert len(calls) == 1 and mar.last_stats["cache"] == "hit"
+    assert (again[0].score, again[0].text, again[0].meta["title"]) == (2.0, "text", "A")
+
+    mar.retrieve("who is toby?", k=4, filters={"lang": "en"})  # different key
+    mar.retrieve("patience", k=4)  # evicts the LRU entry
+    cache.bump_generation()
+    mar.retrieve("who is toby?", k=4)
+    assert len(calls) == 4
+    st = cache.stats()
+    assert (st["hits"], st["misses"], st["evictions"], st["generation"]) == (1, 4, 2, 1)
+
+
+def test_failed_arc_is_not_cached_when_a_concurrent_request_succeeds():
+    from tobyworld.agentic_rag.multi_arc_retrieval import QueryCache
+
+    class Flaky(Retriever):
+        def retrieve(self, query, k=8, filters=None):
+            if query == "broken":
+                mar.retrieve("fine", k=4)  # another request on the shared instance finishes first
+                raise RuntimeError("arc down")
+            return [DocBlob("a.md", "text", {}, 1.0)]
+
+    cache = QueryCache(max_entries=8, ttl_s=60)
+    mar = MultiArcRetriever(arcs={"a": ArcConfig("a")}, backends={"a": Flaky()}, cache=cache)
+    assert mar.retrieve("broken", k=4) == []
+    assert mar.last_stats["per_arc"] == {"a": "error"} and mar.last_stats["cache"] == "miss"
+    assert cache.get(cache.key("broken", 4, None)) is None
+    assert cache.get(cache.key("fine", 4, None)) is not None
@@ -0,0 +1,49 @@
+import os
+
+from tobyworld.utils.parse_cache import ParseCache
+from tobyworld.utils.scroll_loader import ScrollIndex, load_scroll_index, read_scrolls
+
+
+def _corpus(root):
+    root.mkdir()
+    (root / "TOBY_QL001.md").write_text("---\ntitle: Dated\ndate: 2024-03-01\ntags: lore, toby\n---\n# H\n\ntoby pond", encoding="utf-8")
+    (root / "TOBY_QA002.md").write_bytes(b"# Crlf heading\r\n\r\nno frontmatter, mtime timestamp\r\n")
+    (root / "TOBY_L003.txt").write_text("plain text, title from the file name", encoding="utf-8")
+
+
+def _bump_mtime(p, secs=10):
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + secs * 1_000_000_000))
+
+
+def test_cached_rows_match_parsed_rows(tmp_path):
+    root = tmp_path / "scrolls"
+    _corpus(root)
+    cache = ParseCache(tmp_path / "cache.sqlite")
+    paths = sorted(root.iterdir())
+
+    assert read_scrolls(paths, cache=cache) == read_scrolls(paths)
+    assert cache.last["misses"] == 3 and len(cache) == 3
+    assert read_scrolls(paths, cache=cache) == read_scrolls(paths)
+    assert cache.last == {"hits_stamp": 3, "hits_hash": 0, "misses": 0, "hit_ratio": 1.0}
+
+    # touched: same bytes, new mtime → hash hit, and the mtime-derived timestamp follows the file
+    for p in paths:
+        _bump_mtime(p)
+    assert read_scrolls(paths, cache=cache) == read_scrolls(paths)
+    assert cache.last["hits_hash"] == 3
+    assert read_scrolls(paths, cache=cache) == read_scrolls(paths) and cache.last["hits_stamp"] == 3
+
+    (root / "TOBY_QL001.md").write_text("---\ntitle: Renamed\n---\nnew body", encoding="utf-8")
+    _bump_mtime(root / "TOBY_QL001.md", 20)
+    rows = read_scrolls(paths, cache=cache)
+    assert rows == read_scrolls(paths) and cache.last["misses"] == 1
+    assert rows[paths.index(root / "TOBY_QL001.md")]["meta"]["title"] == "Renamed"
+
+    # survives a reopen; rebuild prunes deleted scrolls
+    cache.close()
+    cache = ParseCache(tmp_path / "cache.sqlite")
+    assert load_scroll_index(root, cache=cache) == load_scroll_index(root) and cache.last["hit_ratio"] == 1.0
+    (root / "TOBY_L003.txt").unlink()
+    si = ScrollIndex(root, parse_cache=cache)
+    assert len(si.rows) == 2 and len(cache) == 2
@@ -0,0 +1,43 @@
+from tobyworld.agentic_rag.base import DocBlob
+from tobyworld.agentic_rag.multi_arc_retrieval import BM25Retriever
+from tobyworld.agentic_rag.pipeline import AgenticRAGPipeline
+from tobyworld.utils.scroll_loader import chunk_markdown, chunk_rows
+
+
+def _scroll(sid, paras):
+    return {"id": sid, "text": "\n\n".join(paras), "meta": {"path": sid, "title": sid}}
+
+
+def test_chunk_rows_keep_dense_numbering():
+    long_para = "patience " * 60
+    row = _scroll("a.md", ["tiny", long_para, "the pond is still and the mirror is quiet"])
+    assert chunk_markdown(row["text"], max_len=200)[0] == "tiny"
+    passages = chunk_rows([row], max_len=200)
+    # chunk 0 ("tiny") is below min_len: skipped, but numbering is preserved
+    assert [p["id"] for p in passages] == ["a.md#1", "a.md#2"]
+    assert passages[1]["meta"] == {"path": "a.md", "title": "a.md", "scroll_id": "a.md", "chunk": 2}
+
+
+def test_passage_retrieval_returns_the_matching_chunk():
+    rows = chunk_rows([
+        _scroll("a.md", ["toby waits by the pond " * 10, "taboshi is the leaf of patience " * 10]),
+        _scroll("b.md", ["the mirror reflects the seeker " * 10]),
+    ], max_len=300)
+    hits = BM25Retriever(rows).retrieve("taboshi leaf", k=3)
+    assert hits[0].doc_id == "a.md#1"
+    assert hits[0].meta["scroll_id"] == "a.md" and hits[0].meta["chunk"] == 1
+    assert hits[0].text.startswith("taboshi is the leaf")
+
+
+def test_collapse_passages_merges_per_scroll_in_rank_order():
+    docs = [
+        DocBlob("a.md#3", "A3", {"scroll_id": "a.md", "chunk": 3}, 5.0),
+        DocBlob("whole.md", "W", {}, 4.0),
+        DocBlob("b.md#0", "B0", {"scroll_id": "b.md", "chunk": 0}, 3.0),
+        DocBlob("a.md#1", "A1", {"scroll_id": "a.md", "chunk": 1}, 2.0),
+    ]
+    out = AgenticRAGPipeline._collapse_passages(docs)
+    assert [d.doc_id for d in out] == ["a.md", "whole.md", "b.md"]
+    assert out[0].text == "A3\n\nA1" and out[0].score == 5.0
+    assert out[0].meta["chunks"] == [3, 1]
+    assert "chunks" not in docs[0].meta
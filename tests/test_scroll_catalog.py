@@ -0,0 +1,57 @@
+import re
+
+import pytest
+
+from tobyworld.utils.scroll_catalog import ScrollCatalog, literal_plan, sre_parse
+
+
+def _rows():
+    return [
+        {"id": "/s/TOBY_QL001_rune.md", "meta": {"title": "The Rune of Patience"}},
+        {"id": "/s/TOBY_QA002.md", "meta": {"title": "Who is Toby?"}},
+        {"id": "/s/TOBY_L003_lotus.md", "meta": {"title": "Lotus Leaf Pond"}},
+        {"id": "/s/TOBY_F004.md", "meta": {"title": "Frog Season"}},
+        {"id": "/s/notes.md", "meta": {"title": "misc"}},
+    ]
+
+
+def _linear(rows, q, limit=25):
+    rx = re.compile(q, re.I)
+    out = []
+    for r in sorted(rows, key=lambda r: r["id"]):
+        name, title = r["id"].rsplit("/", 1)[1], r["meta"]["title"]
+        if rx.search(title) or rx.search(name):
+            out.append({"file": name, "title": title})
+    return out[:limit]
+
+
+def test_search_matches_linear_scan_after_updates():
+    rows = _rows()
+    cat = ScrollCatalog(rows)
+    queries = ["rune", "RUNE|lotus", "toby_q[la]", r"^who\b", "pat(ience)?", "(?:leaf|frog) (pond|season)", ".", "zzz"]
+    for q in queries:
+        assert cat.search(q)["matches"] == _linear(rows, q), q
+    big = ScrollCatalog(rows + [{"id": f"/s/TOBY_QL{i:04d}.md", "meta": {"title": "pond"}} for i in range(100, 400)])
+    assert big.search("lotus")["candidates"] == 1 and big.search("lotus")["scanned"] == 1
+
+    edited = {"id": "/s/TOBY_QA002.md", "meta": {"title": "Lotus dreams"}}
+    cat.update([edited], removed=["/s/TOBY_F004.md"])
+    rows = [edited if r["id"] == edited["id"] else r for r in rows if r["id"] != "/s/TOBY_F004.md"]
+    for q in queries:
+        assert cat.search(q)["matches"] == _linear(rows, q), q
+    assert cat.count_prefix("TOBY_F") == 0 and cat.count_prefix("TOBY_Q") == 2
+    assert cat.series_counts() == {"TOBY_QL": 1, "TOBY_QA": 1, "TOBY_L": 1, "": 1}
+    assert cat.titles("TOBY_") == ["Lotus Leaf Pond", "Lotus dreams", "The Rune of Patience"]
+
+    cat.update(removed=[r["id"] for r in rows[:3]])  # tombstones > live → compacted
+    assert cat.tombstones == 0 and len(cat) == 1
+    assert cat.search("misc")["matches"] == [{"file": "notes.md", "title": "misc"}]
+
+
+def test_literal_plan_and_unsafe_patterns():
+    assert literal_plan(sre_parse.parse("TOBY_QL(0|1)\\d+rune")) == ("and", ["toby_ql", "rune"])
+    assert literal_plan(sre_parse.parse("abc|x")) is None
+    cat = ScrollCatalog(_rows())
+    for bad in ["(a+)+$", "(a|aa)*", "(", "x" * 300]:
+        with pytest.raises(ValueError):
+            cat.search(bad)
@@ -0,0 +1,46 @@
+import os
+
+from tobyworld.utils.scroll_loader import ScrollIndex, load_scroll_index, read_scrolls
+
+
+def test_refresh_reports_only_changed_scrolls(tmp_path):
+    for name in ("TOBY_QL001.md", "TOBY_QA002.md", "TOBY_L003.md"):
+        (tmp_path / name).write_text(f"# {name}\n\ntoby pond", encoding="utf-8")
+    si = ScrollIndex(tmp_path)
+    assert len(si.rows) == 3 and not si.refresh()
+
+    (tmp_path / "TOBY_QL001.md").write_text("# QL1\n\ntoby pond, longer now", encoding="utf-8")
+    (tmp_path / "TOBY_L003.md").unlink()
+    (tmp_path / "TOBY_F004.md").write_text("# F4\n\nnew", encoding="utf-8")
+    delta = si.refresh()
+    assert [r["id"] for r in delta.changed] == [str(tmp_path / "TOBY_QL001.md")]
+    assert [r["id"] for r in delta.added] == [str(tmp_path / "TOBY_F004.md")]
+    assert delta.removed == [str(tmp_path / "TOBY_L003.md")]
+    assert sorted(os.path.basename(r["id"]) for r in si.rows) == ["TOBY_F004.md", "TOBY_QA002.md", "TOBY_QL001.md"]
+    assert si.maybe_refresh() == 0
+
+
+def test_parallel_loader_matches_serial(tmp_path):
+    for i in range(40):
+        fm = f"---\ntitle: Scroll {i}\ndate: 2024-0{1 + i % 9}-1{i % 9}\ntags: lore, toby\n---\n" if i % 3 else ""
+        (tmp_path / f"TOBY_QL{i:03d}.md").write_text(f"{fm}# Heading {i}\n\ntoby pond {i}", encoding="utf-8")
+    paths = sorted(tmp_path.glob("*.md"))
+    serial = read_scrolls(paths)
+    assert read_scrolls(paths, workers=2, chunk_size=8) == serial  # 5 chunks on a 2-process pool
+    assert load_scroll_index(tmp_path, workers=2) == serial
+
+
+def test_keyed_store_keeps_order_and_snapshots(tmp_path):
+    for i, d in enumerate(("2024-01-03", "2024-01-01", "2024-01-02")):
+        (tmp_path / f"TOBY_QL{i:03d}.md").write_text(f"---\ndate: {d}\n---\n# S{i}\n\nbody", encoding="utf-8")
+    si = ScrollIndex(tmp_path)
+    snap, gen = si.rows, si.generation
+    assert [r["meta"]["title"] for r in snap] == ["S0", "S2", "S1"]  # newest first
+    assert si.rows is snap and si.generation == gen  # unchanged: same snapshot object
+
+    rid = str(tmp_path / "TOBY_QL001.md")
+    assert rid in si and si.get(rid)["meta"]["title"] == "S1"
+    bumped = dict(si.get(rid), meta=dict(si.get(rid)["meta"], timestamp=snap[0]["meta"]["timestamp"] + 1))
+    si._apply([bumped], [str(tmp_path / "TOBY_QL002.md")])
+    assert [r["meta"]["title"] for r in si.rows] == ["S1", "S0"] and len(si) == 2
+    assert si.generation == gen + 1 and [r["meta"]["title"] for r in snap] == ["S0", "S2", "S1"]
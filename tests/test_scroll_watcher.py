@@ -0,0 +1,57 @@
+import threading
+import time
+
+from tobyworld.utils.scroll_watcher import ScrollWatcher
+
+
+def _wait(pred, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if pred():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_poll_watcher_debounces_burst_into_one_batch(tmp_path):
+    calls = []
+    done = threading.Event()
+
+    def on_batch():
+        calls.append(time.monotonic())
+        done.set()
+        return {"ok": True}
+
+    w = ScrollWatcher(tmp_path, on_batch, debounce_s=0.3, poll_s=0.05, backend="poll").start()
+    try:
+        time.sleep(0.1)
+        for i in range(20):  # a "git pull": many files within one debounce window
+            (tmp_path / f"TOBY_L{i:03d}.md").write_text(f"# Scroll {i}\n\nbody {i}\n", encoding="utf-8")
+        (tmp_path / "notes.bin").write_bytes(b"ignored")
+        assert done.wait(5.0)
+        time.sleep(0.6)
+        st = w.stats()
+        assert len(calls) == 1
+        assert st["batches"] == 1 and st["paths"] == 20
+        assert st["last_result"] == {"ok": True} and st["last_ms"] is not None
+
+        (tmp_path / "TOBY_L000.md").unlink()
+        assert _wait(lambda: w.stats()["batches"] == 2)
+        assert w.stats()["last_paths"] == 1
+    finally:
+        w.stop()
+    assert not w.running
+
+
+def test_watcher_records_batch_errors(tmp_path):
+    def on_batch():
+        raise RuntimeError("boom")
+
+    w = ScrollWatcher(tmp_path, on_batch, debounce_s=0.05, poll_s=0.05, backend="poll").start()
+    try:
+        time.sleep(0.1)  # let the baseline scan run
+        (tmp_path / "a.md").write_text("x", encoding="utf-8")
+        assert _wait(lambda: w.stats()["errors"] == 1)
+        assert "boom" in w.stats()["last_error"] and w.running
+    finally:
+        w.stop()
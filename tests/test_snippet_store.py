@@ -0,0 +1,75 @@
+import builtins
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from tobyworld.retrieval.pluggable import FaissRetriever, LocalRetriever
+from tobyworld.retrieval.snippet_store import SnippetStore, snippet_record, write_snippet_store
+
+
+def test_store_round_trips_records_through_mmap(tmp_path):
+    recs = [snippet_record("a/TOBY_QL001_Pond.md", "\n\n# The Pond 🐸\nfirst line of lore\n"),
+            ("", "", ""),  # removed row
+            snippet_record("b/TOBY_L002_no-heading.md", "  " + "x" * 300)]
+    assert recs[0][1:] == ("The Pond 🐸", "# The Pond 🐸")
+    assert recs[2][1] == "TOBY L002 no heading" and len(recs[2][2]) == 200 and recs[2][2].endswith("...")
+    write_snippet_store(tmp_path / "snippets.bin", recs)
+    store = SnippetStore.open(tmp_path / "snippets.bin")
+    assert len(store) == 3 and [store.get(i) for i in range(3)] == recs
+    assert SnippetStore.from_records(recs).get(2) == recs[2]
+    with pytest.raises(ValueError):
+        SnippetStore(b"not a store at all.....")
+
+
+def test_queries_open_no_files(tmp_path, monkeypatch):
+    (tmp_path / "TOBY_QL001_Pond.md").write_text("# Pond\nToby sits by the pond.\n", encoding="utf-8")
+    (tmp_path / "TOBY_L002_Leaf.md").write_text("A leaf falls on the water.\n", encoding="utf-8")
+    local = LocalRetriever(tmp_path)
+    assert all(not row["text"] for row in local._lex.rows)  # no full text kept after indexing
+
+    def no_open(*a, **kw):
+        raise AssertionError("file opened on the query path")
+    monkeypatch.setattr(builtins, "open", no_open)
+    monkeypatch.setattr(io, "open", no_open)
+    monkeypatch.setattr(Path, "read_text", no_open)
+    hits = local.search("toby pond", top_k=2)
+    assert hits[0]["title"] == "Pond" and hits[0]["snippet"] == "# Pond"
+    assert hits[0]["path"] == str(tmp_path / "TOBY_QL001_Pond.md")
+
+
+def test_faiss_rows_come_from_the_store(tmp_path):
+    faiss = pytest.importorskip("faiss")
+    vecs = np.eye(3, dtype=np.float32)
+    index = faiss.IndexFlatIP(3)
+    index.add(vecs)
+    recs = [snippet_record("a.md", "# A\nalpha"), ("", "", ""), snippet_record("c.md", "gamma")]
+    write_snippet_store(tmp_path / "snippets.bin", recs)
+    r = FaissRetriever.__new__(FaissRetriever)  # no SentenceTransformer here: search rows only
+    r._state = (None, index, ["a.md", "", "c.md"], None, SnippetStore.open(tmp_path / "snippets.bin"), None)
+    rows = r._search_rows(vecs[[0, 1]], 3)
+    assert [x[1:] for x in rows[0][:1]] == [recs[0]]
+    assert all(x[1] != "" for row in rows for x in row)  # removed row never surfaces
+
+
+def test_incremental_hnsw_still_returns_top_k(tmp_path):
+    faiss = pytest.importorskip("faiss")
+    from tobyworld.retrieval.ann import build_faiss_index
+
+    rng = np.random.default_rng(4)
+    embs = rng.standard_normal((300, 16)).astype(np.float32)
+    embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+    index, _ = build_faiss_index(embs, "hnsw", ids=np.arange(300))
+    faiss.write_index(index, str(tmp_path / "lore.index"))
+    q = embs[:1]
+    nearest = index.search(q, 20)[1][0].tolist()
+    paths = [f"s{i}.md" for i in range(300)]
+    for i in nearest[:10]:  # the ten nearest docs were removed (--incremental keeps them in the graph)
+        paths[i] = ""
+    (tmp_path / "paths.txt").write_text("\n".join(paths), encoding="utf-8")
+    r = FaissRetriever.__new__(FaissRetriever)
+    r.index_path = tmp_path
+    r._state = r._load()
+    hits = r._search_rows(q, 5)[0]
+    assert len(hits) == 5 and all(h[1] for h in hits)  # without the selector: 0 hits